@@ -0,0 +1,57 @@
+# <---Libraries--->
+import os, time
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+from helper_functions.tracing import tag
+
+# <---Configuration--->
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", str(60*60*24*3))) # Extracted article text is kept for 3 days
+ARTICLE_CACHE_NEGATIVE_TTL = float(os.getenv("ARTICLE_CACHE_NEGATIVE_TTL", str(60*60*6))) # Failed extractions are retried after 6 hours
+ARTICLE_CACHE_MAX_BYTES = int(os.getenv("ARTICLE_CACHE_MAX_BYTES", str(256 * 2**20))) # Compressed bytes before LRU eviction
+
+# Query parameters that change per feed request / campaign but not the article itself
+TRACKING_PARAMS = {"oc", "hl", "gl", "ceid", "fbclid", "gclid", "ref", "cmpid"}
+
+article_cache = DiskCache(CACHE_ROOT / "articles.sqlite", ttl = ARTICLE_CACHE_TTL, max_bytes = ARTICLE_CACHE_MAX_BYTES)
+# Feed link -> resolved article URL; kept apart so article_cache's entries and hit rate count articles only
+article_links = DiskCache(CACHE_ROOT / "article_links.sqlite", ttl = ARTICLE_CACHE_TTL)
+
+def normalise_url(url: str) -> str:
+    """Canonical cache key for an article link: lower-case host, no fragment, no tracking parameters."""
+    parts = urlsplit((url or "").strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values = True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(sorted(query)), ""))
+
+def cached_article_text(url: str, fetch: Callable[[str], str], resolve: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Return the extracted text for `url`, calling `fetch(url)` only on a cache miss.
+    Text is keyed on the article's own URL: `resolve(url)` follows redirects (Google News links) the first time a
+    link is seen, and the link is remembered as an alias of the resolved URL, so the same article reached through
+    another redirect or locale is not downloaded again. Each call is one lookup in the article cache's counters.
+    Empty results are cached too (with a shorter TTL) so dead or paywalled links are not re-downloaded every digest.
+    """
+    if not url:
+        return ""
+    link = normalise_url(url)
+    key = article_links.get(link)
+    if key is None and resolve is not None:
+        url = resolve(url) or url
+        key = normalise_url(url)
+        article_links.set(link, key) # Also when unchanged, so the link is not resolved again
+    key = key or link
+    cached = article_cache.get(key)
+    if cached is not None:
+        tag(cache = "hit", **({"via": "redirect"} if key != link else {}))
+        return cached
+    tag(cache = "miss")
+
+    start = time.perf_counter()
+    text = fetch(url) or ""
+    article_cache.set(key, text, ttl = None if text else ARTICLE_CACHE_NEGATIVE_TTL, cost = time.perf_counter() - start)
+    return text
+
+def article_cache_stats() -> dict:
+    return article_cache.stats()
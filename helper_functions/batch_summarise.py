@@ -0,0 +1,171 @@
+# <---Libraries--->
+import json, os, re, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from helper_functions.summary_cache import summary_cache, summary_key
+from helper_functions.tracing import bind, span, tag
+from helper_functions.llm_ledger import feature, record_cache_hit
+
+# <---Configuration--->
+SUMMARY_BATCH = os.getenv("NEWS_SUMMARY_BATCH", "1") != "0" # Summarise several articles per LLM request
+BATCH_TOKEN_BUDGET = int(os.getenv("NEWS_SUMMARY_BATCH_TOKENS", "12000")) # Input tokens of article text per request
+BATCH_MAX_WORKERS = int(os.getenv("NEWS_SUMMARY_BATCH_WORKERS", "3"))
+ARTICLE_MAX_CHARS = 12000 # Same per-article cap as single summaries
+
+#the template is hashed into the summary cache key, so editing it invalidates cached batch summaries
+BATCH_PROMPT = (
+    "You are a supply chain analyst. Write a crisp, factual summary of each article below for an email alert.\n"
+    "Focus on implications for {topic} supply chains if any.\n"
+    "Each summary: <= {max_words} words, no bullets, no preamble.\n"
+    'Return only a JSON array with one object per article, like: [{{"id": "a1", "summary": "..."}}]\n'
+    "Use exactly the article ids given.\n\n"
+    "{articles}"
+)
+
+# <---Batching--->
+def plan_batches(texts: List[str], budget: int = BATCH_TOKEN_BUDGET, count: Optional[Callable[[str], int]] = None) -> List[List[int]]:
+    """Group article indexes so each batch's article tokens stay within `budget`; an oversized article gets its own batch."""
+    if count is None:
+        from helper_functions.llm import count_tokens as count # tiktoken count (a character estimate without it), same helper used elsewhere
+    batches, current, used = [], [], 0
+    for idx, text in enumerate(texts):
+        tokens = count(text)
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_batch_response(txt: str, ids: List[str], max_words: int) -> Dict[str, str]:
+    """
+    Validate the model output and return {id: summary} for every well-formed entry.
+    Entries with unknown ids, empty or non-string summaries, or far more words than allowed are dropped.
+    """
+    data = None
+    try:
+        data = json.loads(txt)
+    except Exception:
+        m = re.search(r"\[.*\]", txt or "", flags=re.S)
+        if m:
+            try:
+                data = json.loads(m.group(0))
+            except Exception:
+                data = None
+    if isinstance(data, dict):
+        data = data.get("summaries") or data.get("articles")
+    if not isinstance(data, list):
+        return {}
+
+    out = {}
+    wanted = set(ids)
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        article_id, summary = str(entry.get("id", "")).strip(), entry.get("summary")
+        if article_id not in wanted or article_id in out or not isinstance(summary, str):
+            continue
+        summary = re.sub(r"\s+", " ", summary).strip()
+        if summary and len(summary.split()) <= max_words * 1.5:
+            out[article_id] = summary
+    return out
+
+# <---Summarisation--->
+def _cache_keys(text: str, topic: str, max_words: int, model: str, single_template: Optional[str]) -> List[str]:
+    keys = [summary_key(text, topic, max_words, model, BATCH_PROMPT)]
+    if single_template:
+        keys.append(summary_key(text, topic, max_words, model, single_template)) # Reuse summaries made one at a time
+    return keys
+
+def _summarise_one_batch(texts: List[str], topic: str, max_words: int, client, model: str) -> Dict[int, str]:
+    ids = [f"a{i + 1}" for i in range(len(texts))]
+    articles = "\n\n".join(f"### Article {article_id}\n{text}" for article_id, text in zip(ids, texts))
+    prompt = BATCH_PROMPT.format(topic=topic or "the relevant", max_words=max_words, articles=articles)
+    with span("summarise_batch", articles=len(ids)) as s:
+        try:
+            start = time.perf_counter()
+            with feature("summarise_batch"):
+                resp = client.responses.create(model=model, input=prompt)
+            elapsed = time.perf_counter() - start
+            parsed = parse_batch_response((resp.output_text or "").strip(), ids, max_words)
+            s["valid"] = len(parsed)
+        except Exception as e:
+            print(f"Error during batch summarisation: {e}")
+            s["error"] = str(e)[:200]
+            return {}
+    results = {}
+    for pos, article_id in enumerate(ids):
+        if article_id in parsed:
+            results[pos] = parsed[article_id]
+            summary_cache.set(summary_key(texts[pos], topic, max_words, model, BATCH_PROMPT), parsed[article_id], cost=elapsed / len(ids))
+    return results
+
+def summarise_batched(texts: List[str],
+                      topic: str,
+                      client,
+                      model: str,
+                      single: Callable[[str], str],
+                      max_words: int = 60,
+                      single_template: Optional[str] = None,
+                      budget: int = BATCH_TOKEN_BUDGET,
+                      max_workers: int = BATCH_MAX_WORKERS,
+                      deadline: Optional[float] = None) -> List[Optional[str]]:
+    """
+    Summarise many articles with as few LLM requests as possible.
+    Cached summaries are reused, the rest are packed into token-budgeted batches that run concurrently;
+    any article missing or invalid in its batch response is retried on its own with `single(text)`.
+    Returns summaries in input order; None where nothing could be produced before the deadline.
+    """
+    end = time.monotonic() + deadline if deadline is not None else None
+    texts = [(t or "")[:ARTICLE_MAX_CHARS] for t in texts]
+    results: List[Optional[str]] = [None] * len(texts)
+
+    todo, hits = [], 0
+    for idx, text in enumerate(texts):
+        if not text: # Nothing to summarise (failed extraction or deadline); not a cache hit either
+            results[idx] = ""
+            continue
+        for key in _cache_keys(text, topic, max_words, model, single_template):
+            cached = summary_cache.get(key)
+            if cached is not None:
+                results[idx] = cached
+                hits += 1
+                break
+        else:
+            todo.append(idx)
+    tag(cached=hits)
+    record_cache_hit(model, "responses", hits=hits, feature_name="summarise_batch")
+    if not todo:
+        return results
+
+    batches = [[todo[pos] for pos in batch] for batch in plan_batches([texts[i] for i in todo], budget)]
+    print(f"Summarising {len(todo)} article(s) in {len(batches)} batch request(s).")
+    tag(batches=len(batches))
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="news-batch")
+    try:
+        futures = {pool.submit(bind(_summarise_one_batch), [texts[i] for i in batch], topic, max_words, client, model): batch for batch in batches}
+        done, _ = wait(futures, timeout=None if end is None else max(0.0, end - time.monotonic()))
+        answered = set()
+        for future in done:
+            batch = futures[future]
+            answered.update(batch)
+            for pos, summary in future.result().items():
+                results[batch[pos]] = summary
+
+        #batches that came back but left some articles out or invalid; unfinished batches are not retried
+        retry = [i for i in todo if results[i] is None and i in answered]
+        retry_futures = {pool.submit(bind(single), texts[i]): i for i in retry}
+        if retry:
+            print(f"Retrying {len(retry)} article(s) individually after batch validation.")
+        done, _ = wait(retry_futures, timeout=None if end is None else max(0.0, end - time.monotonic()))
+        for future in done:
+            try:
+                results[retry_futures[future]] = future.result() or None
+            except Exception as e:
+                print(f"Error during single summarisation retry: {e}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
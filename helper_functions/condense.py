@@ -0,0 +1,62 @@
+# <---Libraries--->
+import os, re
+from typing import Callable, List, Optional
+
+# <---Configuration--->
+ARTICLE_TOKEN_BUDGET = int(os.getenv("NEWS_ARTICLE_TOKEN_BUDGET", "600")) # Tokens of article text sent for each summary
+MIN_SENTENCE_CHARS = 25
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])|\n+")
+WORD = re.compile(r"\w+")
+# Lines trafilatura sometimes keeps from page chrome
+BOILERPLATE = re.compile(r"\b(subscribe|sign up|newsletter|cookies?|all rights reserved|advertisement|click here|read more|follow us|terms of use|privacy policy)\b", re.I)
+
+# <---Condensation--->
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+
+def _phrase_hits(sentence: str, phrases: List[str]) -> int:
+    return sum(1 for phrase in phrases if phrase and phrase in sentence)
+
+def score_sentence(sentence: str, position: int, topic_words: set, terms: List[str], risk_terms: List[str]) -> float:
+    lower = sentence.lower()
+    words = set(WORD.findall(lower))
+    score = 2.0 * len(words & topic_words) + 1.5 * _phrase_hits(lower, terms) + 2.5 * _phrase_hits(lower, risk_terms)
+    score += 1.5 / (1 + position) # Leads carry the who/what/where
+    if BOILERPLATE.search(sentence):
+        score -= 5
+    return score
+
+def condense_article(text: str,
+                     topic: str = "",
+                     terms: Optional[List[str]] = None,
+                     risk_terms: Optional[List[str]] = None,
+                     budget: int = ARTICLE_TOKEN_BUDGET,
+                     count: Optional[Callable[[str], int]] = None) -> str:
+    """
+    Extractive pre-summary: keep the sentences most relevant to the topic, expanded terms and risk terms,
+    up to `budget` tokens, in their original order. Text already within budget is returned unchanged.
+    """
+    if count is None:
+        from helper_functions.llm import count_tokens as count
+    text = (text or "").strip()
+    if not text or count(text) <= budget:
+        return text
+
+    sentences = [s for s in split_sentences(text) if len(s) >= MIN_SENTENCE_CHARS]
+    topic_words = {w for w in WORD.findall((topic or "").lower()) if len(w) > 2}
+    terms = [t.lower() for t in (terms or []) if t]
+    risk_terms = [r.lower() for r in (risk_terms or []) if r]
+    ranked = sorted(range(len(sentences)),
+                    key = lambda i: -score_sentence(sentences[i], i, topic_words, terms, risk_terms))
+
+    chosen, used = set(), 0
+    for i in ranked:
+        tokens = count(sentences[i]) + 1
+        if used + tokens > budget:
+            continue
+        chosen.add(i)
+        used += tokens
+    if not chosen: # A single sentence longer than the budget
+        return sentences[ranked[0]][: budget * 4] if sentences else text[: budget * 4]
+    return " ".join(sentences[i] for i in sorted(chosen))
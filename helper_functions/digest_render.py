@@ -0,0 +1,110 @@
+# <---Libraries--->
+import html
+from string import Template
+from typing import Dict, List, Optional, Tuple
+
+# <---Templates--->
+# Compiled once at import: the page skeleton is split around the article rows, so a digest is
+# personalised header + pre-rendered rows + static footer.
+_PAGE = Template("""
+    <!doctype html>
+    <html>
+      <body style="margin:0;padding:0;background:#f6f8fb">
+        <table role="presentation" width="100%" cellspacing="0" cellpadding="0" style="background:#f6f8fb;padding:24px 0">
+          <tr>
+            <td align="center">
+              <table role="presentation" width="640" cellspacing="0" cellpadding="0" style="background:#ffffff;border-radius:10px;padding:24px; font-family:Arial,Helvetica,sans-serif">
+                <tr>
+                  <td>
+                    <h2 style="margin:0 0 4px 0; font-size:20px;color:#111">Hello $name,</h2>
+                    <div style="margin:0 0 14px 0; font-size:14px;color:#333">
+                      Here are the latest updates in <strong>$industry</strong>$header_loc.
+                    </div>
+                    <table role="presentation" width="100%" cellspacing="0" cellpadding="0">
+                      $items
+                    </table>
+                    </div>
+                    <div style="margin-top:24px;font-size:14px;color:#333">
+                      Best regards,
+Your News Alert Service
+                    </div>
+                  </td>
+                </tr>
+              </table>
+            </td>
+          </tr>
+        </table>
+      </body>
+    </html>
+    """)
+_HEAD_SOURCE, _TAIL = _PAGE.template.split("$items")
+HEAD = Template(_HEAD_SOURCE)
+TAIL = _TAIL
+
+ROW = Template("""
+                <tr>
+                  <td style="padding:12px 0;border-bottom:1px solid #eee">
+                    <div style="font-weight:600;margin-bottom:4px;">
+                      <a href="$link" style="color:#0b57d0;text-decoration:none">$title</a>
+                    </div>
+                    <div style="font-size:12px;color:#666;margin-bottom:6px;">$published</div>
+                    <div style="font-size:14px;line-height:1.45;color:#333">$summary</div>
+                    <div style="margin-top:6px">
+                      <a href="$link" style="font-size:13px;color:#0b57d0;">Open article</a>
+                    </div>
+                  </td>
+                </tr>
+                """)
+EMPTY_HTML = '<tr><td style="padding:12px 0; color:#444">No recent items found.</td></tr>'
+EMPTY_TEXT = "No recent items found."
+TEXT_FOOTER = "\n\nBest regards,\nYour News Alert Service\n"
+
+# <---Renderer--->
+class DigestRenderer:
+    """
+    Renders digests from cached per-article fragments.
+    Create one per batch run: each article's HTML row and plain-text block is rendered once,
+    and the joined block for a given item list is reused across every subscriber who gets it.
+    Usage:
+      renderer = DigestRenderer()
+      subject, body_html, body_text = renderer.render(name, key_industry, location, news_items)
+    """
+    def __init__(self):
+        self._fragments: Dict[tuple, Tuple[str, str]] = {}
+        self._blocks: Dict[tuple, Tuple[str, str]] = {}
+
+    def _fragment(self, item: dict) -> Tuple[tuple, Tuple[str, str]]:
+        summary = item.get("ai_summary") or item.get("summary") or ""
+        key = (item.get("link", ""), item.get("title", ""), item.get("published", ""), summary)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            link, title, published = key[0], key[1], key[2]
+            row = ROW.substitute(link=html.escape(link, quote=True),
+                                 title=html.escape(title),
+                                 published=html.escape(published),
+                                 summary=html.escape(summary) if summary else "-")
+            text = "\n".join(part for part in (title, published, summary, link) if part)
+            fragment = self._fragments[key] = (row, text)
+        return key, fragment
+
+    def items_block(self, news_items: List[dict]) -> Tuple[str, str]:
+        if not news_items:
+            return EMPTY_HTML, EMPTY_TEXT
+        keyed = [self._fragment(item) for item in news_items]
+        block_key = tuple(key for key, _ in keyed)
+        block = self._blocks.get(block_key)
+        if block is None:
+            block = self._blocks[block_key] = ("\n".join(row for _, (row, _) in keyed),
+                                               "\n\n".join(text for _, (_, text) in keyed))
+        return block
+
+    def render(self, name: str, key_industry: str, location: Optional[str], news_items: List[dict]) -> Tuple[str, str, str]:
+        """Return (subject, html_body, text_body) for one subscriber."""
+        items_html, items_text = self.items_block(news_items)
+        header_loc = f" • Focus region: {html.escape(location)}" if location else ""
+        body_html = "".join((HEAD.substitute(name=html.escape(name or ""), industry=html.escape(key_industry), header_loc=header_loc),
+                             items_html,
+                             TAIL))
+        text_loc = f" • Focus region: {location}" if location else ""
+        body_text = "".join((f"Hello {name or ''},\nHere are the latest updates in {key_industry}{text_loc}.\n\n", items_text, TEXT_FOOTER))
+        return f"{key_industry} Updates", body_html, body_text
@@ -0,0 +1,161 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import json, sqlite3, threading, time, zlib
+from pathlib import Path
+from typing import Any, Optional
+
+CACHE_ROOT = Path(os.getenv("CACHE_DIR", ".cache")) # Shared on-disk caches for all sessions and batch runs
+EVICTION_ORDER = {
+    "lru": "accessed ASC", # least recently used
+    "lfu": "hits ASC, accessed ASC", # least frequently used, ties broken by recency
+    "fifo": "created ASC", # oldest first
+}
+
+# <---Cache--->
+class DiskCache:
+    """
+    Persistent key/value cache backed by a single SQLite file.
+    Values are JSON-encoded and zlib-compressed. Entries expire by TTL and are evicted by `policy`
+    ("lru", "lfu" or "fifo") once the stored bytes pass `max_bytes`.
+    WAL mode plus one connection per thread makes it safe to share between concurrent Streamlit
+    sessions, pipeline worker threads and cron runs. Triggers keep the stored byte total in `counters`,
+    so a write only pays for eviction once the cache is actually over budget.
+    Usage:
+      cache = DiskCache(CACHE_ROOT / "articles.sqlite", ttl = 86400, max_bytes = 64 * 2**20)
+      cache.set("key", {"any": "json"})
+      cache.get("key")  # -> {"any": "json"}, or None on a miss
+    """
+    def __init__(self, path: str | Path, ttl: Optional[float] = None, max_bytes: Optional[int] = None, policy: str = "lru"):
+        if policy not in EVICTION_ORDER:
+            raise ValueError(f"Unknown eviction policy '{policy}', expected one of {sorted(EVICTION_ORDER)}.")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE") # Concurrent first opens must not seed the byte total twice
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB,
+                size INTEGER,
+                cost REAL DEFAULT 0,
+                expires REAL,
+                accessed REAL,
+                created REAL,
+                hits INTEGER DEFAULT 0
+                )""")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for column, ddl in (("created", "REAL"), ("hits", "INTEGER DEFAULT 0")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {ddl}") # Upgrade cache files written before eviction policies
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL DEFAULT 0)")
+            #running total of entries.size; seeded once for cache files written before it existed
+            conn.execute("INSERT OR IGNORE INTO counters (name, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_bytes_insert AFTER INSERT ON entries BEGIN "
+                         "UPDATE counters SET value = value + NEW.size WHERE name = 'bytes'; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_bytes_update AFTER UPDATE OF size ON entries BEGIN "
+                         "UPDATE counters SET value = value + NEW.size - OLD.size WHERE name = 'bytes'; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_bytes_delete AFTER DELETE ON entries BEGIN "
+                         "UPDATE counters SET value = value - OLD.size WHERE name = 'bytes'; END")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout = 30, isolation_level = None, check_same_thread = False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: float = 1) -> None:
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None when the key is missing or expired."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, cost, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[2] is not None and row[2] < now):
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._bump(conn, "misses")
+            return None
+        conn.execute("UPDATE entries SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._bump(conn, "hits")
+        self._bump(conn, "saved_seconds", row[1] or 0)
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, cost: float = 0) -> None:
+        """
+        Store `value` (anything JSON-serialisable except None).
+        `cost` is the time in seconds it took to produce the value, credited to `saved_seconds` on each hit.
+        """
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        conn = self._connect()
+        conn.execute("""
+            INSERT INTO entries (key, value, size, cost, expires, accessed, created, hits) VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, cost = excluded.cost,
+            expires = excluded.expires, accessed = excluded.accessed, created = excluded.created
+            """, (key, blob, len(blob), cost, now + ttl if ttl else None, now, now))
+        self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM entries") # The triggers bring the byte total back to 0
+        conn.execute("DELETE FROM counters WHERE name != 'bytes'")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in conn.execute(f"SELECT key, size FROM entries ORDER BY {EVICTION_ORDER[self.policy]}"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._bump(conn, "evictions", len(victims))
+
+    def stats(self) -> dict:
+        """Hit/miss counters (accumulated across processes) plus current size of the cache."""
+        conn = self._connect()
+        out = {"hits": 0, "misses": 0, "evictions": 0, "saved_seconds": 0.0}
+        for name, value in conn.execute("SELECT name, value FROM counters WHERE name != 'bytes'"):
+            out[name] = value if name == "saved_seconds" else int(value)
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        out.update({"entries": entries, "bytes": size})
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+        return out
@@ -0,0 +1,100 @@
+# <---Libraries--->
+import bisect, hashlib, os, re, time, zipfile
+from pathlib import Path
+from typing import Dict, List
+from xml.etree import ElementTree
+
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+
+# <---Document Text--->
+# Plain text of the repository formats, one string per page so search results can cite page numbers.
+# PDFs are read with pdfplumber (installed with crewai); DOCX, MD and TXT need only the standard library.
+# Legacy .doc files have no reader and come back empty.
+# Parsed text is cached by the sha256 of the file's bytes as one compressed record per document
+# ({"text": all pages joined, "offsets": start of each page}), so every consumer - both search tools and
+# the shared embedding index - parses a document at most once, whichever folder or user it comes from.
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+PARSER_VERSION = "1" # Bump when extraction changes so cached records are re-parsed
+PARSED_FORMATS = {".docx", ".md", ".pdf", ".txt"}
+PAGE_BREAK = "\f"
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(512 * 2**20))) # Compressed bytes before LRU eviction
+
+document_cache = DiskCache(CACHE_ROOT / "documents.sqlite", max_bytes = DOCUMENT_CACHE_MAX_BYTES)
+_hash_memo: Dict[tuple, str] = {}
+
+def _pdf_pages(path: Path) -> list[str]:
+    import pdfplumber
+    with pdfplumber.open(str(path)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+def _docx_pages(path: Path) -> list[str]:
+    with zipfile.ZipFile(path) as docx:
+        root = ElementTree.fromstring(docx.read("word/document.xml"))
+    paragraphs = ["".join(node.text or "" for node in paragraph.iter(f"{WORD_NS}t")) for paragraph in root.iter(f"{WORD_NS}p")]
+    return ["\n".join(p for p in paragraphs if p.strip())]
+
+def read_document_pages(path: Path) -> list[str]:
+    """Return the text of `path` as a list of pages (a single entry for formats without pages); [] if unreadable."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    try:
+        if suffix == ".pdf":
+            pages = _pdf_pages(path)
+        elif suffix == ".docx":
+            pages = _docx_pages(path)
+        elif suffix in (".md", ".txt"):
+            pages = [path.read_text(encoding = "utf-8", errors = "ignore")]
+        else:
+            return []
+    except Exception as e:
+        print(f"Could not read {path.name}: {e}")
+        return []
+    return [re.sub(r"[ \t]+", " ", page).replace(PAGE_BREAK, " ").strip() for page in pages]
+
+# <---Parsed Text Cache--->
+def document_hash(path: Path) -> str:
+    """sha256 of the file's bytes, memoised on (path, inode, size, mtime) so unchanged files are hashed once per process."""
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(2**20), b""):
+                digest.update(block)
+        _hash_memo[key] = digest.hexdigest()
+    return _hash_memo[key]
+
+def document_record(path: Path) -> dict:
+    """
+    Cached parse of `path`: {"hash", "text", "offsets"} where pages are joined with form feeds and
+    offsets[i] is the character position where page i + 1 starts. Parsed on the first request only.
+    """
+    path = Path(path)
+    doc_hash = document_hash(path)
+    key = f"{PARSER_VERSION}:{doc_hash}"
+    record = document_cache.get(key)
+    if record is None:
+        start = time.perf_counter()
+        pages = read_document_pages(path)
+        offsets, position = [], 0
+        for page in pages:
+            offsets.append(position)
+            position += len(page) + len(PAGE_BREAK)
+        record = {"text": PAGE_BREAK.join(pages), "offsets": offsets}
+        if pages: # Unreadable files are retried next time (e.g. once pdfplumber is installed)
+            document_cache.set(key, record, cost = time.perf_counter() - start)
+    return {"hash": doc_hash, **record}
+
+def document_pages(path: Path) -> List[str]:
+    "Cached text of `path`, one string per page."
+    record = document_record(path)
+    return record["text"].split(PAGE_BREAK) if record["offsets"] else []
+
+def page_at(record: dict, position: int) -> int:
+    "1-based page number containing character `position` of a record's text."
+    return max(1, bisect.bisect_right(record["offsets"], position))
+
+def document_cache_stats() -> dict:
+    return document_cache.stats()
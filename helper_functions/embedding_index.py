@@ -0,0 +1,164 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import sqlite3, threading, time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from helper_functions.disk_cache import CACHE_ROOT
+from helper_functions.document_text import document_hash, document_pages
+
+# <---Configuration--->
+# One chunk store for every user: documents are keyed by the sha256 of their bytes, so the Ceranum base
+# documents (and any upload two users share) are chunked and embedded once, whatever folder they sit in.
+INDEX_DB = CACHE_ROOT / "embeddings.sqlite"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+CHUNK_WORDS = int(os.getenv("EMBEDDING_CHUNK_WORDS", "220")) # Words per chunk
+CHUNK_OVERLAP = int(os.getenv("EMBEDDING_CHUNK_OVERLAP", "40")) # Words shared by neighbouring chunks
+
+_local = threading.local()
+_matrices: Dict[tuple, tuple] = {}
+_doc_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        INDEX_DB.parent.mkdir(parents = True, exist_ok = True)
+        conn = sqlite3.connect(str(INDEX_DB), timeout = 30, isolation_level = None, check_same_thread = False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+            doc_hash TEXT,
+            model TEXT,
+            name TEXT,
+            chunks INTEGER,
+            dimensions INTEGER,
+            created REAL,
+            PRIMARY KEY (doc_hash, model)
+            )''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS chunks (
+            doc_hash TEXT,
+            model TEXT,
+            idx INTEGER,
+            page INTEGER,
+            text TEXT,
+            vector BLOB,
+            PRIMARY KEY (doc_hash, model, idx)
+            )''')
+        _local.conn = conn
+    return conn
+
+# <---Documents--->
+def chunk_pages(pages: List[str], words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[tuple]:
+    "Split each page into overlapping word windows; returns [(page_number, text)] with 1-based page numbers."
+    step = max(1, words - overlap)
+    chunks = []
+    for number, page in enumerate(pages, start = 1):
+        tokens = page.split()
+        for start in range(0, max(len(tokens) - overlap, 1), step):
+            piece = " ".join(tokens[start:start + words])
+            if piece:
+                chunks.append((number, piece))
+    return chunks
+
+def _default_embed(texts: List[str]) -> List[List[float]]:
+    from helper_functions.llm import get_embedding
+    return get_embedding(texts, model = EMBEDDING_MODEL)
+
+def _doc_lock(doc_hash: str) -> threading.Lock:
+    with _locks_guard:
+        return _doc_locks.setdefault(doc_hash, threading.Lock())
+
+def is_indexed(doc_hash: str, model: str = EMBEDDING_MODEL) -> bool:
+    return _connect().execute("SELECT 1 FROM documents WHERE doc_hash = ? AND model = ?", (doc_hash, model)).fetchone() is not None
+
+def index_document(path: Path, embed: Optional[Callable[[List[str]], List[List[float]]]] = None, model: str = EMBEDDING_MODEL) -> tuple:
+    """
+    Make sure the document at `path` is in the shared store.
+    Returns (doc_hash, chunks_embedded); chunks_embedded is None when the content was already indexed by anyone.
+    Documents without extractable text are not recorded, so they are retried once a reader is available.
+    """
+    doc_hash = document_hash(path)
+    if is_indexed(doc_hash, model):
+        return doc_hash, None
+    with _doc_lock(doc_hash):
+        if is_indexed(doc_hash, model): # Another thread finished it while we waited
+            return doc_hash, None
+        chunks = chunk_pages(document_pages(path)) # Parsed text comes from the shared document cache
+        if not chunks:
+            return doc_hash, 0
+        vectors = (embed or _default_embed)([text for _, text in chunks]) # get_embedding batches by tokens, in parallel and cached
+        rows = [(doc_hash, model, idx, page, text, np.asarray(vector, dtype = np.float32).tobytes())
+                for idx, ((page, text), vector) in enumerate(zip(chunks, vectors))]
+        conn = _connect()
+        conn.execute("BEGIN")
+        conn.executemany("INSERT OR REPLACE INTO chunks (doc_hash, model, idx, page, text, vector) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO documents (doc_hash, model, name, chunks, dimensions, created) VALUES (?, ?, ?, ?, ?, ?)",
+                     (doc_hash, model, path.name, len(rows), len(vectors[0]) if vectors else 0, time.time()))
+        conn.execute("COMMIT")
+    return doc_hash, len(rows)
+
+def index_paths(paths: Iterable[Path], embed: Optional[Callable] = None, model: str = EMBEDDING_MODEL) -> Dict[str, str]:
+    """Index every document and return the search scope {doc_hash: file name} for them."""
+    scope, embedded, reused = {}, 0, 0
+    start = time.perf_counter()
+    for path in paths:
+        doc_hash, chunks = index_document(Path(path), embed, model)
+        scope[doc_hash] = Path(path).name
+        embedded, reused = embedded + (chunks or 0), reused + (chunks is None)
+    print(f"Repository scope: {len(scope)} document(s), {reused} already indexed, {embedded} chunk(s) embedded in {time.perf_counter() - start:.2f}s.")
+    return scope
+
+# <---Search--->
+def _matrix(doc_hash: str, model: str) -> tuple:
+    "(pages, texts, unit-normalised float32 matrix) for one document, loaded once per process."
+    key = (doc_hash, model)
+    if key not in _matrices:
+        rows = _connect().execute("SELECT page, text, vector FROM chunks WHERE doc_hash = ? AND model = ? ORDER BY idx", key).fetchall()
+        matrix = np.vstack([np.frombuffer(vector, dtype = np.float32) for _, _, vector in rows]) if rows else np.zeros((0, 1), np.float32)
+        norms = np.linalg.norm(matrix, axis = 1, keepdims = True)
+        _matrices[key] = ([page for page, _, _ in rows], [text for _, text, _ in rows], matrix / np.where(norms == 0, 1, norms))
+    return _matrices[key]
+
+def search(query: str, scope: Dict[str, str], top_k: int = 8, embed: Optional[Callable] = None, model: str = EMBEDDING_MODEL) -> List[dict]:
+    """Cosine search over the chunks of the documents in `scope` ({doc_hash: file name}); nothing is re-embedded except the query."""
+    if not query.strip() or not scope:
+        return []
+    vector = np.asarray((embed or _default_embed)([query])[0], dtype = np.float32)
+    vector /= np.linalg.norm(vector) or 1.0
+    candidates = []
+    for doc_hash, name in scope.items():
+        pages, texts, matrix = _matrix(doc_hash, model)
+        if not texts:
+            continue
+        scores = matrix @ vector
+        for idx in np.argsort(-scores)[:top_k]:
+            candidates.append({"file": name, "page": pages[idx], "chunk": int(idx), "score": float(scores[idx]), "text": texts[idx]})
+    return sorted(candidates, key = lambda hit: -hit["score"])[:top_k]
+
+def iter_chunks(doc_hashes: Iterable[str], model: str = EMBEDDING_MODEL) -> Iterable[tuple]:
+    "(doc_hash, idx, page, text, vector bytes) for every chunk of the given documents, in document then chunk order."
+    conn = _connect()
+    for doc_hash in doc_hashes:
+        yield from conn.execute("SELECT doc_hash, idx, page, text, vector FROM chunks WHERE doc_hash = ? AND model = ? ORDER BY idx", (doc_hash, model))
+
+def chunk_text(doc_hash: str, idx: int, model: str = EMBEDDING_MODEL) -> str:
+    row = _connect().execute("SELECT text FROM chunks WHERE doc_hash = ? AND model = ? AND idx = ?", (doc_hash, model, idx)).fetchone()
+    return row[0] if row else ""
+
+def index_stats(model: str = EMBEDDING_MODEL) -> dict:
+    documents, chunks = _connect().execute("SELECT COUNT(*), COALESCE(SUM(chunks), 0) FROM documents WHERE model = ?", (model,)).fetchone()
+    return {"documents": documents, "chunks": chunks}
@@ -0,0 +1,221 @@
+# <---Libraries--->
+import base64, hashlib, html, json, math, re, struct, threading, time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# <---Local HTTP Stand-ins--->
+# In-process replacements for Google News RSS, article sites and the OpenAI Responses/Embeddings APIs, used with
+# helper_functions/smtp_sink to benchmark the app offline. They all run on one HTTP server:
+#   /rss/search?q=...        deterministic RSS for any query, with ETag / 304 support
+#   /article/<n>             static article page, served after `article_latency` seconds
+#   /v1/responses            Responses API: term expansions, single summaries and batch summaries
+#   /v1/embeddings           deterministic hashed bag-of-words vectors (float list or base64)
+# Every request is counted in `FakeServices.counts`.
+
+TOPICS = ["semiconductor", "crude oil", "vaccine", "steel", "container shipping", "air cargo", "rice", "lithium", "trucking", "pharmaceutical"]
+EVENTS = ["port closure", "strike", "export ban", "tariff", "typhoon", "flood", "sanction", "power outage", "congestion", "drought"]
+PLACES = ["Singapore", "United States", "Malaysia", "China", "Germany", "Red Sea", "Panama Canal", "Japan"]
+
+def _story(n: int) -> dict:
+    topic, event, place = TOPICS[n % len(TOPICS)], EVENTS[(n // 3) % len(EVENTS)], PLACES[(n // 7) % len(PLACES)]
+    return {"n": n,
+            "title": f"{event.title()} hits {topic} supply chain in {place} (report {n})",
+            "summary": f"A {event} in {place} is disrupting {topic} shipments, according to industry sources."}
+
+def _article_html(n: int, paragraphs: int) -> str:
+    story = _story(n)
+    body = "".join(
+        f"<p>{html.escape(story['summary'])} Analysts said paragraph {i} of report {n} shows lead times for "
+        f"{TOPICS[(n + i) % len(TOPICS)]} buyers lengthening as {EVENTS[(n + i) % len(EVENTS)]} risk spreads. "
+        f"Manufacturers are reviewing inventory buffers and alternative suppliers across the region.</p>"
+        for i in range(paragraphs))
+    return f"<html><head><title>{html.escape(story['title'])}</title></head><body><article><h1>{html.escape(story['title'])}</h1>{body}</article></body></html>"
+
+def _tokens(text: str) -> int:
+    "Rough token count (4 characters per token) for the usage blocks."
+    return max(1, len(text) // 4) if text else 0
+
+def _response_payload(model: str, text: str, prompt: str = "") -> dict:
+    return {
+        "id": "resp_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:24],
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [{"type": "message", "id": "msg_bench", "status": "completed", "role": "assistant",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {"input_tokens": _tokens(prompt), "output_tokens": _tokens(text), "total_tokens": _tokens(prompt) + _tokens(text),
+                  "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}},
+    }
+
+EMBEDDING_DIMENSIONS = 256
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> list:
+    "Unit-length hashed bag of words, so texts sharing words get similar vectors."
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", (text or "").lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size = 8).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def _embedding_payload(model: str, texts: list, encoding: str | None) -> dict:
+    data = []
+    for index, text in enumerate(texts):
+        vector = fake_embedding(text)
+        if encoding == "base64":
+            vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+        data.append({"object": "embedding", "index": index, "embedding": vector})
+    tokens = sum(_tokens(text) for text in texts)
+    return {"object": "list", "data": data, "model": model, "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8", headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        services, url = self.server.services, urlsplit(self.path)
+        if url.path.startswith("/rss/"):
+            query = parse_qs(url.query).get("q", [""])[0]
+            body = services.rss(query)
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                services.count("rss_304")
+                return self._send(304, headers = {"ETag": etag})
+            services.count("rss")
+            return self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+        match = re.fullmatch(r"/article/(\d+)", url.path)
+        if match:
+            services.count("article")
+            time.sleep(services.article_latency)
+            return self._send(200, _article_html(int(match.group(1)), services.article_paragraphs).encode("utf-8"))
+        self._send(404)
+
+    def do_POST(self) -> None:
+        services, path = self.server.services, urlsplit(self.path).path.rstrip("/")
+        if path not in ("/v1/responses", "/v1/embeddings"):
+            return self._send(404)
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if path == "/v1/embeddings":
+            texts = request.get("input")
+            texts = [texts] if isinstance(texts, str) else [t if isinstance(t, str) else " ".join(map(str, t)) for t in texts or []]
+            services.count("embedding_requests")
+            services.count("embedding_inputs", len(texts))
+            time.sleep(services.llm_latency)
+            payload = _embedding_payload(request.get("model") or "bench", texts, request.get("encoding_format"))
+            return self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+        prompt = request.get("input") if isinstance(request.get("input"), str) else json.dumps(request.get("input"))
+        kind, text = services.answer(prompt or "")
+        services.count("llm_" + kind)
+        time.sleep(services.llm_latency)
+        self._send(200, json.dumps(_response_payload(request.get("model") or "bench", text, prompt or "")).encode("utf-8"), "application/json")
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class FakeServices:
+    """
+    Local news, article and LLM endpoints for offline benchmarking.
+    Usage:
+      with FakeServices(article_latency = 0.2, llm_latency = 0.5).start() as fake:
+          os.environ["NEWS_RSS_URL"] = fake.rss_url_template
+          os.environ["OPENAI_BASE_URL"] = fake.openai_base_url
+    """
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 items_per_feed: int = 30,
+                 story_pool: int = 400,
+                 article_latency: float = 0.0,
+                 article_paragraphs: int = 12,
+                 llm_latency: float = 0.0):
+        self.items_per_feed = items_per_feed
+        self.story_pool = story_pool
+        self.article_latency = article_latency
+        self.article_paragraphs = article_paragraphs
+        self.llm_latency = llm_latency
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._published = formatdate(time.time() - 3600, usegmt = True) # Fixed per server so repeat polls can be answered with 304
+        self._server = _Server((host, port), _Handler)
+        self._server.services = self
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def rss_url_template(self) -> str:
+        return self.base_url + "/rss/search?q={query}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return self.base_url + "/v1"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[key] += n
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+    # Content
+    def rss(self, query: str) -> bytes:
+        seed = int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16)
+        step = 1 + seed % 7
+        picks = [(seed + i * step) % self.story_pool for i in range(self.items_per_feed)] # Overlapping shards share stories, as real ones do
+        items = []
+        for n in picks:
+            story = _story(n)
+            items.append(
+                f"<item><title>{html.escape(story['title'])}</title>"
+                f"<link>{self.base_url}/article/{n}?utm_source=rss&amp;oc=5</link>"
+                f"<guid isPermaLink=\"false\">bench-{n}</guid>"
+                f"<pubDate>{self._published}</pubDate>"
+                f"<description>{html.escape(story['summary'])}</description></item>")
+        return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Benchmark feed</title>'
+                + "".join(items) + "</channel></rss>").encode("utf-8")
+
+    def answer(self, prompt: str) -> tuple:
+        if "supply-chain monitoring query" in prompt:
+            topic = prompt.rsplit("TOPIC:", 1)[-1].split("\n", 1)[0].strip()
+            terms = [topic] + [f"{topic} {word}" for word in ("supply chain", "shortage", "exports", "logistics")] + TOPICS[:6]
+            return "expansion", json.dumps({"terms": terms})
+        ids = re.findall(r"^### Article (\S+)$", prompt, flags = re.M)
+        if ids:
+            return "batch", json.dumps([{"id": article_id, "summary": f"Benchmark summary for article {article_id}: disruption noted, buyers reviewing suppliers."} for article_id in ids])
+        return "summary", "Benchmark summary: disruption noted, buyers reviewing suppliers and inventory buffers."
+
+    # Lifecycle
+    def start(self) -> "FakeServices":
+        threading.Thread(target = self._server.serve_forever, name = "fake-services", daemon = True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeServices":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,134 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import json, sqlite3, threading, time, zlib
+from typing import Iterable, List
+
+import feedparser
+
+from helper_functions.article_cache import normalise_url
+from helper_functions.disk_cache import CACHE_ROOT
+from helper_functions.tracing import span
+
+# <---Configuration--->
+FEED_DB = CACHE_ROOT / "feeds.sqlite"
+SEEN_RETENTION_DAYS = float(os.getenv("FEED_SEEN_RETENTION_DAYS", "30")) # Forget delivered items after this long
+
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        FEED_DB.parent.mkdir(parents = True, exist_ok = True)
+        conn = sqlite3.connect(str(FEED_DB), timeout = 30, isolation_level = None, check_same_thread = False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feed_state (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            modified TEXT,
+            entries BLOB,
+            checked REAL
+            )''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen (
+            subscriber TEXT,
+            feed TEXT,
+            item_key TEXT,
+            first_seen REAL,
+            PRIMARY KEY (subscriber, feed, item_key)
+            )''')
+        _local.conn = conn
+    return conn
+
+# <---Polling--->
+def _entry_to_dict(entry) -> dict:
+    #prefer summary and fall back to news content if present
+    raw_summary = getattr(entry, "summary", "") or ""
+    if not raw_summary and getattr(entry, "content", None):
+        try:
+            raw_summary = entry.content[0].value
+        except Exception:
+            pass
+    return {
+        "id": getattr(entry, "id", "") or getattr(entry, "link", ""),
+        "title": getattr(entry, "title", ""),
+        "link": getattr(entry, "link", ""),
+        "summary": raw_summary,
+        "published": getattr(entry, "published", ""),
+    }
+
+def poll_feed(url: str) -> List[dict]:
+    """
+    Fetch a feed with a conditional GET (ETag / Last-Modified from the previous poll).
+    An unchanged feed costs one 304 and the stored entries are returned instead.
+    Entries are plain dicts: {"id", "title", "link", "summary", "published"}.
+    """
+    conn = _connect()
+    row = conn.execute("SELECT etag, modified, entries FROM feed_state WHERE url = ?", (url,)).fetchone()
+    etag, modified, stored = row if row else (None, None, None)
+
+    with span("feed_poll", url = url[:160]) as s:
+        feed = feedparser.parse(url, etag = etag, modified = modified)
+        s["status"] = feed.get("status")
+        s["cache"] = "hit" if feed.get("status") == 304 and stored is not None else "miss"
+    if feed.get("status") == 304 and stored is not None:
+        print(f"Feed unchanged (304): {url[:80]}")
+        conn.execute("UPDATE feed_state SET checked = ? WHERE url = ?", (time.time(), url))
+        return json.loads(zlib.decompress(stored))
+
+    entries = [_entry_to_dict(entry) for entry in feed.entries]
+    if entries or stored is None:
+        conn.execute('''
+            INSERT INTO feed_state (url, etag, modified, entries, checked) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET etag = excluded.etag, modified = excluded.modified,
+            entries = excluded.entries, checked = excluded.checked
+            ''', (url, feed.get("etag"), feed.get("modified"), zlib.compress(json.dumps(entries).encode("utf-8")), time.time()))
+    return entries
+
+# <---Seen Items--->
+def _item_keys(item: dict) -> List[str]:
+    keys = []
+    if item.get("id"):
+        keys.append("id:" + item["id"])
+    if item.get("link"):
+        keys.append("link:" + normalise_url(item["link"]))
+    return keys
+
+def _seen_keys(subscriber: str, feed: str) -> set:
+    rows = _connect().execute("SELECT item_key FROM seen WHERE subscriber = ? AND feed = ?", (subscriber, feed))
+    return {row[0] for row in rows}
+
+def _is_new(item: dict, subscriber: str, cache: dict) -> bool:
+    feed = item.get("feed", "")
+    if (subscriber, feed) not in cache:
+        cache[(subscriber, feed)] = _seen_keys(subscriber, feed)
+    seen = cache[(subscriber, feed)]
+    return not any(key in seen for key in _item_keys(item))
+
+def unseen_items(subscriber: str, items: Iterable[dict]) -> List[dict]:
+    """Items `subscriber` has not been sent yet from the item's `feed` (matched by GUID or normalised link)."""
+    cache = {}
+    return [item for item in items if _is_new(item, subscriber, cache)]
+
+def unseen_by_any(subscribers: Iterable[str], items: Iterable[dict]) -> List[dict]:
+    """Items that at least one of `subscribers` still needs; used when one fetch serves a whole group."""
+    subscribers, cache = list(subscribers), {}
+    return [item for item in items if any(_is_new(item, subscriber, cache) for subscriber in subscribers)]
+
+def mark_seen(subscriber: str, items: Iterable[dict]) -> None:
+    """Record delivered items; each item carries the `feed` it came from."""
+    now = time.time()
+    rows = [(subscriber, item.get("feed", ""), key, now) for item in items for key in _item_keys(item)]
+    conn = _connect()
+    conn.executemany("INSERT OR IGNORE INTO seen (subscriber, feed, item_key, first_seen) VALUES (?, ?, ?, ?)", rows)
+    conn.execute("DELETE FROM seen WHERE first_seen < ?", (now - SEEN_RETENTION_DAYS * 86400,))
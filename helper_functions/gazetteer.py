@@ -0,0 +1,437 @@
+# <---Libraries--->
+import difflib, re, unicodedata
+from functools import lru_cache
+from typing import Optional
+
+# <---Data--->
+# ISO2 | ISO3 | canonical name | comma-separated aliases
+COUNTRIES = """
+AF|AFG|Afghanistan|
+AL|ALB|Albania|
+DZ|DZA|Algeria|
+AD|AND|Andorra|
+AO|AGO|Angola|
+AG|ATG|Antigua and Barbuda|Antigua
+AR|ARG|Argentina|
+AM|ARM|Armenia|
+AU|AUS|Australia|
+AT|AUT|Austria|
+AZ|AZE|Azerbaijan|
+BS|BHS|Bahamas|The Bahamas
+BH|BHR|Bahrain|
+BD|BGD|Bangladesh|
+BB|BRB|Barbados|
+BY|BLR|Belarus|
+BE|BEL|Belgium|
+BZ|BLZ|Belize|
+BJ|BEN|Benin|
+BT|BTN|Bhutan|
+BO|BOL|Bolivia|Plurinational State of Bolivia
+BA|BIH|Bosnia and Herzegovina|Bosnia
+BW|BWA|Botswana|
+BR|BRA|Brazil|Brasil
+BN|BRN|Brunei|Brunei Darussalam
+BG|BGR|Bulgaria|
+BF|BFA|Burkina Faso|
+BI|BDI|Burundi|
+CV|CPV|Cabo Verde|Cape Verde
+KH|KHM|Cambodia|Kampuchea
+CM|CMR|Cameroon|
+CA|CAN|Canada|
+CF|CAF|Central African Republic|CAR
+TD|TCD|Chad|
+CL|CHL|Chile|
+CN|CHN|China|PRC, People's Republic of China, Mainland China
+CO|COL|Colombia|
+KM|COM|Comoros|
+CG|COG|Republic of the Congo|Congo-Brazzaville, Congo Republic
+CD|COD|Democratic Republic of the Congo|DRC, DR Congo, Congo-Kinshasa, Zaire
+CR|CRI|Costa Rica|
+CI|CIV|Côte d'Ivoire|Ivory Coast, Cote d'Ivoire
+HR|HRV|Croatia|
+CU|CUB|Cuba|
+CY|CYP|Cyprus|
+CZ|CZE|Czechia|Czech Republic
+DK|DNK|Denmark|
+DJ|DJI|Djibouti|
+DM|DMA|Dominica|
+DO|DOM|Dominican Republic|
+EC|ECU|Ecuador|
+EG|EGY|Egypt|
+SV|SLV|El Salvador|
+GQ|GNQ|Equatorial Guinea|
+ER|ERI|Eritrea|
+EE|EST|Estonia|
+SZ|SWZ|Eswatini|Swaziland
+ET|ETH|Ethiopia|
+FJ|FJI|Fiji|
+FI|FIN|Finland|
+FR|FRA|France|
+GA|GAB|Gabon|
+GM|GMB|Gambia|The Gambia
+GE|GEO|Georgia|
+DE|DEU|Germany|Deutschland
+GH|GHA|Ghana|
+GR|GRC|Greece|Hellas
+GD|GRD|Grenada|
+GT|GTM|Guatemala|
+GN|GIN|Guinea|
+GW|GNB|Guinea-Bissau|
+GY|GUY|Guyana|
+HT|HTI|Haiti|
+HN|HND|Honduras|
+HK|HKG|Hong Kong|Hong Kong SAR, HKSAR
+HU|HUN|Hungary|
+IS|ISL|Iceland|
+IN|IND|India|Bharat
+ID|IDN|Indonesia|
+IR|IRN|Iran|Islamic Republic of Iran, Persia
+IQ|IRQ|Iraq|
+IE|IRL|Ireland|Eire, Republic of Ireland
+IL|ISR|Israel|
+IT|ITA|Italy|Italia
+JM|JAM|Jamaica|
+JP|JPN|Japan|Nippon
+JO|JOR|Jordan|
+KZ|KAZ|Kazakhstan|
+KE|KEN|Kenya|
+KI|KIR|Kiribati|
+KP|PRK|North Korea|DPRK, Democratic People's Republic of Korea
+KR|KOR|South Korea|Korea, ROK, Republic of Korea
+KW|KWT|Kuwait|
+KG|KGZ|Kyrgyzstan|Kyrgyz Republic
+LA|LAO|Laos|Lao PDR, Lao People's Democratic Republic
+LV|LVA|Latvia|
+LB|LBN|Lebanon|
+LS|LSO|Lesotho|
+LR|LBR|Liberia|
+LY|LBY|Libya|
+LI|LIE|Liechtenstein|
+LT|LTU|Lithuania|
+LU|LUX|Luxembourg|
+MO|MAC|Macau|Macao
+MG|MDG|Madagascar|
+MW|MWI|Malawi|
+MY|MYS|Malaysia|
+MV|MDV|Maldives|
+ML|MLI|Mali|
+MT|MLT|Malta|
+MH|MHL|Marshall Islands|
+MR|MRT|Mauritania|
+MU|MUS|Mauritius|
+MX|MEX|Mexico|México
+FM|FSM|Micronesia|Federated States of Micronesia
+MD|MDA|Moldova|Republic of Moldova
+MC|MCO|Monaco|
+MN|MNG|Mongolia|
+ME|MNE|Montenegro|
+MA|MAR|Morocco|
+MZ|MOZ|Mozambique|
+MM|MMR|Myanmar|Burma
+NA|NAM|Namibia|
+NR|NRU|Nauru|
+NP|NPL|Nepal|
+NL|NLD|Netherlands|Holland, The Netherlands
+NZ|NZL|New Zealand|Aotearoa
+NI|NIC|Nicaragua|
+NE|NER|Niger|
+NG|NGA|Nigeria|
+MK|MKD|North Macedonia|Macedonia
+NO|NOR|Norway|
+OM|OMN|Oman|
+PK|PAK|Pakistan|
+PW|PLW|Palau|
+PS|PSE|Palestine|State of Palestine, Palestinian Territories
+PA|PAN|Panama|
+PG|PNG|Papua New Guinea|PNG
+PY|PRY|Paraguay|
+PE|PER|Peru|
+PH|PHL|Philippines|The Philippines
+PL|POL|Poland|
+PT|PRT|Portugal|
+PR|PRI|Puerto Rico|
+QA|QAT|Qatar|
+RO|ROU|Romania|
+RU|RUS|Russia|Russian Federation
+RW|RWA|Rwanda|
+KN|KNA|Saint Kitts and Nevis|St Kitts and Nevis
+LC|LCA|Saint Lucia|St Lucia
+VC|VCT|Saint Vincent and the Grenadines|St Vincent and the Grenadines
+WS|WSM|Samoa|
+SM|SMR|San Marino|
+ST|STP|Sao Tome and Principe|São Tomé and Príncipe
+SA|SAU|Saudi Arabia|KSA, Saudi
+SN|SEN|Senegal|
+RS|SRB|Serbia|
+SC|SYC|Seychelles|
+SL|SLE|Sierra Leone|
+SG|SGP|Singapore|Republic of Singapore
+SK|SVK|Slovakia|Slovak Republic
+SI|SVN|Slovenia|
+SB|SLB|Solomon Islands|
+SO|SOM|Somalia|
+ZA|ZAF|South Africa|RSA
+SS|SSD|South Sudan|
+ES|ESP|Spain|España
+LK|LKA|Sri Lanka|Ceylon
+SD|SDN|Sudan|
+SR|SUR|Suriname|
+SE|SWE|Sweden|
+CH|CHE|Switzerland|Swiss Confederation
+SY|SYR|Syria|Syrian Arab Republic
+TW|TWN|Taiwan|Chinese Taipei, Republic of China
+TJ|TJK|Tajikistan|
+TZ|TZA|Tanzania|United Republic of Tanzania
+TH|THA|Thailand|Siam
+TL|TLS|Timor-Leste|East Timor
+TG|TGO|Togo|
+TO|TON|Tonga|
+TT|TTO|Trinidad and Tobago|Trinidad
+TN|TUN|Tunisia|
+TR|TUR|Türkiye|Turkey, Turkiye
+TM|TKM|Turkmenistan|
+TV|TUV|Tuvalu|
+UG|UGA|Uganda|
+UA|UKR|Ukraine|
+AE|ARE|United Arab Emirates|UAE, Emirates
+GB|GBR|United Kingdom|UK, U.K., Britain, Great Britain, England, Scotland, Wales
+US|USA|United States|U.S., U.S.A., America, United States of America, the States
+UY|URY|Uruguay|
+UZ|UZB|Uzbekistan|
+VU|VUT|Vanuatu|
+VA|VAT|Vatican City|Holy See, Vatican
+VE|VEN|Venezuela|
+VN|VNM|Vietnam|Viet Nam
+YE|YEM|Yemen|
+ZM|ZMB|Zambia|
+ZW|ZWE|Zimbabwe|
+"""
+
+# ISO2 of the country | canonical name | comma-separated aliases
+# Only the port's own names and codes: a bare city name must not narrow a search to the port (see PLACES).
+PORTS = """
+SG|Port of Singapore|Singapore port, PSA Singapore, Tuas Port
+CN|Port of Shanghai|Shanghai port, Yangshan Port, Yangshan
+CN|Port of Ningbo-Zhoushan|Ningbo port, Ningbo-Zhoushan port, Zhoushan port
+CN|Port of Shenzhen|Shenzhen port, Yantian Port, Yantian, Shekou Port
+CN|Port of Guangzhou|Guangzhou port, Nansha Port
+CN|Port of Qingdao|Qingdao port
+CN|Port of Tianjin|Tianjin port, Xingang
+CN|Port of Xiamen|Xiamen port
+CN|Port of Dalian|Dalian port
+HK|Port of Hong Kong|Hong Kong port, Kwai Tsing
+KR|Port of Busan|Busan port, Pusan port
+TW|Port of Kaohsiung|Kaohsiung port
+JP|Port of Tokyo|Tokyo port
+JP|Port of Yokohama|Yokohama port
+JP|Port of Kobe|Kobe port
+MY|Port Klang|Klang port
+MY|Port of Tanjung Pelepas|Tanjung Pelepas, PTP
+TH|Port of Laem Chabang|Laem Chabang
+VN|Port of Ho Chi Minh City|Saigon port, Cat Lai
+VN|Port of Haiphong|Haiphong port, Hai Phong port
+ID|Port of Tanjung Priok|Tanjung Priok
+PH|Port of Manila|Manila port
+LK|Port of Colombo|Colombo port
+IN|Jawaharlal Nehru Port|Nhava Sheva, JNPT, JNPA
+IN|Port of Mundra|Mundra port
+BD|Port of Chittagong|Chittagong port, Chattogram port
+PK|Port of Karachi|Karachi port
+AE|Port of Jebel Ali|Jebel Ali
+SA|Jeddah Islamic Port|Jeddah port
+OM|Port of Salalah|Salalah port
+NL|Port of Rotterdam|Rotterdam port
+BE|Port of Antwerp-Bruges|Antwerp port, Port of Antwerp, Zeebrugge
+DE|Port of Hamburg|Hamburg port
+DE|Port of Bremerhaven|Bremerhaven port
+GB|Port of Felixstowe|Felixstowe port
+FR|Port of Le Havre|Le Havre port
+ES|Port of Valencia|Valencia port
+ES|Port of Algeciras|Algeciras port
+IT|Port of Genoa|Genoa port
+GR|Port of Piraeus|Piraeus port
+PL|Port of Gdansk|Gdansk port
+MA|Port of Tanger Med|Tanger Med
+EG|Port Said|
+ZA|Port of Durban|Durban port
+KE|Port of Mombasa|Mombasa port
+US|Port of Los Angeles|Los Angeles port, LA port
+US|Port of Long Beach|Long Beach port
+US|Port of New York and New Jersey|Port of New York, Port Newark, PANYNJ
+US|Port of Savannah|Savannah port
+US|Port of Houston|Houston port
+US|Northwest Seaport Alliance|NWSA
+CA|Port of Vancouver|Vancouver port
+BR|Port of Santos|Santos port
+PA|Port of Balboa|Balboa port
+"""
+
+# ISO2 of the country | place type | canonical name | comma-separated aliases
+# Cities and states, so they stay as broad as the user typed them rather than collapsing into a port.
+PLACES = """
+CN|city|Shanghai|
+CN|city|Ningbo|
+CN|city|Shenzhen|
+CN|city|Guangzhou|Canton
+CN|city|Qingdao|
+CN|city|Tianjin|
+CN|city|Xiamen|
+CN|city|Dalian|
+KR|city|Busan|Pusan
+TW|city|Kaohsiung|
+JP|city|Tokyo|
+JP|city|Yokohama|
+JP|city|Kobe|
+VN|city|Ho Chi Minh City|Saigon, HCMC
+VN|city|Haiphong|Hai Phong
+ID|city|Jakarta|
+PH|city|Manila|
+LK|city|Colombo|
+IN|city|Mumbai|Bombay
+BD|city|Chittagong|Chattogram
+PK|city|Karachi|
+AE|city|Dubai|
+SA|city|Jeddah|
+NL|city|Rotterdam|
+BE|city|Antwerp|
+DE|city|Hamburg|
+DE|city|Bremen|
+FR|city|Le Havre|
+ES|city|Valencia|
+IT|city|Genoa|Genova
+GR|city|Piraeus|
+PL|city|Gdansk|Gdańsk
+MA|city|Tangier|Tanger
+ZA|city|Durban|
+KE|city|Mombasa|
+US|city|Los Angeles|
+US|city|Long Beach|
+US|city|New York|New York City, NYC
+US|city|Newark|
+US|city|Savannah|
+US|city|Houston|
+US|city|Seattle|
+US|city|Tacoma|
+US|state|New Jersey|
+CA|city|Vancouver|
+BR|city|Santos|
+"""
+
+# canonical name | place type | comma-separated aliases
+REGIONS = """
+Southeast Asia|region|SEA, South East Asia, ASEAN
+East Asia|region|Northeast Asia, North Asia
+South Asia|region|Indian subcontinent
+Central Asia|region|
+Middle East|region|Mideast, MENA, Middle East and North Africa
+Gulf Cooperation Council|region|GCC, Gulf states, Persian Gulf, Arabian Gulf
+Europe|region|European
+European Union|region|EU, E.U.
+North America|region|
+Latin America|region|LATAM
+South America|region|
+Central America|region|
+Africa|region|
+Sub-Saharan Africa|region|SSA
+Asia Pacific|region|APAC, Asia-Pacific, Indo-Pacific
+Oceania|region|Pacific Islands
+Red Sea|waterway|Bab el-Mandeb, Bab-el-Mandeb
+Suez Canal|waterway|Suez
+Panama Canal|waterway|
+Strait of Malacca|waterway|Malacca Strait, Straits of Malacca
+Strait of Hormuz|waterway|Hormuz
+Taiwan Strait|waterway|
+Black Sea|waterway|
+South China Sea|waterway|
+Mediterranean|waterway|Mediterranean Sea
+"""
+
+# <---Index--->
+def fold(text: str) -> str:
+    """Normalised lookup form: accents folded, lower-case, punctuation dropped, whitespace collapsed."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = re.sub(r"[.'’`]", "", text) # "U.S." -> "us", "Côte d'Ivoire" -> "cote divoire"
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    text = re.sub(r"^the ", "", text.strip())
+    return text.strip()
+
+def _aliases(field: str) -> list[str]:
+    return [alias.strip() for alias in field.split(",") if alias.strip()]
+
+def compact(text: str) -> str:
+    """Acronym lookup form: dots and whitespace dropped, case kept ("U.K." -> "UK")."""
+    return re.sub(r"[.\s]", "", text or "")
+
+def _is_acronym(alias: str) -> bool:
+    # Short all-capitals aliases ("CAR", "SEA", "EU") are matched case-sensitively, so the
+    # ordinary words "car" and "sea" do not resolve to the Central African Republic or Southeast Asia
+    return alias.isupper() and len(compact(alias)) <= 6
+
+def _add(names: dict, acronyms: dict, alias: str, entry: dict) -> None:
+    if _is_acronym(alias):
+        acronyms.setdefault(compact(alias), entry)
+    else:
+        names.setdefault(fold(alias), entry)
+
+def _build_index() -> tuple[dict, dict, dict]:
+    names, acronyms, codes = {}, {}, {}
+    for line in COUNTRIES.strip().splitlines():
+        iso2, iso3, name, aliases = line.split("|")
+        entry = {"canonical_name": name, "place_type": "country", "iso_country_code": iso2}
+        codes[iso2] = entry
+        codes[iso3] = entry
+        for alias in [name] + _aliases(aliases):
+            _add(names, acronyms, alias, entry)
+    for line in PORTS.strip().splitlines():
+        iso2, name, aliases = line.split("|")
+        entry = {"canonical_name": name, "place_type": "port", "iso_country_code": iso2}
+        for alias in [name] + _aliases(aliases):
+            _add(names, acronyms, alias, entry)
+    for line in PLACES.strip().splitlines():
+        iso2, place_type, name, aliases = line.split("|")
+        entry = {"canonical_name": name, "place_type": place_type, "iso_country_code": iso2}
+        for alias in [name] + _aliases(aliases):
+            _add(names, acronyms, alias, entry) # Countries win: "Singapore" and "Hong Kong" stay countries
+    for line in REGIONS.strip().splitlines():
+        name, place_type, aliases = line.split("|")
+        entry = {"canonical_name": name, "place_type": place_type}
+        for alias in [name] + _aliases(aliases):
+            _add(names, acronyms, alias, entry)
+    return names, acronyms, codes
+
+NAME_INDEX, ACRONYM_INDEX, CODE_INDEX = _build_index()
+FUZZY_CUTOFF = 0.85
+
+# <---Lookup--->
+def lookup(query: str) -> Optional[dict]:
+    """
+    Resolve a place from the local gazetteer, or return None if it is not known.
+    Order: upper-case ISO-2/ISO-3 code or acronym, exact name/alias match, then fuzzy match on the folded name.
+    The result has the GeoResult keys; callers get a fresh copy.
+    """
+    entry = _lookup((query or "").strip())
+    return dict(entry) if entry is not None else None
+
+@lru_cache(maxsize = 4096)
+def _lookup(raw: str) -> Optional[dict]:
+    if not raw:
+        return None
+    short = compact(raw)
+    if short.isupper():
+        if short in CODE_INDEX:
+            return dict(CODE_INDEX[short])
+        if short in ACRONYM_INDEX:
+            return dict(ACRONYM_INDEX[short])
+
+    key = fold(raw)
+    if key in NAME_INDEX:
+        return dict(NAME_INDEX[key])
+
+    if len(key) >= 4:
+        close = difflib.get_close_matches(key, NAME_INDEX.keys(), n = 1, cutoff = FUZZY_CUTOFF)
+        if close:
+            entry = dict(NAME_INDEX[close[0]])
+            entry["notes"] = f"Fuzzy match for '{raw}'."
+            return entry
+    return None
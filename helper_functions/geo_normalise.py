@@ -14,6 +14,11 @@ from typing import Optional, TypedDict
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+from helper_functions.gazetteer import compact, fold, lookup
+from helper_functions.tracing import span, tag
+from helper_functions.llm_ledger import kickoff, record_cache_hit
+
 
 load_dotenv(".env")
 
@@ -23,15 +28,26 @@ class GeoResult(TypedDict, total=False):
     iso_country_code: Optional[str]
     notes: Optional[str]
 
+# LLM answers for places the gazetteer does not know, shared by all processes
+geo_cache = DiskCache(CACHE_ROOT / "geo.sqlite")
+_memo: dict[str, tuple[GeoResult, bool]] = {} # _cache_key(query) -> (result, came from the crew)
+
+def _cache_key(query: str) -> str:
+    # As specific as the gazetteer lookup: all-capitals input also keeps its case-sensitive acronym form,
+    # so "SEA" (Southeast Asia) and "sea" never share an entry
+    raw = (query or "").strip()
+    key, short = fold(raw), compact(raw)
+    return f"{short}|{key}" if key and short.isupper() else key
+
 def _fallback(query: str) -> GeoResult:
     q = (query or "").strip()
-    if not q:
-        return {"canonical_name": ""}
+    return {"canonical_name": q}
 
 def geo_normalise(query: str) -> GeoResult:
-    from crewai import Agent, Task, Crew
     """
     Normalises a geographical query to a canonical form.
+    The offline gazetteer is tried first (codes, names, aliases, ports, cities, regions, fuzzy matches);
+    only unresolved queries go to the CrewAI normaliser, and its answers are memoised in memory and on disk.
     
     Args:
         query (str): The geographical query to normalise.
@@ -39,6 +55,39 @@ def geo_normalise(query: str) -> GeoResult:
     Returns:
         GeoResult: A dictionary containing the canonical name, place type, and optional ISO country code.
     """
+    with span("geo_normalise", query = (query or "")[:80]):
+        return _geo_normalise(query)
+
+def _geo_normalise(query: str) -> GeoResult:
+    key = _cache_key(query)
+    if not key:
+        return _fallback(query)
+    if key in _memo:
+        result, from_crew = _memo[key]
+        tag(cache = "hit", source = "memo")
+        if from_crew: # Gazetteer answers never needed the LLM, so they are not counted as saved calls
+            record_cache_hit(os.getenv("OPENAI_MODEL_NAME"), "crew", feature_name = "geo_normalise")
+        return dict(result)
+
+    result = lookup(query)
+    from_crew = result is None
+    tag(cache = "hit", source = "gazetteer")
+    if result is None:
+        result = geo_cache.get(key)
+        tag(source = "disk")
+        if result is not None:
+            record_cache_hit(os.getenv("OPENAI_MODEL_NAME"), "crew", feature_name = "geo_normalise") # Same model label as the crew's own rows
+    if result is None:
+        tag(cache = "miss", source = "crew")
+        result = _crew_normalise(query)
+        if result == _fallback(query):
+            return result # Failed normalisations are not memoised, so they are retried next time
+        geo_cache.set(key, result)
+    _memo[key] = (result, from_crew)
+    return dict(result)
+
+def _crew_normalise(query: str) -> GeoResult:
+    from crewai import Agent, Task, Crew
     input = {"geographical_query": query}
     print(input)
     agent_geo_normaliser = Agent(
@@ -66,15 +115,15 @@ def geo_normalise(query: str) -> GeoResult:
                 tasks =[task_geo_normaliser])
 
     try:
-        result = crew.kickoff(inputs={"geographical_query": query})
+        result = kickoff(crew, "geo_normalise", inputs={"geographical_query": query})
         print(f"Result from geo normaliser: {result}")
         raw = getattr(result, "raw", None)
         if not raw and hasattr(result, "tasks_output"):
-            outs = getarr(result, "tasks_ooutput", [])
+            outs = getattr(result, "tasks_output", [])
             if outs:
                 raw = getattr(outs[0], "raw", None) or getattr (outs[0], "output", None)
         if not isinstance(raw, str):
-            raw = str(raw) if raw is not none else ""  
+            raw = str(raw) if raw is not None else ""  
 
         data = json.loads(raw)
 
@@ -0,0 +1,149 @@
+# <---Libraries--->
+import hashlib, json, os, shutil, threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from helper_functions.disk_cache import CACHE_ROOT
+from helper_functions.embedding_index import EMBEDDING_MODEL, chunk_text, iter_chunks
+from helper_functions.text_index import BM25_B, BM25_K1, TOKENIZER_VERSION, tokenize
+
+# <---Configuration--->
+# Hybrid (dense + BM25) retrieval over the chunks of one search scope, with no vector database.
+# The chunks and vectors come from the shared embedding index; for each scope (set of document hashes) they are
+# exported once to .cache/retriever/<key>/ as plain .npy arrays:
+#   vectors.npy      unit-normalised float32 chunk embeddings, one row per chunk
+#   lengths.npy      BM25 token count of each chunk
+#   term_ptr.npy, term_chunks.npy, term_tf.npy   term-major (CSC) postings: chunks and frequencies of term t
+#                    are term_chunks[term_ptr[t]:term_ptr[t + 1]]
+#   meta.json        model, chunk list [doc_hash, idx, page] and vocabulary
+# Loading memory-maps the arrays, so opening a retriever costs milliseconds whatever the corpus size. A query is
+# one matmul for the dense ranking plus a few vectorised postings lookups, fused by reciprocal rank fusion.
+RETRIEVER_ROOT = CACHE_ROOT / "retriever"
+RRF_K = int(os.getenv("HYBRID_RRF_K", "60")) # Rank offset in 1 / (k + rank)
+CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50")) # Hits taken from each ranking before fusion
+
+_retrievers: Dict[str, "HybridRetriever"] = {}
+_build_lock = threading.Lock()
+
+def scope_key(scope: Dict[str, str], model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha1("\n".join([model, TOKENIZER_VERSION, *sorted(scope)]).encode("utf-8")).hexdigest()[:24]
+
+# <---Build--->
+def build_arrays(scope: Dict[str, str], folder: Path, model: str = EMBEDDING_MODEL) -> int:
+    "Export the scope's chunks from the embedding index into `folder`. Returns the number of chunks."
+    chunks, vectors, lengths = [], [], []
+    postings: Dict[str, list] = defaultdict(list)
+    for doc_hash, idx, page, text, vector in iter_chunks(sorted(scope), model):
+        row = len(chunks)
+        chunks.append([doc_hash, idx, page])
+        vectors.append(np.frombuffer(vector, dtype = np.float32))
+        counts = Counter(tokenize(text))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings[term].append((row, tf))
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), np.float32)
+    norms = np.linalg.norm(matrix, axis = 1, keepdims = True) if vectors else np.ones((0, 1), np.float32)
+    vocabulary = sorted(postings)
+    pointer = np.zeros(len(vocabulary) + 1, dtype = np.int64)
+    for t, term in enumerate(vocabulary):
+        pointer[t + 1] = pointer[t] + len(postings[term])
+    flat = [entry for term in vocabulary for entry in postings[term]]
+
+    tmp = folder.with_name(f"{folder.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    tmp.mkdir(parents = True, exist_ok = True)
+    np.save(tmp / "vectors.npy", (matrix / np.where(norms == 0, 1, norms)).astype(np.float32))
+    np.save(tmp / "lengths.npy", np.asarray(lengths, dtype = np.float32))
+    np.save(tmp / "term_ptr.npy", pointer)
+    np.save(tmp / "term_chunks.npy", np.asarray([row for row, _ in flat], dtype = np.int32))
+    np.save(tmp / "term_tf.npy", np.asarray([tf for _, tf in flat], dtype = np.float32))
+    (tmp / "meta.json").write_text(json.dumps({"model": model, "chunks": chunks, "vocabulary": vocabulary}), encoding = "utf-8")
+    try:
+        os.rename(tmp, folder) # Atomic publish; another process may have won the race with identical content
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors = True)
+    return len(chunks)
+
+def retriever_for(scope: Dict[str, str], model: str = EMBEDDING_MODEL) -> "HybridRetriever":
+    """
+    Retriever for `scope` ({doc_hash: file name}, as returned by embedding_index.index_paths), built from the
+    embedding index on first use and memory-mapped afterwards. Documents must already be indexed.
+    """
+    key = scope_key(scope, model)
+    if key not in _retrievers:
+        folder = RETRIEVER_ROOT / key
+        with _build_lock:
+            if not (folder / "meta.json").exists():
+                print(f"Building hybrid retriever {key}: {build_arrays(scope, folder, model)} chunk(s).")
+        _retrievers[key] = HybridRetriever(folder)
+    return _retrievers[key]
+
+# <---Search--->
+class HybridRetriever:
+    """
+    Dense + BM25 search over one exported scope.
+    Usage:
+      scope = index_paths(paths)
+      hits = retriever_for(scope).search("critical supplies", top_k = 8, names = scope)
+    """
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        meta = json.loads((self.folder / "meta.json").read_text(encoding = "utf-8"))
+        self.model = meta["model"]
+        self.chunks = meta["chunks"]
+        self.terms = {term: t for t, term in enumerate(meta["vocabulary"])}
+        load = lambda name: np.load(self.folder / name, mmap_mode = "r")
+        self.vectors, self.term_ptr, self.term_chunks, self.term_tf = load("vectors.npy"), load("term_ptr.npy"), load("term_chunks.npy"), load("term_tf.npy")
+        lengths = np.asarray(load("lengths.npy"))
+        self.norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (lengths.mean() if len(lengths) else 1.0))
+
+    def dense_scores(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype = np.float32)
+        return self.vectors @ (vector / (np.linalg.norm(vector) or 1.0))
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype = np.float32)
+        for term in set(tokenize(query)):
+            t = self.terms.get(term)
+            if t is None:
+                continue
+            start, end = int(self.term_ptr[t]), int(self.term_ptr[t + 1])
+            rows, tf = self.term_chunks[start:end], self.term_tf[start:end]
+            idf = np.log(1 + (len(self.chunks) - (end - start) + 0.5) / (end - start + 0.5))
+            scores[rows] += idf * tf * (BM25_K1 + 1) / (tf + self.norms[rows])
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, n: int) -> np.ndarray:
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        return top[np.argsort(-scores[top], kind = "stable")]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        from helper_functions.llm import get_embedding
+        return get_embedding(texts, model = self.model)
+
+    def search(self, query: str, top_k: int = 8, embed: Optional[Callable[[List[str]], List[List[float]]]] = None, names: Optional[Dict[str, str]] = None) -> List[dict]:
+        """
+        Reciprocal rank fusion of the top CANDIDATES chunks by cosine similarity and by BM25.
+        Returns hits {file, page, chunk, score, dense, bm25, text}, with file names taken from `names` ({doc_hash: name});
+        only the returned chunks' text is read.
+        """
+        if not query.strip() or not self.chunks:
+            return []
+        dense = self.dense_scores((embed or self._embed)([query])[0])
+        sparse = self.bm25_scores(query)
+        fused: Dict[int, float] = defaultdict(float)
+        for rank, row in enumerate(self._top(dense, CANDIDATES)):
+            fused[int(row)] += 1 / (RRF_K + rank + 1)
+        for rank, row in enumerate(r for r in self._top(sparse, CANDIDATES) if sparse[r] > 0):
+            fused[int(row)] += 1 / (RRF_K + rank + 1)
+        hits = []
+        for row in sorted(fused, key = lambda r: -fused[r])[:top_k]:
+            doc_hash, idx, page = self.chunks[row]
+            hits.append({"file": (names or {}).get(doc_hash, doc_hash[:12]), "page": page, "chunk": idx, "score": round(fused[row], 5),
+                         "dense": round(float(dense[row]), 4), "bm25": round(float(sparse[row]), 4), "text": chunk_text(doc_hash, idx, self.model)})
+        return hits
@@ -0,0 +1,176 @@
+# <---Libraries--->
+import hashlib, json, os, re, threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List
+
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+from helper_functions.tracing import tag
+from helper_functions.llm_ledger import feature, instrument, record_cache_hit
+
+# <---Configuration--->
+# Options offered by the industry selectbox on the news generator page
+INDUSTRIES = ["Agriculture", "Biomedical", "Pharmaceutical", "Electronics", "Energy", "Oil", "Construction", "General Manufacturing", "Precision Engineering", "Air Transport", "Sea Transport", "Land Transport"]
+TERMS_CACHE_TTL = float(os.getenv("TERMS_CACHE_TTL", str(60*60*24*7))) # Expansions are refreshed weekly (or on demand)
+TERMS_WAIT_TIMEOUT = float(os.getenv("TERMS_WAIT_TIMEOUT", "60")) # Seconds a blocking caller waits on another thread's expansion
+
+EXPANSION_PROMPT = (
+    "You expand a supply-chain monitoring query.\n"
+    "Given an industry/topic, return a JSON object with:\n"
+    '{{"terms": ["..."]}}\n\n'
+    "Rules:\n"
+    "- Include synonyms, common abbreviations, core sub-processes, key materials, and 5 to 8 representative companies. \n"
+    "- Keep each term short (1 to 3 words) unless a company or phrase requires longer.\n"
+    "- Avoid generic business words (e.g., market share, revenue.\n)"
+    "- Focus on terms that increase recall for supply chain news.\n\n"
+    "TOPIC: {topic}\n"
+    'Return on JSON, LIKE: {{"terms":["...","..."]}}'
+)
+
+# Shared by every Streamlit worker and batch run; the key carries the prompt and model version. Read on every
+# request (a single SQLite lookup), so the TTL and admin refreshes reach running workers straight away.
+terms_cache = DiskCache(CACHE_ROOT / "industry_terms.sqlite", ttl = TERMS_CACHE_TTL)
+_inflight: dict[str, Future] = {} # Expansions being generated, so concurrent callers wait on one request
+_lock = threading.Lock()
+
+# <---Helpers--->
+def uniq_keep_order(items: List[str]) -> List[str]:
+    seen, out = set(), []
+    for x in items:
+        k = x.strip().lower()
+        if k and k not in seen:
+            out.append(x.strip())
+            seen.add(k)
+    return out
+
+def loose_json_parse(txt: str) -> dict:
+    """Extract first {...} JSON block or return {}."""
+    try:
+        return json.loads(txt)
+    except Exception:
+        pass
+    m = re.search(r"\{.*\}", txt, flags=re.S)
+    if m:
+        try:
+            return json.loads(m.group(0))
+        except Exception:
+            return {}
+    return {}
+
+def base_terms(topic: str) -> List[str]:
+    topic = (topic or "").strip()
+    return [topic, f"{topic} supply chain", f"{topic} supply chains"] if topic else []
+
+def expansion_key(topic: str, n_terms: int, model: str) -> str:
+    version = hashlib.sha256(f"{EXPANSION_PROMPT}\x1f{model}".encode("utf-8")).hexdigest()[:12]
+    return f"{version}:{n_terms}:{(topic or '').strip().casefold()}"
+
+# <---Expansion--->
+def generate_industry_terms(topic: str, client, model: str, n_terms: int = 20) -> List[str]:
+    "Return a list of terms: the original topic, synonyms, related companies, processes, and materials relevant to supply chains for that industry."
+    topic = (topic or "").strip()
+    if not topic:
+        return []
+
+    try:
+        with feature("expand_terms"):
+            resp = client.responses.create(
+                model=model,
+                input=EXPANSION_PROMPT.format(topic=topic),
+                temperature=0.2,
+            )
+        txt = (resp.output_text or "").strip()
+        data = loose_json_parse(txt)
+        terms = data.get("terms", [])
+    except Exception as e:
+        print(f"Error expanding industry terms for '{topic}': {e}")
+        terms = []
+
+    #Ensure topic and supply chain phrasing are correct
+    terms = base_terms(topic) + [t for t in (terms or []) if isinstance(t,str)]
+    #clean
+    terms = [re.sub(r"\s+", " ", t).strip() for t in terms if t and len(t) < 60]
+    return uniq_keep_order(terms)[: max(5, n_terms)]
+
+def _generate_and_store(key: str, topic: str, client, model: str, n_terms: int, future: Future) -> List[str]:
+    terms = base_terms(topic)
+    try:
+        terms = generate_industry_terms(topic, client, model, n_terms)
+        if len(terms) > len(base_terms(topic)): # Only cache real expansions, not the bare fallback
+            terms_cache.set(key, terms)
+        return terms
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        future.set_result(terms)
+
+def expand_industry_terms(topic: str, client, model: str, n_terms: int = 20, block: bool = True, refresh: bool = False) -> List[str]:
+    """
+    Cached industry expansion.
+    With block=False a cold cache never makes the caller wait: the base terms are returned straight away
+    and the expansion is computed in a background thread for the next request.
+    With block=True a cold expansion is generated, or, when another thread (e.g. the warm-up) is already
+    generating it, awaited for up to TERMS_WAIT_TIMEOUT seconds.
+    refresh=True skips the cached entry and regenerates it; the entry is only replaced when that succeeds.
+    """
+    topic = (topic or "").strip()
+    if not topic:
+        return []
+    key = expansion_key(topic, n_terms, model)
+    cached = None if refresh else terms_cache.get(key)
+    if cached:
+        tag(cache = "hit")
+        record_cache_hit(model, "responses", feature_name = "expand_terms")
+        return list(cached)
+    tag(cache = "miss", background = not block)
+
+    with _lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if owner and block:
+        return _generate_and_store(key, topic, client, model, n_terms, future)
+    if owner:
+        threading.Thread(target = _generate_and_store, args = (key, topic, client, model, n_terms, future), name = "terms-warm", daemon = True).start()
+    elif block:
+        tag(waited = True)
+        try:
+            return list(future.result(timeout = TERMS_WAIT_TIMEOUT))
+        except FutureTimeout:
+            print(f"Industry expansion for '{topic}' still running after {TERMS_WAIT_TIMEOUT:.0f}s; using the base terms.")
+    return base_terms(topic)
+
+def warm_up(client, model: str, industries: List[str] = INDUSTRIES, n_terms: int = 20, refresh: bool = False) -> dict:
+    """Precompute the expansion for every industry; refresh=True regenerates even cached entries."""
+    out = {}
+    for topic in industries:
+        out[topic] = expand_industry_terms(topic, client, model, n_terms, block = True, refresh = refresh)
+    return out
+
+def start_background_warm_up(client, model: str) -> threading.Thread:
+    """Fire-and-forget warm-up so a freshly started worker fills the cache before users ask."""
+    thread = threading.Thread(target = warm_up, args = (client, model), name = "terms-warm-up", daemon = True)
+    thread.start()
+    return thread
+
+# <---Admin Command--->
+# Deploy-time warm-up:   python -m helper_functions.industry_terms
+# Forced admin refresh:  python -m helper_functions.industry_terms --refresh
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    parser = argparse.ArgumentParser(description = "Precompute (or refresh) cached industry query expansions.")
+    parser.add_argument("--refresh", action = "store_true", help = "Regenerate entries that are already cached.")
+    parser.add_argument("--industry", action = "append", help = "Limit to this industry (repeatable).")
+    args = parser.parse_args(argv)
+
+    load_dotenv(".env")
+    client = instrument(OpenAI(api_key = os.getenv("OPENAI_API_KEY")))
+    results = warm_up(client, os.getenv("OPENAI_MODEL_NAME"), industries = args.industry or INDUSTRIES, refresh = args.refresh)
+    for topic, terms in results.items():
+        print(f"{topic}: {len(terms)} terms")
+
+if __name__ == "__main__":
+    main()
@@ -10,60 +10,184 @@ except Exception:
     pass
 
 import os
+import base64, hashlib, random, time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
+import openai
 from openai import OpenAI
 import tiktoken
 
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+from helper_functions.llm_ledger import feature, instrument, record_cache_hit
+from helper_functions.rate_limit import RateLimiter
+from helper_functions.tracing import bind, span, tag
+
 load_dotenv('.env')
 
 # Pass the API Key to the OpenAI Client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = instrument(OpenAI(api_key=os.getenv('OPENAI_API_KEY'))) # Every call is recorded in the LLM ledger
+# _embed_batch retries with its own backoff under the shared rate limit, so the SDK must not retry underneath it
+embedding_client = instrument(OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0))
+
+# Embedding requests are split by token count, sent concurrently under a shared rate limit and retried with
+# backoff; vectors are cached on disk by (model, sha256 of the text) so unchanged chunks are never re-embedded.
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000")) # Input tokens per request (API limit 300k)
+EMBEDDING_BATCH_INPUTS = int(os.getenv("EMBEDDING_BATCH_INPUTS", "2048")) # Inputs per request (API limit 2048)
+EMBEDDING_MAX_INPUT_TOKENS = 8191 # Longer inputs are truncated rather than failing the whole request
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "4"))
+EMBEDDING_RATE_PER_MINUTE = float(os.getenv("EMBEDDING_RATE_PER_MINUTE", "3000")) # Requests per minute (tier-1 limit); 0 disables
+EMBEDDING_RETRIES = int(os.getenv("EMBEDDING_RETRIES", "5"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(512 * 2**20)))
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+embedding_cache = DiskCache(CACHE_ROOT / "embedding_vectors.sqlite", max_bytes=EMBEDDING_CACHE_MAX_BYTES)
+embedding_limiter = RateLimiter(EMBEDDING_RATE_PER_MINUTE)
+
+# "chars" counts tokens as len(text) // 4 instead of loading a tiktoken encoding, which is downloaded on first
+# use; the same estimate is used when the encoding cannot be loaded, so token budgets never take a request down.
+TOKEN_COUNTER = os.getenv("LLM_TOKEN_COUNTER", "tiktoken")
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """tiktoken encoding for `model`, or None when it is disabled or cannot be loaded (e.g. offline)."""
+    if TOKEN_COUNTER == "chars":
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Could not load the tiktoken encoding for {model} ({e.__class__.__name__}); estimating tokens from characters.")
+        return None
+
+def estimate_tokens(text):
+    return len(text or "") // 4
+
+def _embedding_key(model, text):
+    return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+def plan_embedding_batches(token_counts, budget=EMBEDDING_BATCH_TOKENS, max_inputs=EMBEDDING_BATCH_INPUTS):
+    """Group input indexes so each request stays within `budget` tokens and `max_inputs` inputs."""
+    batches, current, used = [], [], 0
+    for idx, tokens in enumerate(token_counts):
+        if current and (used + tokens > budget or len(current) >= max_inputs):
+            batches.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _embed_batch(texts, model):
+    for attempt in range(EMBEDDING_RETRIES + 1):
+        embedding_limiter.wait()
+        try:
+            with span("embedding_request", model=model, inputs=len(texts)):
+                response = embedding_client.embeddings.create(input=texts, model=model)
+            #rounded through float32 like the cache stores them, so a vector is identical whether cached or fresh
+            return [array("f", x.embedding).tolist() for x in sorted(response.data, key=lambda x: x.index)]
+        except RETRYABLE_ERRORS as e:
+            if attempt == EMBEDDING_RETRIES:
+                raise
+            delay = min(30.0, 2 ** attempt) * (0.5 + random.random() / 2) # Exponential backoff with jitter
+            print(f"Embedding request failed ({e.__class__.__name__}); retry {attempt + 1}/{EMBEDDING_RETRIES} in {delay:.1f}s.")
+            time.sleep(delay)
 
 def get_embedding(input, model='text-embedding-3-small'):
-    response = client.embeddings.create(
-        input=input,
-        model=model
-    )
-    return [x.embedding for x in response.data]
+    """
+    Embed a string or a list of strings; returns one vector per input, in input order.
+    Cached vectors are returned without a request; repeated texts are embedded once.
+    """
+    texts = [input] if isinstance(input, str) else list(input)
+    results = [None] * len(texts)
+    with span("embedding", model=model, inputs=len(texts)), feature("embedding"):
+        pending = {} # text -> indexes waiting for it
+        for i, text in enumerate(texts):
+            cached = embedding_cache.get(_embedding_key(model, text)) if text not in pending else None
+            if cached is not None:
+                vector = array("f")
+                vector.frombytes(base64.b64decode(cached))
+                results[i] = vector.tolist()
+            else:
+                pending.setdefault(text, []).append(i)
+        cached_count = len(texts) - sum(len(v) for v in pending.values())
+        tag(cache="hit" if not pending else "miss", cached=cached_count)
+        record_cache_hit(model, "embeddings", hits=cached_count)
+        if not pending:
+            return results
+
+        encoding = get_encoding(model)
+        todo = list(pending)
+        inputs, token_counts = [], []
+        for text in todo:
+            if encoding is None: # Character estimate; truncate conservatively at 3 characters per token
+                text = text[:EMBEDDING_MAX_INPUT_TOKENS * 3]
+                inputs.append(text or " ")
+                token_counts.append(estimate_tokens(text))
+                continue
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) > EMBEDDING_MAX_INPUT_TOKENS:
+                print(f"Truncating embedding input from {len(tokens)} to {EMBEDDING_MAX_INPUT_TOKENS} tokens.")
+                tokens = tokens[:EMBEDDING_MAX_INPUT_TOKENS]
+                text = encoding.decode(tokens)
+            inputs.append(text or " ") # The API rejects empty strings
+            token_counts.append(len(tokens))
+        batches = plan_embedding_batches(token_counts)
+        with ThreadPoolExecutor(max_workers=max(1, min(EMBEDDING_WORKERS, len(batches))), thread_name_prefix="embedding") as pool:
+            futures = [pool.submit(bind(_embed_batch), [inputs[i] for i in batch], model) for batch in batches]
+            for batch, future in zip(batches, futures):
+                vectors = future.result()
+                for i, vector in zip(batch, vectors):
+                    embedding_cache.set(_embedding_key(model, todo[i]), base64.b64encode(array("f", vector).tobytes()).decode("ascii"))
+                    for index in pending[todo[i]]:
+                        results[index] = vector
+        tag(requests=len(batches), tokens=sum(token_counts))
+    return results
 
 # This is the "Updated" helper function for calling LLM
-def get_completion(prompt, model="gpt-4o-mini", temperature=0, top_p=1.0, max_tokens=1024, n=1, json_output=False):
+# Ledger rows are attributed to `feature_name` (nested under any enclosing feature block, e.g. "qna/completion")
+def get_completion(prompt, model="gpt-4o-mini", temperature=0, top_p=1.0, max_tokens=1024, n=1, json_output=False, feature_name="completion"):
     if json_output == True:
       output_json_structure = {"type": "json_object"}
     else:
       output_json_structure = None
 
     messages = [{"role": "user", "content": prompt}]
-    response = client.chat.completions.create( #originally was openai.chat.completions
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        top_p=top_p,
-        max_tokens=max_tokens,
-        n=1,
-        response_format=output_json_structure,
-    )
+    with feature(feature_name):
+        response = client.chat.completions.create( #originally was openai.chat.completions
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            n=1,
+            response_format=output_json_structure,
+        )
     return response.choices[0].message.content
 
 # Note that this function directly take in "messages" as the parameter.
-def get_completion_by_messages(messages, model="gpt-4o-mini", temperature=0, top_p=1.0, max_tokens=1024, n=1):
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        top_p=top_p,
-        max_tokens=max_tokens,
-        n=1
-    )
+def get_completion_by_messages(messages, model="gpt-4o-mini", temperature=0, top_p=1.0, max_tokens=1024, n=1, feature_name="completion"):
+    with feature(feature_name):
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            n=1
+        )
     return response.choices[0].message.content
 
 # This function is for calculating the tokens given the "message"
 # This is simplified implementation that is good enough for a rough estimation
 def count_tokens(text):
-    encoding = tiktoken.encoding_for_model('gpt-4o-mini')
-    return len(encoding.encode(text))
+    encoding = get_encoding('gpt-4o-mini') # Loaded once per process, not on every call
+    return len(encoding.encode(text, disallowed_special=())) if encoding is not None else estimate_tokens(text)
 
 def count_tokens_from_message(messages):
-    encoding = tiktoken.encoding_for_model('gpt-4o-mini')
     value = ' '.join([x.get('content') for x in messages])
-    return len(encoding.encode(value))
\ No newline at end of file
+    return count_tokens(value)
\ No newline at end of file
@@ -0,0 +1,286 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import atexit, contextvars, functools, json, sqlite3, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from helper_functions.disk_cache import CACHE_ROOT
+from helper_functions.tracing import current_run, percentile
+
+# <---Configuration--->
+# One ledger row per model call (or per batch of cache hits that saved calls), tagged with the feature that made it:
+#   ts, run, feature, model, kind (responses / chat / embeddings / crew), cache (hit / miss), requests,
+#   prompt_tokens, completion_tokens, latency_ms, ok, error
+# OpenAI clients are wrapped once with instrument(client); crews are run through kickoff(). The feature comes from
+# the innermost `with feature("..."):` block (nested blocks join as "qna/embedding"). Rows are buffered in memory
+# and written in batches, so recording a call costs microseconds; a background thread writes any buffered row
+# within FLUSH_SECONDS, so the ledger lags by at most that much even when the process goes quiet.
+LEDGER_ENABLED = os.getenv("LLM_LEDGER", "1") not in ("", "0", "false", "False")
+LEDGER_DB = Path(os.getenv("LLM_LEDGER_DB", str(CACHE_ROOT / "llm_ledger.sqlite")))
+FLUSH_ROWS = 200 # Buffered rows before a write
+FLUSH_SECONDS = 2.0 # Or oldest buffered row age
+
+# USD per million tokens (input, output) for the cost estimate; override or extend with LLM_PRICES='{"model": [in, out]}'
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1": (2.00, 8.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+_feature = contextvars.ContextVar("llm_feature", default = None)
+_pending: List[tuple] = []
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flusher: Optional[threading.Thread] = None
+_flush_wanted = threading.Event()
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        LEDGER_DB.parent.mkdir(parents = True, exist_ok = True)
+        conn = sqlite3.connect(str(LEDGER_DB), timeout = 30, isolation_level = None, check_same_thread = False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS calls (
+            ts REAL,
+            run TEXT,
+            feature TEXT,
+            model TEXT,
+            kind TEXT,
+            cache TEXT,
+            requests INTEGER,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            latency_ms REAL,
+            ok INTEGER,
+            error TEXT
+            )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS calls_ts ON calls (ts)")
+        _local.conn = conn
+    return conn
+
+# <---Recording--->
+@contextmanager
+def feature(name: str):
+    "Attribute model calls made inside the block (in this thread or task, and workers started with tracing.bind) to `name`."
+    outer = _feature.get()
+    token = _feature.set(f"{outer}/{name}" if outer and outer != name else name)
+    try:
+        yield
+    finally:
+        _feature.reset(token)
+
+def current_feature() -> str:
+    return _feature.get() or "unattributed"
+
+def record(model: Optional[str], kind: str, cache: str = "miss", requests: int = 1, prompt_tokens: int = 0, completion_tokens: int = 0,
+           latency: float = 0.0, error: Optional[str] = None, feature_name: Optional[str] = None) -> None:
+    """Queue one ledger row; `latency` is in seconds. Written in batches by flush()."""
+    global _last_flush
+    if not LEDGER_ENABLED:
+        return
+    row = (time.time(), current_run(), feature_name or current_feature(), model or "?", kind, cache, requests,
+           int(prompt_tokens or 0), int(completion_tokens or 0), round(latency * 1000, 3), 0 if error else 1, (error or None) and error[:200])
+    with _pending_lock:
+        _pending.append(row)
+        due = len(_pending) >= FLUSH_ROWS or time.monotonic() - _last_flush >= FLUSH_SECONDS
+        _start_flusher()
+    if due:
+        flush()
+    else:
+        _flush_wanted.set()
+
+def record_cache_hit(model: Optional[str], kind: str, hits: int = 1, feature_name: Optional[str] = None) -> None:
+    "Record `hits` calls answered from a cache instead of the API."
+    if hits:
+        record(model, kind, cache = "hit", requests = hits, feature_name = feature_name)
+
+def flush() -> None:
+    "Write buffered rows to the ledger."
+    global _last_flush
+    with _pending_lock:
+        rows = _pending[:]
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if rows:
+        try:
+            _connect().executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            print(f"Could not write {len(rows)} LLM ledger row(s): {e}")
+
+def _flush_periodically() -> None:
+    while True:
+        _flush_wanted.wait()
+        time.sleep(FLUSH_SECONDS)
+        _flush_wanted.clear() # Rows recorded from here on set it again and get the next round
+        flush()
+
+def _start_flusher() -> None:
+    "Start the background writer on first use; caller holds _pending_lock."
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(target = _flush_periodically, name = "llm-ledger-flush", daemon = True)
+        _flusher.start()
+
+atexit.register(flush)
+
+def _usage(response) -> tuple:
+    "(prompt, completion) tokens from a Responses, Chat Completions or Embeddings usage block."
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "input_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "prompt_tokens", 0)
+    completion = getattr(usage, "output_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "completion_tokens", 0)
+    return prompt or 0, completion or 0
+
+def _wrap(create, kind: str):
+    @functools.wraps(create)
+    def create_and_record(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = create(*args, **kwargs)
+        except Exception as e:
+            record(kwargs.get("model"), kind, latency = time.perf_counter() - start, error = f"{e.__class__.__name__}: {e}")
+            raise
+        prompt, completion = _usage(response)
+        record(kwargs.get("model") or getattr(response, "model", None), kind, prompt_tokens = prompt, completion_tokens = completion,
+               latency = time.perf_counter() - start)
+        return response
+    return create_and_record
+
+def instrument(client):
+    "Record every responses / chat completions / embeddings call made through an OpenAI client. Returns the client."
+    if not LEDGER_ENABLED or getattr(client, "_ledger_instrumented", False):
+        return client
+    for path, kind in (("responses", "responses"), ("chat.completions", "chat"), ("embeddings", "embeddings")):
+        resource = client
+        for name in path.split("."):
+            resource = getattr(resource, name, None)
+        if resource is not None:
+            resource.create = _wrap(resource.create, kind)
+    client._ledger_instrumented = True
+    return client
+
+def _crew_usage(crew) -> tuple:
+    usage = crew.calculate_usage_metrics() if hasattr(crew, "calculate_usage_metrics") else getattr(crew, "usage_metrics", None)
+    return tuple(int(getattr(usage, name, 0) or 0) for name in ("prompt_tokens", "completion_tokens", "successful_requests"))
+
+def crew_models(crew) -> Optional[str]:
+    models = sorted({str(getattr(getattr(agent, "llm", None), "model", "") or "") for agent in getattr(crew, "agents", [])} - {""})
+    return ",".join(models) or None
+
+def kickoff(crew, feature_name: str, **kwargs):
+    """
+    crew.kickoff(**kwargs), recorded as one ledger row with the tokens and requests of all of the crew's agents.
+    Agents reused across crews keep running totals, so the row holds the difference across this kickoff.
+    """
+    with feature(feature_name):
+        before = _crew_usage(crew) if LEDGER_ENABLED else (0, 0, 0)
+        start, error = time.perf_counter(), None
+        try:
+            return crew.kickoff(**kwargs)
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            if LEDGER_ENABLED:
+                after = _crew_usage(crew)
+                delta = tuple(a - b for a, b in zip(after, before)) if after[2] >= before[2] else after
+                record(crew_models(crew), "crew", requests = max(1, delta[2]), prompt_tokens = delta[0], completion_tokens = delta[1],
+                       latency = time.perf_counter() - start, error = error)
+
+# <---Reporting--->
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    "USD estimate from PRICES; None for models without a price (e.g. a crew mixing several)."
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+def read_calls(since: Optional[float] = None, limit: int = 200_000) -> List[dict]:
+    flush()
+    columns = ["ts", "run", "feature", "model", "kind", "cache", "requests", "prompt_tokens", "completion_tokens", "latency_ms", "ok", "error"]
+    rows = _connect().execute("SELECT * FROM calls WHERE ts >= ? ORDER BY ts DESC LIMIT ?", (since or 0, limit)).fetchall()
+    return [dict(zip(columns, row)) for row in rows]
+
+def feature_summary(since: Optional[float] = None) -> List[Dict]:
+    """
+    Per (feature, model): API requests, cache hits, hit rate, tokens, estimated cost, total and p50/p95 latency and
+    errors, most total tokens first. Aggregated in SQL; percentiles from the API rows only.
+    """
+    flush()
+    conn = _connect()
+    rows = []
+    for name, model, requests, hits, prompt, completion, total_ms, errors in conn.execute('''
+            SELECT feature, model,
+                   SUM(CASE WHEN cache = 'hit' THEN 0 ELSE requests END), SUM(CASE WHEN cache = 'hit' THEN requests ELSE 0 END),
+                   SUM(prompt_tokens), SUM(completion_tokens), SUM(latency_ms), SUM(1 - ok)
+            FROM calls WHERE ts >= ? GROUP BY feature, model''', (since or 0,)):
+        latencies = sorted(ms for (ms,) in conn.execute(
+            "SELECT latency_ms FROM calls WHERE ts >= ? AND feature = ? AND model = ? AND cache != 'hit'", (since or 0, name, model)))
+        cost = estimate_cost(model, prompt, completion)
+        rows.append({
+            "feature": name,
+            "model": model,
+            "requests": requests,
+            "cache_hits": hits,
+            "cache_hit_rate": round(hits / (hits + requests), 3) if hits + requests else None,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "cost_usd": None if cost is None else round(cost, 4),
+            "total_s": round(total_ms / 1000, 2),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "errors": errors,
+        })
+    return sorted(rows, key = lambda row: (-row["total_tokens"], -row["total_s"]))
+
+def usage_by_hour(since: Optional[float] = None) -> List[Dict]:
+    "Tokens and API requests per hour and feature, for charts."
+    flush()
+    return [{"hour": hour * 3600, "feature": name, "tokens": tokens, "requests": requests} for hour, name, tokens, requests in _connect().execute('''
+            SELECT CAST(ts / 3600 AS INTEGER), feature, SUM(prompt_tokens + completion_tokens), SUM(CASE WHEN cache = 'hit' THEN 0 ELSE requests END)
+            FROM calls WHERE ts >= ? GROUP BY 1, 2 ORDER BY 1''', (since or 0,))]
+
+# Summary in a terminal:  python -m helper_functions.llm_ledger [--hours 24]
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description = "Summarise LLM calls per feature from the ledger.")
+    parser.add_argument("--hours", type = float, default = 24.0)
+    args = parser.parse_args()
+
+    rows = feature_summary(since = time.time() - args.hours * 3600)
+    if not rows:
+        print(f"No LLM calls in {LEDGER_DB} for the last {args.hours:g}h.")
+        return
+    print(f"{'feature':<28}{'model':<24}{'requests':>9}{'hits':>7}{'tokens':>11}{'cost $':>9}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>7}")
+    for row in rows:
+        cost = "-" if row["cost_usd"] is None else f"{row['cost_usd']:.3f}"
+        print(f"{row['feature']:<28}{row['model'][:23]:<24}{row['requests']:>9}{row['cache_hits']:>7}{row['total_tokens']:>11}{cost:>9}"
+              f"{row['total_s']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# <---Libraries--->
+import os, smtplib, time
+from email.message import Message
+from typing import Iterable, Optional
+
+from helper_functions.rate_limit import RateLimiter
+
+# <---Configuration--->
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"
+SMTP_RATE_PER_MINUTE = float(os.getenv("SMTP_RATE_PER_MINUTE", "20")) # Stay well under Gmail's sending limits
+SMTP_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "50")) # Reconnect after this many messages
+
+# <---Transport--->
+class SMTPTransport:
+    """
+    Keeps one authenticated SMTP connection open across many messages.
+    The connection is recycled after `max_messages` messages and re-opened after any error; a failed
+    message is retried once on the fresh connection. Sends are spaced by a messages-per-minute limit.
+    Usage:
+      with SMTPTransport(username = sender, password = password) as transport:
+          outcome = transport.send(message)
+          outcomes = transport.send_bulk(messages)
+    """
+    def __init__(self,
+                 host: str = SMTP_HOST,
+                 port: int = SMTP_PORT,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 starttls: bool = SMTP_STARTTLS,
+                 rate_per_minute: float = SMTP_RATE_PER_MINUTE,
+                 max_messages: int = SMTP_MESSAGES_PER_CONNECTION,
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_messages = max(1, max_messages)
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_per_minute)
+        self._server: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+        self.connections_opened = 0
+
+    def __enter__(self) -> "SMTPTransport":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout = self.timeout)
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+            self._server = server
+            self._sent_on_connection = 0
+            self.connections_opened += 1
+        return self._server
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def send(self, message: Message) -> dict:
+        """
+        Send one MIME message (recipients taken from its To header).
+        Returns an outcome dict: {"to", "ok", "error", "attempts", "seconds"}; it never raises for delivery errors.
+        """
+        recipient = message["To"]
+        sender = self.username or message["From"]
+        self.limiter.wait()
+        start = time.perf_counter()
+        error = None
+        for attempt in (1, 2):
+            try:
+                if self._sent_on_connection >= self.max_messages:
+                    self.close() # Recycle long-lived connections
+                self._connect().sendmail(sender, [recipient], message.as_string())
+                self._sent_on_connection += 1
+                return {"to": recipient, "ok": True, "error": None, "attempts": attempt, "seconds": time.perf_counter() - start}
+            except smtplib.SMTPRecipientsRefused as e:
+                error = e # The connection is fine; retrying will not help
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+                self.close() # Drop the broken connection; the retry reconnects
+        return {"to": recipient, "ok": False, "error": str(error), "attempts": attempt, "seconds": time.perf_counter() - start}
+
+    def send_bulk(self, messages: Iterable[Message]) -> list[dict]:
+        return [self.send(message) for message in messages]
+
+# <---Offline Throughput Check--->
+# python -m helper_functions.mail_transport --messages 500 --rate 0
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    from email.mime.text import MIMEText
+    from helper_functions.smtp_sink import local_smtp_sink
+
+    parser = argparse.ArgumentParser(description = "Measure SMTPTransport throughput against a local SMTP sink.")
+    parser.add_argument("--messages", type = int, default = 200)
+    parser.add_argument("--rate", type = float, default = 0, help = "Messages per minute (0 = unlimited).")
+    parser.add_argument("--per-connection", type = int, default = SMTP_MESSAGES_PER_CONNECTION)
+    args = parser.parse_args(argv)
+
+    with local_smtp_sink() as sink:
+        messages = []
+        for i in range(args.messages):
+            message = MIMEText("<p>digest</p>" * 200, "html")
+            message["From"] = "News Alert <alerts@localhost>"
+            message["To"] = f"subscriber{i}@localhost"
+            message["Subject"] = "Benchmark digest"
+            messages.append(message)
+
+        start = time.perf_counter()
+        with SMTPTransport(sink.host, sink.port, starttls = False, rate_per_minute = args.rate, max_messages = args.per_connection) as transport:
+            outcomes = transport.send_bulk(messages)
+        elapsed = time.perf_counter() - start
+
+    ok = sum(1 for outcome in outcomes if outcome["ok"])
+    print(f"Sent {ok}/{len(outcomes)} messages over {sink.connections} connection(s) in {elapsed:.2f}s ({ok / elapsed * 60:.0f} messages/minute).")
+
+if __name__ == "__main__":
+    main()
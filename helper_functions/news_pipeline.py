@@ -0,0 +1,59 @@
+# <---Libraries--->
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence
+
+from helper_functions.tracing import bind
+
+# <---Configuration--->
+PIPELINE_MAX_WORKERS = int(os.getenv("NEWS_PIPELINE_MAX_WORKERS", "4")) # Concurrent extractions / summarisations per stage
+PIPELINE_DEADLINE = float(os.getenv("NEWS_PIPELINE_DEADLINE", "45")) # Seconds a whole digest may spend on article work
+
+# <---Pipeline--->
+def run_pipeline(items: Sequence,
+                 extract: Callable,
+                 summarise: Callable,
+                 max_workers: Optional[int] = None,
+                 deadline: Optional[float] = None) -> List[Optional[str]]:
+    """
+    Two-stage producer/consumer pipeline over feed entries.
+    Every item is handed to `extract` on a bounded worker pool; as soon as an extraction
+    finishes its output is passed to `summarise` on a second pool, so downloads and LLM calls
+    overlap across entries instead of running back to back.
+    Returns one result per item in input order. Items that fail, or that are still in flight
+    when the deadline passes, are returned as None so the caller can fall back.
+    """
+    results: List[Optional[str]] = [None] * len(items)
+    if not items:
+        return results
+
+    workers = max(1, max_workers or PIPELINE_MAX_WORKERS)
+    end = time.monotonic() + (deadline if deadline is not None else PIPELINE_DEADLINE)
+
+    extract_pool = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "news-extract")
+    summarise_pool = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "news-summarise")
+    pending = {extract_pool.submit(bind(extract), item): (idx, "extract") for idx, item in enumerate(items)}
+    try:
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                print(f"News pipeline deadline reached with {len(pending)} item(s) outstanding.")
+                break
+            done, _ = wait(pending, timeout = remaining, return_when = FIRST_COMPLETED)
+            for future in done:
+                idx, stage = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    print(f"News pipeline {stage} failed for item {idx}: {e}")
+                    continue
+                if stage == "extract":
+                    pending[summarise_pool.submit(bind(summarise), value)] = (idx, "summarise") # Hand over to the next stage
+                else:
+                    results[idx] = value
+    finally:
+        # Do not block the digest on stragglers; queued work is dropped, running calls finish in the background
+        extract_pool.shutdown(wait = False, cancel_futures = True)
+        summarise_pool.shutdown(wait = False, cancel_futures = True)
+    return results
@@ -0,0 +1,91 @@
+# <---Libraries--->
+import hashlib, math, os, re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+# <---Configuration--->
+SIMHASH_MAX_DISTANCE = int(os.getenv("NEWS_SIMHASH_MAX_DISTANCE", "3")) # Differing bits (of 64) still treated as the same story
+RECENCY_HALF_LIFE_HOURS = float(os.getenv("NEWS_RECENCY_HALF_LIFE_HOURS", "24"))
+SUMMARY_TOP_K = int(os.getenv("NEWS_SUMMARY_TOP_K", "6")) # Distinct stories per digest that get an AI summary
+WEIGHT_RECENCY, WEIGHT_TERMS, WEIGHT_RISK = 1.0, 0.6, 0.8
+
+# Google News appends " - Publisher" to every title; syndicated copies differ only there
+PUBLISHER_SUFFIX = re.compile(r"\s+[-–—|]\s+[^-–—|]{1,60}$")
+WORD = re.compile(r"\w+")
+
+# <---Near-duplicates--->
+def _tokens(text: str) -> List[str]:
+    return WORD.findall((text or "").lower())
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word unigrams and bigrams."""
+    tokens = _tokens(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size = 8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+def story_text(item: dict) -> str:
+    title = PUBLISHER_SUFFIX.sub("", item.get("title", ""))
+    return f"{title} {item.get('summary', '')}"
+
+def collapse_duplicates(items: List[dict], max_distance: int = SIMHASH_MAX_DISTANCE) -> List[dict]:
+    """
+    Keep the first item of every group of near-duplicates (feed order is Google's relevance order).
+    Kept items get a `duplicates` count of the copies folded into them.
+    """
+    kept, signatures = [], []
+    for item in items:
+        signature = simhash(story_text(item))
+        title_key = " ".join(_tokens(PUBLISHER_SUFFIX.sub("", item.get("title", ""))))
+        for idx, (other_signature, other_title) in enumerate(signatures):
+            if (title_key and title_key == other_title) or hamming(signature, other_signature) <= max_distance:
+                kept[idx]["duplicates"] = kept[idx].get("duplicates", 0) + 1
+                break
+        else:
+            kept.append(item)
+            signatures.append((signature, title_key))
+    return kept
+
+# <---Ranking--->
+def _published(item: dict) -> Optional[datetime]:
+    try:
+        published = parsedate_to_datetime(item.get("published", ""))
+    except (TypeError, ValueError):
+        return None
+    return published if published.tzinfo else published.replace(tzinfo = timezone.utc)
+
+def _hits(text: str, phrases: List[str]) -> int:
+    return sum(1 for phrase in phrases if phrase and phrase.lower() in text)
+
+def score_item(item: dict, terms: List[str], risk_terms: List[str], now: Optional[datetime] = None) -> float:
+    """Relevance score: exponential recency decay + expanded-term overlap + risk term hits (with diminishing returns)."""
+    now = now or datetime.now(timezone.utc)
+    published = _published(item)
+    if published is None:
+        recency = 0.5
+    else:
+        age_hours = max(0.0, (now - published).total_seconds() / 3600)
+        recency = 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    text = story_text(item).lower()
+    return (WEIGHT_RECENCY * recency
+            + WEIGHT_TERMS * math.log1p(_hits(text, terms))
+            + WEIGHT_RISK * math.log1p(_hits(text, risk_terms)))
+
+def rank_items(items: List[dict], terms: List[str], risk_terms: List[str], limit: Optional[int] = None) -> List[dict]:
+    """Collapse near-duplicates, then return the remaining items best-first (stable for ties), each with a `score`."""
+    now = datetime.now(timezone.utc)
+    distinct = collapse_duplicates(items)
+    for item in distinct:
+        item["score"] = round(score_item(item, terms, risk_terms, now), 4)
+    ranked = sorted(distinct, key = lambda item: -item["score"])
+    return ranked[:limit] if limit else ranked
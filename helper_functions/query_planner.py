@@ -0,0 +1,112 @@
+# <---Libraries--->
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product, zip_longest
+from typing import Callable, List, Optional
+from urllib.parse import quote_plus
+
+from helper_functions.article_cache import normalise_url
+from helper_functions.tracing import bind
+
+# <---Configuration--->
+GOOGLE_NEWS_RSS = os.getenv("NEWS_RSS_URL", "https://news.google.com/rss/search?q={query}&hl=en-SG&gl=SG&ceid=SG:en") # Overridable for local fixture feeds
+QUERY_MAX_CHARS = int(os.getenv("NEWS_QUERY_MAX_CHARS", "480")) # Longest search string sent in one request
+QUERY_MAX_SHARDS = int(os.getenv("NEWS_QUERY_MAX_SHARDS", "8"))
+SHARD_MAX_WORKERS = int(os.getenv("NEWS_SHARD_MAX_WORKERS", "4"))
+
+# <---Planning--->
+def _or_group(terms: List[str]) -> str:
+    return "(" + " OR ".join(f'"{t}"' for t in terms) + ")"
+
+def _pack(terms: List[str], budget: int) -> List[List[str]]:
+    """Greedily pack quoted terms into OR-groups whose rendered length stays within `budget`."""
+    chunks, current = [], []
+    for term in terms:
+        if current and len(_or_group(current + [term])) > budget:
+            chunks.append(current)
+            current = []
+        current.append(term)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def plan_queries(terms: List[str],
+                 risk_terms: Optional[List[str]] = None,
+                 location: Optional[str] = None,
+                 max_chars: int = QUERY_MAX_CHARS,
+                 max_shards: int = QUERY_MAX_SHARDS) -> List[str]:
+    """
+    Split `(terms) AND (risk_terms) AND "location"` into sub-queries of at most `max_chars` each.
+    Every topic chunk is paired with every risk chunk, so together the shards cover the same
+    term combinations as the single oversized query. If that would exceed `max_shards` (at least 1),
+    the budget grows until it fits.
+    """
+    terms = [t for t in terms if t]
+    risk_terms = [r for r in (risk_terms or []) if r]
+    location_part = f' AND "{location.strip()}"' if location and location.strip() else ""
+    if not terms:
+        return []
+
+    #at `ceiling` both term lists pack into a single OR-group each, so one shard always fits and the loop ends
+    max_shards = max(1, max_shards)
+    ceiling = len(location_part) + 2 * len(_or_group(risk_terms)) + len(" AND ") + len(_or_group(terms)) + 1
+    budget = max(1, max_chars)
+    while True:
+        available = budget - len(location_part)
+        if risk_terms:
+            risk_chunks = _pack(risk_terms, available // 2)
+            topic_budget = available - len(" AND ") - max(len(_or_group(chunk)) for chunk in risk_chunks)
+        else:
+            risk_chunks = [[]]
+            topic_budget = available
+        topic_chunks = _pack(terms, max(topic_budget, 1))
+        if len(topic_chunks) * len(risk_chunks) <= max_shards or budget >= ceiling:
+            break
+        budget = min(max(int(budget * 1.25), budget + 1), ceiling)
+
+    queries = []
+    for topic_chunk, risk_chunk in product(topic_chunks, risk_chunks):
+        q = _or_group(topic_chunk)
+        if risk_chunk:
+            q = f"{q} AND {_or_group(risk_chunk)}"
+        queries.append(q + location_part)
+    return queries
+
+def rss_url(query: str) -> str:
+    return GOOGLE_NEWS_RSS.format(query = quote_plus(query))
+
+# <---Fetching--->
+def fetch_shards(queries: List[str], fetch: Callable[[str], List[dict]], max_workers: int = SHARD_MAX_WORKERS) -> List[dict]:
+    """
+    Fetch every sub-query in parallel and merge the results.
+    Entries are de-duplicated by GUID and normalised link and interleaved by rank across shards,
+    so each shard's top results come first. Each entry records the `shard` index and `shard_url` that produced it.
+    """
+    urls = [rss_url(q) for q in queries]
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers = max(1, min(max_workers, len(urls))), thread_name_prefix = "news-shard") as pool:
+        futures = [pool.submit(bind(_safe(fetch)), url) for url in urls]
+        results = [future.result() for future in futures]
+
+    merged, seen = [], set()
+    for rank_row in zip_longest(*results):
+        for shard, entry in enumerate(rank_row):
+            if entry is None:
+                continue
+            keys = {k for k in ("id:" + (entry.get("id") or ""), "link:" + normalise_url(entry.get("link", ""))) if not k.endswith(":")}
+            if keys & seen:
+                continue
+            seen |= keys
+            merged.append({**entry, "shard": shard, "shard_url": urls[shard]})
+    print(f"Fetched {len(urls)} query shard(s): {[len(r) for r in results]} entries, {len(merged)} after merge.")
+    return merged
+
+def _safe(fetch: Callable[[str], List[dict]]) -> Callable[[str], List[dict]]:
+    def run(url: str) -> List[dict]:
+        try:
+            return fetch(url) or []
+        except Exception as e:
+            print(f"Query shard failed: {e}")
+            return []
+    return run
@@ -0,0 +1,29 @@
+# <---Libraries--->
+import threading, time
+
+# <---Rate Limiter--->
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly so no more than `per_minute` pass per minute.
+    A rate of 0 (or less) disables limiting.
+    Usage:
+      limiter = RateLimiter(per_minute = 30)
+      limiter.wait()  # blocks until the next call is allowed
+    """
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Block until the caller may proceed; returns the seconds spent waiting."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval # Reserve the slot before sleeping so other threads queue behind it
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
@@ -10,7 +10,7 @@ except Exception:
     pass
 
 # <---Libraries--->
-import gdown, os, re, shutil, time, zipfile
+import hashlib, json, os, re, shutil, threading, time, zipfile, zlib
 
 from dotenv import load_dotenv
 from pathlib import Path
@@ -22,13 +22,11 @@ DOCUMENT_EXTENSION_ALLOWED = {".doc",".docx", ".md", ".pdf", ".txt"}
 repository_source = "1FpsgCX_-wVXbINFWkI3mLjyklEzMYjGw" # Link to Google Drive
 repository_zip = Path("repository.zip") # Path of downloaded zip_folder
 repository_directory = Path("repository") # Unzipped base repository folder
+repository_manifest = repository_directory / ".manifest.json" # Zip hash and member sizes of the current extraction
 DATA_ROOT = Path("data") # Storage for per-user data
 
-if not repository_zip.exists():
-    gdown.download(id = repository_source, output = str(repository_zip), quiet = False) # Download process
-repository_directory.mkdir(parents = True, exist_ok = True)
-with zipfile.ZipFile(repository_zip, "r") as file: # Extraction of zipped folder
-    file.extractall(repository_directory)
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
 
 def check_extension(path: Path) -> bool:
     return path.is_file() and path.suffix.lower() in DOCUMENT_EXTENSION_ALLOWED # Check compatibility of documents
@@ -38,10 +36,110 @@ def check_documents(directory: Path):
         if check_extension(path):
             yield path # Filter compatible documents
 
-documents = list(check_documents(repository_directory)) # Compilation of all PDFs
-print(f"Found {len(documents)} documents:")
-for document in documents:
-    print(" -", document)
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_manifest() -> dict:
+    try:
+        return json.loads(repository_manifest.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _extraction_intact(manifest: dict) -> bool:
+    "Every member recorded in the manifest is still on disk with its original size."
+    try:
+        return all((repository_directory / name).stat().st_size == size for name, size in manifest.get("members", {}).items())
+    except OSError:
+        return False
+
+def _crc32(path: Path) -> int:
+    crc = 0
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+def _extract(digest: str, stat: os.stat_result) -> None:
+    """
+    Merge the zip into the repository folder file by file, leaving everything else in it alone (some base
+    documents are tracked in git). Members already on disk with the same size and CRC are not rewritten;
+    the others are written to a temporary file and renamed over the target, so readers never see half a file.
+    Every member is left read-only, which lets working repositories hard-link it safely (see `_place`).
+    """
+    repository_directory.mkdir(parents = True, exist_ok = True)
+    root = repository_directory.resolve()
+    members = {}
+    with zipfile.ZipFile(repository_zip, "r") as file: # Extraction of zipped folder
+        for info in file.infolist():
+            target = (repository_directory / info.filename).resolve()
+            if info.is_dir() or not target.is_relative_to(root): # Skip folders and unsafe member paths
+                continue
+            members[info.filename] = info.file_size
+            if not (target.is_file() and target.stat().st_size == info.file_size and _crc32(target) == info.CRC):
+                target.parent.mkdir(parents = True, exist_ok = True)
+                partial = target.with_name(f".{target.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+                try:
+                    with file.open(info) as src, open(partial, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 2**20)
+                    os.replace(partial, target)
+                finally:
+                    partial.unlink(missing_ok = True)
+            _make_read_only(target)
+    manifest = {"sha256": digest, "zip_size": stat.st_size, "zip_mtime_ns": stat.st_mtime_ns, "members": members}
+    repository_manifest.write_text(json.dumps(manifest, indent = 1))
+
+def ensure_base_repository(force: bool = False) -> Path:
+    """
+    Download (if missing) and extract the base repository, once per process.
+    A manifest of the zip's hash and member sizes is kept beside the extraction: when the zip is unchanged
+    (same size and mtime, or failing that the same hash) and the extracted files are intact, nothing is extracted again.
+    """
+    global _bootstrapped
+    if _bootstrapped and not force:
+        return repository_directory
+    with _bootstrap_lock:
+        if _bootstrapped and not force:
+            return repository_directory
+        if not repository_zip.exists():
+            import gdown # Only needed on a fresh deployment, so kept off the import path
+            gdown.download(id = repository_source, output = str(repository_zip), quiet = False) # Download process
+
+        stat = repository_zip.stat()
+        manifest = _read_manifest()
+        unchanged = (manifest.get("zip_size"), manifest.get("zip_mtime_ns")) == (stat.st_size, stat.st_mtime_ns)
+        if not unchanged and manifest:
+            digest = _file_digest(repository_zip)
+            unchanged = manifest.get("sha256") == digest
+            if unchanged: # Same content with a new timestamp (e.g. re-downloaded); remember the new stat
+                manifest.update(zip_size = stat.st_size, zip_mtime_ns = stat.st_mtime_ns)
+                repository_manifest.write_text(json.dumps(manifest, indent = 1))
+        if force or not unchanged or not _extraction_intact(manifest):
+            start = time.perf_counter()
+            _extract(_file_digest(repository_zip), stat)
+            documents = list(check_documents(repository_directory))
+            print(f"Extracted base repository: {len(documents)} documents in {time.perf_counter() - start:.2f}s.")
+        _bootstrapped = True
+    return repository_directory
+
+def index_base_repository() -> dict:
+    "Embed the base documents into the shared chunk store; documents already indexed are skipped. Returns the scope."
+    from helper_functions.embedding_index import index_paths # numpy and the embedding client are only needed here
+    return index_paths(check_documents(ensure_base_repository()))
+
+def start_background_index() -> threading.Thread:
+    """Fire-and-forget indexing of the base documents, so the first crew a worker builds does not embed them."""
+    def run():
+        try:
+            index_base_repository()
+        except Exception as e: # The crew indexes whatever is missing when it is built
+            print(f"Background indexing of the base repository failed: {e}")
+    thread = threading.Thread(target = run, name = "base-index", daemon = True)
+    thread.start()
+    return thread
 
 # <---Per-user Data--->
 def sanitise(name: str) -> str:
@@ -84,26 +182,111 @@ def save_user_uploads(user_files: list | None, user_key: str) -> list[Path]:
     return saved # Return the list of saved paths.
 
 # <--Repository--->
+def _reflink(source: Path, target: Path) -> bool:
+    "Copy-on-write clone (Linux FICLONE, e.g. on btrfs/XFS); False where the filesystem cannot do it."
+    try:
+        import fcntl
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), 0x40049409, src.fileno()) # FICLONE
+        shutil.copystat(source, target)
+        return True
+    except (ImportError, OSError):
+        target.unlink(missing_ok = True)
+        return False
+
+def _make_read_only(path: Path) -> None:
+    "Clear the write bits of a base document; only _extract calls this, users' uploads keep their permissions."
+    try:
+        os.chmod(path, path.stat().st_mode & 0o7777 & ~0o222)
+    except OSError:
+        pass
+
+def _read_only(path: Path) -> bool:
+    "True when `path` cannot be written through any link: no write bits, and we are not root (root ignores them)."
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        return False
+    return not os.access(path, os.W_OK)
+
+def _shares_writable_inode(source: Path, target: Path) -> bool:
+    "A working copy hard-linked to a source that can still be written: an edit to one would change the other."
+    try:
+        return os.path.samefile(source, target) and not _read_only(source)
+    except OSError:
+        return False
+
+def _place(source: Path, target: Path) -> str:
+    """
+    Put `source` at `target` as cheaply as the filesystem allows: reflink, then hard link, then a full copy.
+    A hard link shares the source's bytes, so an in-place write to the working copy would change the base
+    document for every user; it is only used when the source is read-only.
+    """
+    if _reflink(source, target):
+        return "reflinked"
+    if _read_only(source):
+        try:
+            os.link(source, target)
+            return "linked"
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+    return "copied"
+
+def sync_working_repository(desired: dict[str, Path], repository_working: Path, manifest_path: Path) -> dict:
+    """
+    Make `repository_working` contain exactly `desired` ({file name: source path}), touching only what changed.
+    The manifest records source path, size, mtime and sha256 of every placed file. A file is kept when its
+    source is unchanged (same stat, or same hash after a touch) and the working copy is still there.
+    Returns counts of kept / linked / reflinked / copied / removed files.
+    """
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    summary = {"kept": 0, "linked": 0, "reflinked": 0, "copied": 0, "removed": 0}
+    updated = {}
+
+    for path in repository_working.iterdir():
+        if path.name not in desired:
+            shutil.rmtree(path) if path.is_dir() else path.unlink() # Deselected or stray files
+            summary["removed"] += 1
+
+    for name, source in desired.items():
+        stat = source.stat()
+        entry = {"source": str(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        previous = manifest.get(name)
+        target = repository_working / name
+        present = target.is_file() and target.stat().st_size == stat.st_size and not _shares_writable_inode(source, target)
+        if previous and present and previous["source"] == entry["source"] and previous["size"] == entry["size"]:
+            if previous["mtime_ns"] == entry["mtime_ns"]:
+                updated[name] = previous
+                summary["kept"] += 1
+                continue
+            digest = _file_digest(source)
+            if digest == previous.get("sha256"): # Touched but identical content
+                updated[name] = {**entry, "sha256": digest}
+                summary["kept"] += 1
+                continue
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        summary[_place(source, target)] += 1
+        updated[name] = {**entry, "sha256": _file_digest(source)}
+
+    manifest_path.write_text(json.dumps(updated, indent = 1))
+    return summary
+
 def prepare_repository(user_files: list | None, user_key: str, selected_file_names: list[str] | None) -> Path:
     _ = save_user_uploads(user_files, user_key) # Save new files uploaded by user into their own folder
-    
-    repository_working = get_user_repository(user_key)
-    for path in repository_working.iterdir():
-        if path.is_file():
-            path.unlink()
-        elif path.is_dir():
-            shutil.rmtree(path) # Clears working repository, so the next request is refreshed
-    
-    for document in check_documents(repository_directory):
-        shutil.copy2(document, repository_working / document.name) # Copy base repository into the user's working folder
-    
+
+    desired = {document.name: document for document in check_documents(ensure_base_repository())} # Base repository documents
     if selected_file_names:
         directory_uploads = get_user_uploads(user_key)
         for name in selected_file_names:
             source = directory_uploads / name
             if check_extension(source) and source.exists():
-                shutil.copy2(source, repository_working / source.name) # Copy selected file if it exists and is of compatible extension
+                desired[source.name] = source # Selected upload if it exists and is of compatible extension
 
-    list_documents = [path for path in repository_working.iterdir() if path.is_file()]
-    print(f"[{user_key}] Working repository contains {len(list_documents)} files.")
-    return repository_working
\ No newline at end of file
+    #only differences are applied, so an unchanged selection leaves the folder (and any index built on it) untouched
+    repository_working = get_user_repository(user_key)
+    summary = sync_working_repository(desired, repository_working, get_user_root(user_key) / "repository_working.manifest.json")
+    print(f"[{user_key}] Working repository contains {len(desired)} files ({summary}).")
+    return repository_working
@@ -0,0 +1,91 @@
+# <---Libraries--->
+import socketserver, threading
+from contextlib import contextmanager
+
+# <---Local SMTP Stand-in--->
+# A tiny in-process SMTP server that accepts and keeps every message, for measuring mail throughput
+# without touching Gmail. It speaks just enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+# and deliberately does not offer STARTTLS or AUTH, so point the transport at it with starttls=False and no login.
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self) -> None:
+        sink = self.server.sink
+        sink.opened()
+        self._reply("220 localhost SMTP sink ready")
+        envelope = {"from": None, "to": []}
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode("utf-8", errors = "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                envelope = {"from": command[10:].strip(" <>"), "to": []}
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip(" <>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line) # Undo dot-stuffing
+                sink.deliver(envelope["from"], envelope["to"], b"".join(lines))
+                self._reply("250 Message accepted")
+            elif verb == "RSET":
+                envelope = {"from": None, "to": []}
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SMTPSink:
+    """Collects delivered messages; `messages` is a list of {"from", "to", "data"} and `connections` counts SMTP sessions."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+
+    def opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def deliver(self, sender: str, recipients: list, data: bytes) -> None:
+        with self._lock:
+            self.messages.append({"from": sender, "to": list(recipients), "data": data})
+
+    def start(self) -> "SMTPSink":
+        threading.Thread(target = self._server.serve_forever, name = "smtp-sink", daemon = True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+@contextmanager
+def local_smtp_sink(host: str = "127.0.0.1", port: int = 0):
+    """Run an SMTPSink for the duration of the block; port 0 picks a free port (see sink.port)."""
+    sink = SMTPSink(host, port).start()
+    try:
+        yield sink
+    finally:
+        sink.stop()
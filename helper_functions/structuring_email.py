@@ -10,24 +10,46 @@ except Exception:
     pass
 
 import streamlit as st
-from urllib.parse import quote_plus
-import feedparser
+import smtplib
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 import re, html
 from helper_functions.geo_normalise import geo_normalise
+from helper_functions.digest_render import DigestRenderer
+from helper_functions.tracing import span, tag, trace_run
+from helper_functions.llm_ledger import feature, instrument, record_cache_hit
+from helper_functions.news_pipeline import PIPELINE_DEADLINE, run_pipeline
+from helper_functions.batch_summarise import SUMMARY_BATCH, summarise_batched
+from helper_functions.condense import condense_article
+from helper_functions.query_planner import fetch_shards, plan_queries
+from helper_functions.feed_poller import poll_feed, unseen_by_any
+from helper_functions.news_ranking import SUMMARY_TOP_K, rank_items
+from helper_functions.article_cache import cached_article_text
+from helper_functions.summary_cache import summary_cache, summary_key
+from helper_functions.industry_terms import expand_industry_terms
+from helper_functions.mail_transport import SMTPTransport
 from typing import List
 
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
-import json
+import time
 
 # <----- calling openai ---->
 load_dotenv(".env")
-AI_Model = os.getenv ("OPENAI_MODEL_NAME")
 
-client = OpenAI(
-    api_key = os.getenv("OPENAI_API_KEY")
-)
+def secret(name: str, default: str | None = None) -> str | None:
+    "Streamlit secret, falling back to the environment for headless runs without a secrets.toml."
+    try:
+        return st.secrets[name]
+    except Exception:
+        return os.getenv(name, default)
+
+AI_MODEL = secret("OPENAI_MODEL_NAME")
+
+client = instrument(OpenAI(
+    api_key = secret("OPENAI_API_KEY")
+)) #every call is recorded in the LLM ledger
 
 #making query more relevant with risk terms
 RISK_TERMS = [
@@ -35,30 +57,7 @@ RISK_TERMS = [
     "tariff", "export control", "energy shortage", "power outage", "fuel shortage", "water shortage", "drought", "earthquake", "typhoon", "hurricane", "flood", "wildfire", "Suez", "Panama Canal", "Red Sea", "logistics bottleneck", "congestion", "container shortage", "rare earth"
 ]
 
-def uniq_keep_order(items: List[str]) -> List[str]:
-    seen, out = set(), []
-    for x in items:
-        k = x.strip().lower()
-        if k and k not in seen:
-            out.append(x.strip())
-            seen.add(k)
-    return out
-
-def loose_json_parse(txt: str) -> dict:
-    """Extract first {...} JSON block or return {}."""
-    try:
-        return json.loads(txt)
-    except Exception:
-        pass 
-    m = re.search(r"\{.*\}", txt, flags=re.S)
-    if m:
-        try:
-            return json.loads(m.group(0))
-        except Exception:
-            return {}
-    return {}
-
-def extract_article_text(url:str) -> str:
+def _download_article_text(url:str) -> str:
     try:
         import trafilatura
         downloaded = trafilatura.fetch_url(url, timeout =15)
@@ -70,77 +69,62 @@ def extract_article_text(url:str) -> str:
         pass
     return ""
 
-#creating a cache for 24 hours
-@st.cache_data(ttl=60*60*24)
-def ai_expand_industry_terms(topic: str, n_terms: int = 20) -> List[str]:
-    "Return a list of terms: the original topic, synonyms, related companies, processes, and materials relevant to supply chains for that industry."
-    topic = (topic or "").strip()
-    if not topic:
-        return []
-    
-    prompt = (
-        "You expand a supply-chain monitoring query.\n"
-        "Given an industry/topic, return a JSON object with:\n"
-        '{"terms": ["..."]}\n\n'
-        "Rules:\n"
-        "- Include synonyms, common abbreviations, core sub-processes, key materials, and 5 to 8 representative companies. \n"
-        "- Keep each term short (1 to 3 words) unless a company or phrase requires longer.\n"
-        "- Avoid generic business words (e.g., market share, revenue.\n)"
-        "- Focus on terms that increase recall for supply chain news.\n\n"
-        f"TOPIC: {topic}\n"
-        'Return on JSON, LIKE: {"terms":["...","..."]}'
-    )
-
+def _resolve_article_url(url:str) -> str:
+    #follow the feed's redirect to the publisher, so the article is cached under its own URL
     try:
-        resp: client.responses.create(
-            model=AI_MODEL,
-            input=prompt,
-            temprature=0.2,
-        )
-        txt = (resp.output_text or "").strip()
-        data = loose_json_parse(txt)
-        terms = data.get("terms", [])
+        import requests
+        return requests.head(url, allow_redirects=True, timeout=10).url or url
     except Exception:
-        terms = []
-
-    #Ensure topic and supply chain phrasing are correct
-    base = [topic, f"{topic} supply chain", f"{topic} supply chains"]
-    terms = base + [t for t in (terms or []) if isinstance(t,str)]
-    #clean
-    terms = [re.sub(r"\s+", " ", t).strip() for t in terms if t and len(t) < 60]
-    return uniq_keep_order(terms)[: max(5, n_terms)]
-
-def build_news_query_ai(topic:str, location:str | None, include_risk_terms: bool = False) -> str:
-    terms = ai_expand_industry_terms(topic)
-    if not terms:
-        #fallback minimal query
-        terms = [topic, f"{topic} supply chain", f"{topic} supply chain"]
-    topic_part = " OR ".join(f'"{t}"' for t in terms)
-    q = f"({topic_part})"
-    if include_risk_terms:
-        risk_part = " OR ".join(f'"{r}"' for r in RISK_TERMS)
-        q = f"{q} AND ({risk_part})"
-    if location and location.strip():
-        q = f'{q} AND "{location.strip()}"'
-    return q
+        return url
+
+def extract_article_text(url:str) -> str:
+    #served from the shared on-disk article cache when the article was fetched recently, through any link
+    return cached_article_text(url, _download_article_text, resolve=_resolve_article_url)
+
+#expansions come from the shared on-disk cache; headless runs wait for a cold expansion instead of using the bare topic
+def ai_expand_industry_terms(topic: str, n_terms: int = 20, block: bool = True) -> List[str]:
+    "Return a list of terms: the original topic, synonyms, related companies, processes, and materials relevant to supply chains for that industry."
+    with span("expand_terms", topic=topic):
+        return expand_industry_terms(topic, client, AI_MODEL, n_terms=n_terms, block=block)
+
+def news_terms(topic: str, block: bool = True) -> List[str]:
+    "Expanded industry terms, or a minimal fallback list when the expansion is empty."
+    terms = ai_expand_industry_terms(topic, block=block)
+    return terms or [topic, f"{topic} supply chain", f"{topic} supply chains"]
+
+#the template is hashed into the summary cache key, so editing it invalidates cached summaries
+SUMMARY_PROMPT = (
+    "You are a supply chain analyst. Write a cris, factual summary for an email alert.\n"
+    "Focus on implications for {topic} supply chains if any.\n"
+    "Output <= {max_words} words, no bullets, no preamble.\n\n"
+    "Text:\n{text}"
+)
 
 def summarise_with_ai(text:str, topic: str="", max_words: int=60) -> str:
     if not text:
         return ""
 
-    prompt = (
-        "You are a supply chain analyst. Write a cris, factual summary for an email alert.\n"
-        f"Focus on implications for {topic or 'the relevant'} supply chains if any.\n"
-        f"Output <= {max_words} words, no bullets, no preamble.\n\n"
-        "Text:\n" + text[:12000]
-    )
+    text = text[:12000]
+    key = summary_key(text, topic, max_words, AI_MODEL, SUMMARY_PROMPT)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        tag(cache="hit")
+        record_cache_hit(AI_MODEL, "responses", feature_name="summarise")
+        return cached
+    tag(cache="miss")
+
+    prompt = SUMMARY_PROMPT.format(topic=topic or 'the relevant', max_words=max_words, text=text)
     try:
-        resp = client.responses.create(
-            model = AI_MODEL,
-            input=prompt,
-        )
-        ai_text = (Resp.output_text or "").strip()
-        return re.sub(r"\s+", " ", ai_text)
+        start = time.perf_counter()
+        with feature("summarise"):
+            resp = client.responses.create(
+                model = AI_MODEL,
+                input=prompt,
+            )
+        ai_text = re.sub(r"\s+", " ", (resp.output_text or "").strip())
+        if ai_text:
+            summary_cache.set(key, ai_text, cost=time.perf_counter() - start)
+        return ai_text
     except Exception as e:
         print(f"Error during AI summarisation: {e}")
         return text[:max_words] + "…" if len(text) >max_words else text
@@ -152,50 +136,153 @@ def clean_summary(text:str, max_chars: int = 300) -> str:
     text = re.sub(r"<[^>]+>", " ", text)
     text = html.unescape(re.sub(r"\s+", " ", text)).strip()
     if len(text) <= max_chars:
-        return ""
+        return text
     limit = max(0, max_chars - 1)
     snippet = text[:limit]
-    cut = snippet.rsplit(" ", 1)[0] or snipper
+    cut = snippet.rsplit(" ", 1)[0] or snippet
     while len(cut) > limit and " " in cut:
         cut = cut.rsplit(" ", 1)[0]
-    return (cut or snipper) + "…"
+    return (cut or snippet) + "…"
+
+TAG_RE = re.compile(r"<[^>]+>")
+SPACE_RE = re.compile(r"\s+")
 
 def to_plaintext(html_body: str) -> str:
     """Very simply HTML→text fallback."""
-    txt = re.sub(r"<[^>]+>",  " ", html_body)
-    txt = re.sub(r"\s+", " ", txt).strip()
+    txt = TAG_RE.sub(" ", html_body)
+    txt = SPACE_RE.sub(" ", txt).strip()
     return txt
 
-def fetch_news_rss(key_industry: str, free_text_location: str = None, max_items: int = 10, use_ai: bool = True, ai_max_items: int = 10, include_risk_terms: bool = True) -> list:
-    #build query and url
-    query = build_news_query_ai(key_industry, free_text_location, include_risk_terms=include_risk_terms)
-
-    rss_url = f"https://news.goodle.com/rss/search?q={quote_plus(query)}&hl=en-SG&gl=SG&ceid=SG:en"
-
-    feed = feedparser.parse(rss_url)
-    news_items = []
-    for idx, entry in enumerate(feed.entries[:max_items], start=1):
-        #prefer cleaned summary and falls back to news content if present
-        raw_summary = getattr(entry, "summary", "") or ""
-        if not raw_summary and getattr(entry, "content", None):
-            try:
-                raw_summary - entry.content[0].value
-            except Exception:
-                pass
-
-        cleaned = clean_summary(raw_summary, max_chars=300)
-
-        ai_summary = ""
-        if use_ai and idx <=ai_max_items:
-            article_text = extract_article_text(getattr(entry, "link", "")) or cleaned or getattr(entry, "title", "")
-            ai_summary = summarise_with_ai(article_text, topic=key_industry, max_words=60)
-
-        news_items.append({
-            "title": getattr(entry, "title" ""),
-            "link": getattr(entry, "link", ""),
-            "summary": clean_summary(raw_summary, max_chars=300),
-            "ai_summary": ai_summary,
-            "published": getattr(entry, "published", "")
+def fetch_news_rss(key_industry: str, free_text_location: str = None, max_items: int = 10, use_ai: bool = True, ai_max_items: int = SUMMARY_TOP_K, include_risk_terms: bool = True, max_workers: int | None = None, deadline: float | None = None, subscribers: list[str] | None = None, batch: bool = SUMMARY_BATCH, block_on_terms: bool = True) -> list:
+    "block_on_terms=False serves the bare topic while the industry expansion is still cold, so an interactive form never waits on it."
+    #split the expanded query into bounded-length shards that are fetched in parallel and merged
+    with span("plan_queries", industry=key_industry, location=free_text_location) as s:
+        terms = news_terms(key_industry, block=block_on_terms) #expanded once, reused for ranking and condensing
+        queries = plan_queries(terms, RISK_TERMS if include_risk_terms else None, free_text_location)
+        s["shards"] = len(queries)
+    #seen items are tracked per digest query rather than per shard URL, which changes with the term list
+    feed_key = f"{key_industry}|{(free_text_location or '').strip()}|{int(include_risk_terms)}"
+
+    #conditional GET per shard; an unchanged feed is served from the stored entries
+    candidates = []
+    with span("fetch_feeds", shards=len(queries)) as s:
+        entries = fetch_shards(queries, poll_feed)
+        s["entries"] = len(entries)
+    for entry in entries:
+        candidates.append({
+            "id": entry["id"],
+            "feed": feed_key,
+            "shard": entry["shard"],
+            "shard_url": entry["shard_url"],
+            "title": entry["title"],
+            "link": entry["link"],
+            "summary": clean_summary(entry["summary"], max_chars=300),
+            "ai_summary": "",
+            "published": entry["published"]
         })
+    if subscribers:
+        #drop entries every recipient has already been sent, before any ranking or LLM work
+        candidates = unseen_by_any(subscribers, candidates)
+
+    #collapse syndicated copies of the same story and keep the most relevant ones, best first
+    with span("rank", candidates=len(candidates)):
+        news_items = rank_items(candidates, terms, RISK_TERMS, limit=max_items)
+    print(f"Ranked {len(candidates)} feed entries down to {len(news_items)} distinct item(s).")
+
+    if use_ai:
+        #only the top-ranked items are summarised; extraction and summarisation run concurrently and keep ranked order
+        targets = news_items[:ai_max_items]
+
+        def extract(item: dict) -> tuple:
+            with span("extract", item=item["id"]) as s:
+                article_text = extract_article_text(item["link"])
+                s["chars"] = len(article_text)
+            #keep only the sentences most relevant to the industry and risk terms, within the token budget
+            with span("condense", item=item["id"]):
+                article_text = condense_article(article_text, key_industry, terms, RISK_TERMS)
+            return item["id"], article_text or item["summary"] or item["title"]
+
+        def summarise(text: str, item_id: str | None = None) -> str:
+            with span("summarise", item=item_id):
+                return summarise_with_ai(text, topic=key_industry, max_words=60)
+
+        if batch:
+            #extract concurrently, then summarise in as few token-budgeted LLM requests as possible
+            started = time.monotonic()
+            deadline = PIPELINE_DEADLINE if deadline is None else deadline
+            extracted = run_pipeline(targets, extract, lambda pair: pair[1], max_workers=max_workers, deadline=deadline)
+            with span("summarise_batched", items=len(targets)):
+                summaries = summarise_batched([text or "" for text in extracted], key_industry, client, AI_MODEL, single=summarise,
+                                              max_words=60, single_template=SUMMARY_PROMPT,
+                                              deadline=max(0.0, deadline - (time.monotonic() - started)))
+        else:
+            summaries = run_pipeline(targets, extract, lambda pair: summarise(pair[1], pair[0]), max_workers=max_workers, deadline=deadline)
+        for item, ai_summary in zip(targets, summaries):
+            #items that miss the deadline or fail fall back to the cleaned RSS summary
+            item["ai_summary"] = ai_summary or item["summary"]
     return news_items
 
+#email content
+def normalise_location(free_text_location: str | None) -> str | None:
+    raw = (free_text_location or "").strip()
+    normalised_loc = None
+    if raw:
+        normalised_loc =geo_normalise(raw)
+        if isinstance(normalised_loc, dict):
+          normalised_loc = (
+            normalised_loc.get("canonical_name")
+            or normalised_loc.get("name")
+            or raw
+          )
+    return normalised_loc
+
+def create_email_content(name, key_industry, free_text_location, subscriber=None, block_on_terms=True):
+    "Returns subject, HTML body and the news items included; with a subscriber, items they were already sent are skipped."
+    with trace_run("digest", industry=key_industry):
+        normalised_loc = normalise_location(free_text_location)
+        news_items = fetch_news_rss(key_industry, normalised_loc, max_items=10, include_risk_terms=True, subscribers=[subscriber] if subscriber else None,
+                                    block_on_terms=block_on_terms)
+        subject, body = render_email(name, key_industry, normalised_loc, news_items)
+    return subject, body, news_items
+
+def render_email(name, key_industry, normalised_loc, news_items, renderer: DigestRenderer | None = None, with_text: bool = False):
+    """
+    Build subject and HTML body for one subscriber from already fetched news items.
+    Pass one shared renderer for a whole batch so article rows are rendered once; with_text=True also returns the plain-text body.
+    """
+    #rows are rendered from cached per-article fragments; see helper_functions/digest_render
+    with span("render", items=len(news_items)):
+        subject, body, text = (renderer or DigestRenderer()).render(name, key_industry, normalised_loc, news_items)
+    return (subject, body, text) if with_text else (subject, body)
+
+def build_message(email, subject, body, sender_email=None, text=None):
+    "text is the plain-text alternative; when omitted it is derived from the HTML."
+    sender_email = sender_email or secret("smtp_email")
+    message = MIMEMultipart("alternative")
+    message['From'] = f'News Alert <{sender_email}>'
+    message['To'] = email
+    message['Subject'] = subject
+
+    alt_text = text if text is not None else to_plaintext(body)
+    message.attach(MIMEText(alt_text, 'plain'))
+    message.attach(MIMEText(body, 'html'))
+    return message
+
+def smtp_transport(**overrides) -> SMTPTransport:
+    """Pooled SMTP connection using the configured sender account (secrets.toml, or the environment when headless); keep one open for a whole batch."""
+    settings = {"username": secret("smtp_email"), "password": secret("smtp_password")}
+    settings.update(overrides)
+    return SMTPTransport(**settings)
+
+def send_email(email, subject, body, transport: SMTPTransport | None = None):
+    message = build_message(email, subject, body)
+    with span("send") as s:
+        if transport is not None:
+            outcome = transport.send(message)
+        else:
+            with smtp_transport(rate_per_minute=0) as single:
+                outcome = single.send(message)
+        s["error"] = outcome["error"]
+    if not outcome["ok"]:
+        raise smtplib.SMTPException(outcome["error"])
+    return outcome
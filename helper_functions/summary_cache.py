@@ -0,0 +1,29 @@
+# <---Libraries--->
+import hashlib, os, re
+
+from helper_functions.disk_cache import CACHE_ROOT, DiskCache
+
+# <---Configuration--->
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(60*60*24*7))) # Summaries are reused for a week
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(64 * 2**20)))
+SUMMARY_CACHE_POLICY = os.getenv("SUMMARY_CACHE_POLICY", "lru") # lru, lfu or fifo
+
+summary_cache = DiskCache(CACHE_ROOT / "summaries.sqlite",
+                          ttl = SUMMARY_CACHE_TTL,
+                          max_bytes = SUMMARY_CACHE_MAX_BYTES,
+                          policy = SUMMARY_CACHE_POLICY)
+
+def normalise_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().casefold()
+
+def summary_key(text: str, topic: str, max_words: int, model: str, template: str) -> str:
+    """
+    Content address of a summary.
+    The prompt template itself is hashed into the key, so editing the prompt automatically stops old summaries from being served.
+    """
+    template_version = hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+    parts = [template_version, str(model or ""), normalise_text(topic), str(max_words), normalise_text(text)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def summary_cache_stats() -> dict:
+    return summary_cache.stats()
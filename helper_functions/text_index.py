@@ -0,0 +1,305 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import bisect, math, re, sqlite3, threading, time, zlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from helper_functions.disk_cache import CACHE_ROOT
+from helper_functions.document_text import PAGE_BREAK, PARSER_VERSION, document_hash
+
+# <---Configuration--->
+# Positional inverted index with BM25 ranking, shared by every directory that is searched. Postings are keyed
+# by the sha256 of a file's bytes (as in the embedding index), so a document is tokenised once whichever folder
+# or user it sits in; each directory only keeps a (path -> hash, size, mtime) listing used for incremental refresh.
+# The lines of each document are stored too, zlib-compressed in blocks of LINE_BLOCK, so a snippet reads one
+# small block instead of re-parsing the whole file.
+INDEX_DB = CACHE_ROOT / "text_index.sqlite"
+TOKENIZER_VERSION = "2" # Bump when tokenize() changes; the hybrid retriever's exports depend on it too
+LAYOUT_VERSION = "2" # Bump when what _index_document stores changes
+INDEX_VERSION = f"{TOKENIZER_VERSION}:{PARSER_VERSION}:{LAYOUT_VERSION}" # A change to any of these re-indexes documents
+LINE_BLOCK = 256 # Lines per stored snippet block
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "30")) # Minimum gap between stat walks of a directory
+
+TOKEN = re.compile(r"\w+")
+PHRASE = re.compile(r'"([^"]+)"')
+
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        INDEX_DB.parent.mkdir(parents = True, exist_ok = True)
+        conn = sqlite3.connect(str(INDEX_DB), timeout = 30, isolation_level = None, check_same_thread = False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+            directory TEXT,
+            path TEXT,
+            doc_hash TEXT,
+            size INTEGER,
+            mtime_ns INTEGER,
+            PRIMARY KEY (directory, path)
+            )''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+            doc_hash TEXT PRIMARY KEY,
+            version TEXT,
+            length INTEGER,
+            line_starts BLOB,
+            page_starts BLOB
+            )''')
+        if "page_starts" not in {row[1] for row in conn.execute("PRAGMA table_info(documents)")}:
+            conn.execute("ALTER TABLE documents ADD COLUMN page_starts BLOB") # Indexes written before stored lines
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS lines (
+            doc_hash TEXT,
+            block INTEGER,
+            text BLOB,
+            PRIMARY KEY (doc_hash, block)
+            ) WITHOUT ROWID''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS postings (
+            term TEXT,
+            doc_hash TEXT,
+            tf INTEGER,
+            positions BLOB,
+            PRIMARY KEY (term, doc_hash)
+            ) WITHOUT ROWID''')
+        conn.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (doc_hash)")
+        conn.execute("CREATE INDEX IF NOT EXISTS postings_hash ON postings (doc_hash)")
+        _local.conn = conn
+    return conn
+
+# <---Text--->
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.casefold())
+
+def split_lines(text: str) -> tuple:
+    "([line], [page of each line]) with 1-based pages, for text whose pages are separated by PAGE_BREAK."
+    lines, pages = [], []
+    for page, page_text in enumerate(text.split(PAGE_BREAK), start = 1):
+        page_lines = page_text.splitlines()
+        lines.extend(page_lines)
+        pages.extend([page] * len(page_lines))
+    return lines, pages
+
+def parse_query(query: str) -> tuple:
+    "(terms, phrases): every query token for scoring, and the quoted phrases (as token lists) a document must contain."
+    phrases = [tokens for tokens in (tokenize(p) for p in PHRASE.findall(query)) if len(tokens) > 1]
+    terms = list(dict.fromkeys(tokenize(query)))
+    return terms, phrases
+
+def bm25(tf: int, df: int, length: int, documents: int, avg_length: float, k1: float = BM25_K1, b: float = BM25_B) -> float:
+    idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / (avg_length or 1)))
+
+def _has_phrase(positions: Dict[str, np.ndarray], phrase: List[str]) -> np.ndarray:
+    "Start positions where the tokens of `phrase` occur consecutively (positions are sorted and unique per term)."
+    if any(token not in positions for token in phrase):
+        return np.zeros(0, dtype = np.int64)
+    starts = positions[phrase[0]]
+    for i, token in enumerate(phrase[1:], start = 1):
+        starts = np.intersect1d(starts, positions[token] - i, assume_unique = True)
+    return starts
+
+def _positions(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype = np.uintc).astype(np.int64) # Written as array("I"), i.e. C unsigned int
+
+# <---Index--->
+class TextIndex:
+    """
+    BM25 search over the files of one directory, backed by the shared positional index in .cache/text_index.sqlite.
+    `refresh()` stats the directory and only re-reads files whose size or mtime changed; a changed file whose
+    hash is already indexed (e.g. the same upload elsewhere) is linked without tokenising it again.
+    Usage:
+      index = TextIndex("data/<user>/repository_working", read_text = tool._read_text)
+      hits = index.search('"port congestion" contingency', max_results = 10)
+    """
+    def __init__(self, directory: str | Path, read_text: Callable[[Path], str], file_glob: str = "**/*.*", refresh_seconds: float = REFRESH_SECONDS):
+        self.directory = Path(directory)
+        self.key = str(self.directory.resolve())
+        self.read_text = read_text
+        self.file_glob = file_glob
+        self.refresh_seconds = refresh_seconds
+        self._refreshed = 0.0
+        self._lengths: Dict[str, int] = {}
+        self._paths: Dict[str, List[str]] = {}
+        self._line_starts: Dict[str, np.ndarray] = {}
+        self._page_starts: Dict[str, array] = {}
+        self._norms: Dict[str, float] = {}
+        self._avg_length = 0.0
+
+    # Maintenance
+    def refresh(self) -> dict:
+        """Bring the directory listing and postings up to date. Returns {kept, linked, indexed, removed}."""
+        conn = _connect()
+        known = {path: (doc_hash, size, mtime_ns) for path, doc_hash, size, mtime_ns in
+                 conn.execute("SELECT path, doc_hash, size, mtime_ns FROM files WHERE directory = ?", (self.key,))}
+        current = {doc_hash for (doc_hash,) in conn.execute("SELECT doc_hash FROM documents WHERE version = ?", (INDEX_VERSION,))}
+        counts = {"kept": 0, "linked": 0, "indexed": 0, "removed": 0}
+        seen, stale = set(), set()
+        for p in sorted(self.directory.glob(self.file_glob)):
+            if not p.is_file():
+                continue
+            path, stat = str(p), p.stat()
+            seen.add(path)
+            previous = known.get(path)
+            if previous and previous[1:] == (stat.st_size, stat.st_mtime_ns) and previous[0] in current:
+                counts["kept"] += 1
+                continue
+            doc_hash = document_hash(p)
+            if previous and previous[0] != doc_hash:
+                stale.add(previous[0])
+            if self._index_document(conn, p, doc_hash):
+                counts["indexed"] += 1
+            else:
+                counts["linked"] += 1
+            conn.execute("INSERT OR REPLACE INTO files (directory, path, doc_hash, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                         (self.key, path, doc_hash, stat.st_size, stat.st_mtime_ns))
+        for path in set(known) - seen:
+            stale.add(known[path][0])
+            conn.execute("DELETE FROM files WHERE directory = ? AND path = ?", (self.key, path))
+            counts["removed"] += 1
+        for doc_hash in stale: # Drop postings nobody lists any more
+            if conn.execute("SELECT 1 FROM files WHERE doc_hash = ? LIMIT 1", (doc_hash,)).fetchone() is None:
+                conn.execute("DELETE FROM postings WHERE doc_hash = ?", (doc_hash,))
+                conn.execute("DELETE FROM lines WHERE doc_hash = ?", (doc_hash,))
+                conn.execute("DELETE FROM documents WHERE doc_hash = ?", (doc_hash,))
+        self._load_scope(conn)
+        self._refreshed = time.monotonic()
+        return counts
+
+    def _index_document(self, conn: sqlite3.Connection, path: Path, doc_hash: str) -> bool:
+        "Tokenise and store `path` unless its content is already indexed at the current version."
+        row = conn.execute("SELECT version FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        if row is not None and row[0] == INDEX_VERSION:
+            return False
+        lines, pages = split_lines(self.read_text(path) or "")
+        positions, line_starts, position = defaultdict(lambda: array("I")), array("I"), 0
+        for line in lines:
+            line_starts.append(position)
+            for token in tokenize(line):
+                positions[token].append(position)
+                position += 1
+        page_starts = array("I") # First line of each page; a page without lines repeats the next page's start
+        for i, page in enumerate(pages):
+            while len(page_starts) < page:
+                page_starts.append(i)
+        blocks = [(doc_hash, b, zlib.compress("\n".join(lines[b * LINE_BLOCK:(b + 1) * LINE_BLOCK]).encode("utf-8")))
+                  for b in range((len(lines) + LINE_BLOCK - 1) // LINE_BLOCK)]
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM postings WHERE doc_hash = ?", (doc_hash,))
+        conn.execute("DELETE FROM lines WHERE doc_hash = ?", (doc_hash,))
+        conn.executemany("INSERT INTO postings (term, doc_hash, tf, positions) VALUES (?, ?, ?, ?)",
+                         [(term, doc_hash, len(found), found.tobytes()) for term, found in positions.items()])
+        conn.executemany("INSERT INTO lines (doc_hash, block, text) VALUES (?, ?, ?)", blocks)
+        conn.execute("INSERT OR REPLACE INTO documents (doc_hash, version, length, line_starts, page_starts) VALUES (?, ?, ?, ?, ?)",
+                     (doc_hash, INDEX_VERSION, position, line_starts.tobytes(), page_starts.tobytes()))
+        conn.execute("COMMIT")
+        return True
+
+    def _load_scope(self, conn: sqlite3.Connection) -> None:
+        "Document lengths and paths of this directory, kept in memory for scoring."
+        self._lengths, self._paths, self._line_starts, self._page_starts = {}, defaultdict(list), {}, {}
+        for path, doc_hash, length in conn.execute(
+                "SELECT f.path, f.doc_hash, d.length FROM files f JOIN documents d ON d.doc_hash = f.doc_hash WHERE f.directory = ? ORDER BY f.path", (self.key,)):
+            self._lengths[doc_hash] = length
+            self._paths[doc_hash].append(path)
+        self._avg_length = sum(self._lengths.values()) / len(self._lengths) if self._lengths else 0.0
+        self._norms = {doc_hash: BM25_K1 * (1 - BM25_B + BM25_B * length / (self._avg_length or 1)) for doc_hash, length in self._lengths.items()}
+
+    def _maybe_refresh(self) -> None:
+        if not self._refreshed or time.monotonic() - self._refreshed >= self.refresh_seconds:
+            self.refresh()
+
+    def _lines_of(self, conn: sqlite3.Connection, doc_hash: str) -> np.ndarray:
+        "Token position of the first token of every line."
+        if doc_hash not in self._line_starts:
+            line_starts, page_starts = conn.execute("SELECT line_starts, page_starts FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+            self._line_starts[doc_hash] = _positions(line_starts)
+            self._page_starts[doc_hash] = array("I")
+            self._page_starts[doc_hash].frombytes(page_starts)
+        return self._line_starts[doc_hash]
+
+    def _snippet(self, conn: sqlite3.Connection, doc_hash: str, line: int, blocks: Dict[tuple, List[str]]) -> str:
+        "Line `line` with one line of context either side, read from the stored blocks (memoised in `blocks`)."
+        out = []
+        for i in range(max(0, line - 1), line + 2):
+            key = (doc_hash, i // LINE_BLOCK)
+            if key not in blocks:
+                row = conn.execute("SELECT text FROM lines WHERE doc_hash = ? AND block = ?", key).fetchone()
+                blocks[key] = zlib.decompress(row[0]).decode("utf-8").split("\n") if row else []
+            if i % LINE_BLOCK < len(blocks[key]):
+                out.append(blocks[key][i % LINE_BLOCK])
+        return "\n".join(out).strip()
+
+    # Search
+    def search(self, query: str, max_results: int = 10, per_file: int = 3) -> List[Dict]:
+        """
+        BM25-ranked search; quoted phrases ("port congestion") must appear verbatim in a matching document.
+        Returns up to `max_results` of {file, lineno, page, snippet, score}: the best `per_file` lines of each
+        document in score order, a line's weight being the idf of the query terms (and phrases) it contains.
+        """
+        self._maybe_refresh()
+        terms, phrases = parse_query(query)
+        if not terms or not self._lengths:
+            return []
+        conn = _connect()
+        documents = len(self._lengths)
+        scores: Dict[str, float] = defaultdict(float)
+        idf: Dict[str, float] = {}
+        df: Dict[str, int] = {}
+        norms = self._norms
+        for term in terms: # Scoring needs only term frequencies; positions are read for the documents returned
+            found = [(doc_hash, tf) for doc_hash, tf in conn.execute("SELECT doc_hash, tf FROM postings WHERE term = ?", (term,)) if doc_hash in norms]
+            df[term] = len(found)
+            idf[term] = weight = math.log(1 + (documents - len(found) + 0.5) / (len(found) + 0.5))
+            for doc_hash, tf in found: # Same as bm25(), with the per-document length norm precomputed
+                scores[doc_hash] += weight * tf * (BM25_K1 + 1) / (tf + norms[doc_hash])
+        if any(not df[token] for phrase in phrases for token in phrase): # A phrase with an unseen word matches nothing
+            return []
+
+        out, blocks = [], {}
+        for doc_hash in sorted(scores, key = lambda h: -scores[h]):
+            positions = {term: _positions(blob) for term, blob in conn.execute(
+                f"SELECT term, positions FROM postings WHERE doc_hash = ? AND term IN ({','.join('?' * len(terms))})", (doc_hash, *terms))}
+            phrase_starts = [_has_phrase(positions, phrase) for phrase in phrases]
+            if not all(len(starts) for starts in phrase_starts):
+                continue
+            line_starts = self._lines_of(conn, doc_hash)
+            #each term (and phrase) adds its idf once to every line it occurs on
+            weights = np.zeros(len(line_starts))
+            for found, weight in [(found, idf[term]) for term, found in positions.items()] + \
+                                 [(starts, sum(idf[token] for token in phrase)) for phrase, starts in zip(phrases, phrase_starts)]:
+                lines = np.searchsorted(line_starts, found, side = "right") - 1 # Sorted, as positions are
+                weights[lines[np.diff(lines, prepend = -1) != 0]] += weight
+            lines = np.flatnonzero(weights)
+            best = lines[np.lexsort((lines, -weights[lines]))[:per_file]] # Heaviest lines first, earlier lines on ties
+            page_starts = self._page_starts[doc_hash]
+            found = [(int(i), bisect.bisect_right(page_starts, i), self._snippet(conn, doc_hash, int(i), blocks)) for i in best]
+            for path in self._paths[doc_hash]:
+                for i, page, snippet in found:
+                    out.append({"file": path, "lineno": i+1, "page": page, "snippet": snippet, "score": round(scores[doc_hash], 4)})
+                    if len(out) >= max_results:
+                        return out
+        return out
+
+    def stats(self) -> dict:
+        return {"documents": len(self._lengths), "files": sum(len(p) for p in self._paths.values()), "avg_length": round(self._avg_length, 1)}
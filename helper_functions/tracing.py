@@ -0,0 +1,171 @@
+# <---Libraries--->
+import contextvars, json, math, os, threading, time, uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from helper_functions.disk_cache import CACHE_ROOT
+
+# <---Configuration--->
+TRACE_ENABLED = os.getenv("NEWS_TRACE", "0") not in ("", "0", "false", "False") # Off by default; spans then cost one flag check
+TRACE_LOG = Path(os.getenv("NEWS_TRACE_LOG", str(CACHE_ROOT / "traces.jsonl")))
+
+_run = contextvars.ContextVar("trace_run", default = None)
+_stack = contextvars.ContextVar("trace_stack", default = ())
+_write_lock = threading.Lock()
+_log_handle = None
+
+# <---Spans--->
+class _NullSpan(dict):
+    "Shared, reusable stand-in returned while tracing is disabled; tags set on it are discarded."
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+def _write(record: dict) -> None:
+    global _log_handle
+    line = json.dumps(record, default = str) + "\n"
+    with _write_lock:
+        if _log_handle is None:
+            TRACE_LOG.parent.mkdir(parents = True, exist_ok = True)
+            _log_handle = open(TRACE_LOG, "a", encoding = "utf-8", buffering = 1) # Line buffered: one span per line
+        _log_handle.write(line)
+
+@contextmanager
+def _span(stage: str, tags: dict):
+    record = dict(tags)
+    token = _stack.set(_stack.get() + (record,))
+    start, ok = time.perf_counter(), True
+    try:
+        yield record
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _stack.reset(token)
+        _write({"ts": round(time.time(), 3), "run": _run.get(), "stage": stage,
+                "ms": round(elapsed * 1000, 3), "ok": ok and not record.get("error"), **record})
+
+def span(stage: str, **tags):
+    """
+    Time a block as one pipeline stage and append it to the JSON-lines trace log.
+    Tags (item id, url, cache hit...) can be passed here or set on the yielded dict inside the block:
+      with span("extract", item = item["id"]) as s:
+          s["chars"] = len(text)
+    While tracing is disabled this returns a shared no-op object, so a span costs one flag check.
+    """
+    if not TRACE_ENABLED:
+        return _NULL_SPAN
+    return _span(stage, tags)
+
+def tag(**tags) -> None:
+    "Set tags on the innermost open span of the current thread or task, e.g. tag(cache = 'hit') from a cache lookup."
+    if TRACE_ENABLED:
+        stack = _stack.get()
+        if stack:
+            stack[-1].update(tags)
+
+@contextmanager
+def trace_run(name: str, **tags):
+    """Group the spans of one digest build under a shared run id; the run itself is recorded as a span named `name`."""
+    if not TRACE_ENABLED:
+        yield _NULL_SPAN
+        return
+    token = _run.set(uuid.uuid4().hex[:12])
+    try:
+        with _span(name, tags) as record:
+            yield record
+    finally:
+        _run.reset(token)
+
+def current_run() -> Optional[str]:
+    "Run id of the enclosing trace_run, if any."
+    return _run.get()
+
+def bind(fn: Callable) -> Callable:
+    """
+    Carry the current run id, open span and LLM ledger feature into a worker thread.
+    Call at submit time, e.g. pool.submit(bind(extract), item); thread pools do not copy context on their own.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+# <---Reporting--->
+def read_spans(path: Optional[Path] = None, since: Optional[float] = None, limit: int = 200_000) -> List[dict]:
+    """Load the most recent `limit` spans (optionally only those after the `since` timestamp); malformed lines are skipped."""
+    path = Path(path or TRACE_LOG)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding = "utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if since is None or record.get("ts", 0) >= since:
+                records.append(record)
+    return records[-limit:]
+
+def percentile(values: List[float], pct: float) -> float:
+    "Nearest-rank percentile of an already sorted list."
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+def stage_summary(records: Iterable[dict]) -> List[Dict]:
+    """Per-stage count, p50/p95/max milliseconds, total seconds, error count and cache hit rate, slowest total first."""
+    stages: Dict[str, dict] = {}
+    for record in records:
+        stats = stages.setdefault(record.get("stage", "?"), {"ms": [], "errors": 0, "hits": 0, "lookups": 0})
+        stats["ms"].append(float(record.get("ms", 0)))
+        stats["errors"] += 0 if record.get("ok", True) else 1
+        if "cache" in record:
+            stats["lookups"] += 1
+            stats["hits"] += 1 if record["cache"] == "hit" else 0
+
+    rows = []
+    for stage, stats in stages.items():
+        ms = sorted(stats["ms"])
+        rows.append({
+            "stage": stage,
+            "count": len(ms),
+            "p50_ms": round(percentile(ms, 50), 1),
+            "p95_ms": round(percentile(ms, 95), 1),
+            "max_ms": round(ms[-1], 1),
+            "total_s": round(sum(ms) / 1000, 2),
+            "errors": stats["errors"],
+            "cache_hit_rate": round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None,
+        })
+    return sorted(rows, key = lambda row: -row["total_s"])
+
+# Summary in a terminal:  python -m helper_functions.tracing [--hours 24]
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description = "Summarise news digest stage timings from the trace log.")
+    parser.add_argument("--hours", type = float, default = 24.0)
+    parser.add_argument("--log", default = str(TRACE_LOG))
+    args = parser.parse_args()
+
+    rows = stage_summary(read_spans(Path(args.log), since = time.time() - args.hours * 3600))
+    if not rows:
+        print(f"No spans in {args.log} for the last {args.hours:g}h (set NEWS_TRACE=1 to record them).")
+        return
+    print(f"{'stage':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'total s':>10}{'errors':>8}{'hit rate':>10}")
+    for row in rows:
+        hit_rate = "-" if row["cache_hit_rate"] is None else f"{row['cache_hit_rate']:.0%}"
+        print(f"{row['stage']:<22}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}{row['total_s']:>10}{row['errors']:>8}{hit_rate:>10}")
+
+if __name__ == "__main__":
+    main()
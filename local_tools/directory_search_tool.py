@@ -1,46 +1,210 @@
 # local_tools/directory_search_tool.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import re
-from typing import List, Dict
+import bisect, codecs, mmap, multiprocessing, os, weakref
+from typing import List, Dict, Optional
+
+from helper_functions.document_text import PARSED_FORMATS, document_record
+from helper_functions.text_index import TextIndex, split_lines, tokenize
+
+CONTAINER_FORMATS = {".pdf", ".docx"} # Compressed on disk, so scanned from the parsed-text cache instead of mapped
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", str(min(8, os.cpu_count() or 1))))
+SCAN_PARALLEL_BYTES = int(os.getenv("SCAN_PARALLEL_BYTES", str(8 * 2**20))) # Smaller scans stay in-process
+SCAN_BLOCK = 2**20 # Most bytes decoded at a time, so memory stays flat on huge files and huge lines
+LONG_LINE_SNIPPET = 400 # Characters kept around the first match of a line longer than SCAN_BLOCK
+
+def _line_at(mm: mmap.mmap, start: int) -> str:
+    "The line beginning at `start` (without its newline), cut at SCAN_BLOCK bytes."
+    end = mm.find(b"\n", start, start + SCAN_BLOCK)
+    return mm[start:min(len(mm), start + SCAN_BLOCK) if end < 0 else end].decode("utf-8", errors="ignore")
+
+def _match_long_line(mm: mmap.mmap, start: int, end: int, tokens: List[str]) -> Optional[str]:
+    """
+    Match a line too long for one block by decoding it SCAN_BLOCK bytes at a time; the casefolded tail of each
+    piece is kept so a token split across pieces is still found. Returns a snippet around the first match, or None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore") # Never splits a character between pieces
+    missing, keep, tail, previous = set(tokens), max(len(t) for t in tokens) - 1, "", ""
+    for pos in range(start, end, SCAN_BLOCK):
+        piece = decoder.decode(mm[pos:min(end, pos + SCAN_BLOCK)], final = pos + SCAN_BLOCK >= end)
+        folded = piece.casefold()
+        window = tail + folded
+        found = {t for t in missing if t in window}
+        if found and len(missing) == len(tokens): # First match; the snippet also covers a token split across pieces
+            text = previous + piece
+            folded_text = text.casefold()
+            at = max(0, min(folded_text.find(t) for t in found))
+            if len(folded_text) != len(text): # Folding lengthened the text ("ß" -> "ss"); map back to the original
+                at = bisect.bisect_left(range(len(text) + 1), at, key = lambda k: len(text[:k].casefold()))
+            snippet = text[max(0, at - LONG_LINE_SNIPPET // 2):at + LONG_LINE_SNIPPET // 2].strip()
+        missing -= found
+        if not missing:
+            return snippet
+        tail, previous = window[-keep:] if keep else "", piece[-LONG_LINE_SNIPPET:]
+    return None
+
+def _scan_mapped(path: Path, tokens: List[str], limit: int) -> List[Dict]:
+    """
+    Line match over a memory-mapped text file. Blocks of at most SCAN_BLOCK bytes, ending on a line end, are
+    decoded and casefolded, checked as a whole and, only if they hold every token, line by line; a single line
+    longer than a block is streamed through `_match_long_line`. Memory does not grow with the file or its lines.
+    Matching on decoded, casefolded text (not on bytes) keeps results identical to `_scan_text` and the index
+    for non-ASCII text ("Straße" matches "strasse").
+    `tokens` must already be casefolded; lines are split on "\n".
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if b"\0" in mm[:4096]: # Binary formats without a reader (e.g. legacy .doc) would only match as noise
+                return []
+            size = len(mm)
+            out, start, lineno = [], 0, 0 # `start` is always the start of line number `lineno` (0-based)
+            while len(out) < limit and start < size:
+                end = size if start + SCAN_BLOCK >= size else mm.rfind(b"\n", start, start + SCAN_BLOCK + 1)
+                if end < 0: # One line longer than a block
+                    end = mm.find(b"\n", start)
+                    end = size if end < 0 else end
+                    snippet = _match_long_line(mm, start, end, tokens)
+                    if snippet is not None:
+                        out.append({"file": str(path), "lineno": lineno+1, "page": 1, "snippet": snippet})
+                    lineno += 1
+                    start = end + 1
+                    continue
+                text = mm[start:end].decode("utf-8", errors="ignore") # Block edges are newlines, so no character is split
+                folded = text.casefold()
+                if not all(t in folded for t in tokens): # No line in this block can match
+                    lineno += text.count("\n") + 1
+                    start = end + 1
+                    continue
+                lines = text.split("\n")
+                for i, line in enumerate(lines):
+                    line_folded = line.casefold()
+                    if not all(t in line_folded for t in tokens):
+                        continue
+                    # create a short snippet with one preceding and following line
+                    before = lines[i-1] if i else (_line_at(mm, mm.rfind(b"\n", 0, start - 1) + 1) if start else "")
+                    after = lines[i+1] if i + 1 < len(lines) else (_line_at(mm, end + 1) if end + 1 < size else "")
+                    snippet = "\n".join((before, line, after)).replace("\r", "").strip()
+                    out.append({"file": str(path), "lineno": lineno+i+1, "page": 1, "snippet": snippet})
+                    if len(out) >= limit:
+                        break
+                lineno += len(lines)
+                start = end + 1
+            return out
+
+def _scan_text(path: Path, text: str, tokens: List[str], limit: int) -> List[Dict]:
+    "Line match over already-extracted text (pages separated by PAGE_BREAK); `tokens` must already be casefolded."
+    lines, pages = split_lines(text)
+    out = []
+    for i, line in enumerate(lines):
+        line_folded = line.casefold()
+        if all(tok in line_folded for tok in tokens):
+            # create a short snippet with one preceding and following line
+            snippet = "\n".join(lines[max(0, i-1):min(len(lines), i+2)]).strip()
+            out.append({"file": str(path), "lineno": i+1, "page": pages[i], "snippet": snippet})
+            if len(out) >= limit:
+                break
+    return out
+
+def _scan_file(path: str, tokens: List[str], limit: int) -> List[Dict]:
+    "First `limit` matching lines of one file; runs in scan worker processes."
+    p = Path(path)
+    try:
+        if p.suffix.lower() in CONTAINER_FORMATS:
+            return _scan_text(p, document_record(p)["text"], tokens, limit)
+        return _scan_mapped(p, tokens, limit)
+    except Exception:
+        return []
 
 class DirectorySearchTool:
     """
     Minimal directory text search tool.
     Usage:
-      tool = DirectorySearchTool(directory="repository_working")
-      results = tool.search("supply chain resilience", max_results=10)
-    Returns: List[Dict] each with keys: file, snippet, lineno
+      with DirectorySearchTool(directory="repository_working") as tool:
+          results = tool.search('supply chain "resilience plan"', max_results=10)
+    Returns: List[Dict] each with keys: file, snippet, lineno, page (plus score for indexed searches)
+    PDF/DOCX/MD/TXT text comes from the shared parsed-document cache, so files are parsed once, not per search.
+    Searches go through a persistent BM25 index (helper_functions/text_index) that is refreshed incrementally,
+    starting with the first search, so building the tool reads nothing; `scan` keeps the original unindexed line match.
     """
-    def __init__(self, directory: str = "."):
+    def __init__(self, directory: str = ".", file_glob: str = "**/*.*", workers: int = SCAN_WORKERS):
         self.directory = Path(directory)
+        self.file_glob = file_glob
+        self.workers = workers
+        self._pool = None
+        self.index = TextIndex(self.directory, read_text=self._read_text, file_glob=file_glob) # Built or refreshed on the first search
 
     def _read_text(self, path: Path) -> str:
         try:
-            return path.read_text(encoding="utf-8", errors="ignore")
+            if path.suffix.lower() in PARSED_FORMATS:
+                return document_record(path)["text"] # Pages separated by PAGE_BREAK
+            data = path.read_bytes()
+            if b"\0" in data[:4096]: # Binary formats without a reader (e.g. legacy .doc) would only match as noise
+                return ""
+            return data.decode("utf-8", errors="ignore")
         except Exception:
             return ""
 
-    def search(self, query: str, max_results: int = 10, file_glob: str = "**/*.*") -> List[Dict]:
+    def search(self, query: str, max_results: int = 10, file_glob: str | None = None) -> List[Dict]:
+        """
+        BM25-ranked search; quoted phrases must match verbatim. Returns a list of {file, snippet, lineno, page, score}.
+        A `file_glob` other than the tool's own falls back to `scan`.
+        """
+        if file_glob and file_glob != self.file_glob:
+            return self.scan(query, max_results=max_results, file_glob=file_glob)
+        return self.index.search(query, max_results=max_results)
+
+    def scan(self, query: str, max_results: int = 10, file_glob: str = "**/*.*") -> List[Dict]:
         """
-        Very simple text search: matches lines containing all query tokens (case-insensitive).
-        Returns a list of {file, snippet, lineno} (snippet = ±1 lines around match).
+        Unindexed search: matches lines containing all query tokens (case-insensitive), in file then line order.
+        Returns a list of {file, snippet, lineno, page} (snippet = ±1 lines around match, page is 1-based).
+        Text files are memory-mapped rather than read; when the files add up to SCAN_PARALLEL_BYTES or more they
+        are fanned out over a process pool, a few at a time in file order, and the scan stops as soon as the files
+        finished so far hold `max_results` hits (later files cannot outrank them).
         """
-        tokens = [t.lower() for t in re.findall(r"\w+", query)]
+        tokens = tokenize(query) # Casefolded like the index, so scan and search agree on non-ASCII text
+        if not tokens:
+            return []
+        files = [p for p in sorted(self.directory.glob(file_glob)) if p.is_file()]
         out = []
-        for p in sorted(self.directory.glob(file_glob)):
-            if p.is_file():
-                txt = self._read_text(p)
-                if not txt:
-                    continue
-                lines = txt.splitlines()
-                for i, line in enumerate(lines):
-                    line_lower = line.lower()
-                    if all(tok in line_lower for tok in tokens):
-                        # create a short snippet with one preceding and following line
-                        start = max(0, i-1)
-                        end = min(len(lines), i+2)
-                        snippet = "\n".join(lines[start:end]).strip()
-                        out.append({"file": str(p), "lineno": i+1, "snippet": snippet})
-                        if len(out) >= max_results:
-                            return out
-        return out
+        if self.workers <= 1 or len(files) < 2 or sum(p.stat().st_size for p in files) < SCAN_PARALLEL_BYTES:
+            for p in files:
+                out.extend(_scan_file(str(p), tokens, max_results - len(out)))
+                if len(out) >= max_results:
+                    break
+            return out
+        pool, remaining, pending = self._executor(), iter(files), deque()
+        def top_up():
+            for p in remaining:
+                pending.append(pool.submit(_scan_file, str(p), tokens, max_results))
+                if len(pending) >= self.workers * 2:
+                    break
+        top_up()
+        while pending and len(out) < max_results:
+            out.extend(pending.popleft().result())
+            top_up()
+        for future in pending:
+            future.cancel()
+        return out[:max_results]
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Workers are stopped when the tool is garbage-collected (or at exit) even if close() is never called
+            self._finalizer = weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+        return self._pool
+
+    def close(self) -> None:
+        "Shut down the scan worker processes, if any were started."
+        if self._pool is not None:
+            self._finalizer.detach()
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "DirectorySearchTool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,41 @@
+# local_tools/hybrid_search_tool.py
+from pathlib import Path
+from typing import Dict, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from helper_functions.embedding_index import index_paths
+from helper_functions.hybrid_retriever import HybridRetriever, retriever_for
+from helper_functions.repository import check_documents
+
+class HybridSearchInput(BaseModel):
+    search_query: str = Field(..., description = "Mandatory search query you want to use to search the repository's content")
+
+class HybridSearchTool(BaseTool):
+    """
+    Keyword + semantic search over a user's working repository, without a vector database.
+    New documents are embedded into the shared content-hash chunk store when the tool is created; the scope's
+    chunks are then served from memory-mapped arrays, so each query costs one query embedding plus a matmul.
+    Usage:
+      tool = HybridSearchTool(directory = "data/<user>/repository_working")
+      text = tool.run(search_query = "critical supplies")
+    """
+    name: str = "Search the repository"
+    description: str = "Keyword and semantic search over the documents in the working repository. Returns verbatim snippets with file name and page."
+    args_schema: Type[BaseModel] = HybridSearchInput
+    directory: str
+    top_k: int = 8
+    _scope: Dict[str, str] = PrivateAttr(default_factory = dict)
+    _retriever: HybridRetriever | None = PrivateAttr(default = None)
+
+    def model_post_init(self, __context) -> None:
+        super().model_post_init(__context)
+        self._scope = index_paths(check_documents(Path(self.directory)))
+        self._retriever = retriever_for(self._scope)
+
+    def _run(self, search_query: str) -> str:
+        hits = self._retriever.search(search_query, top_k = self.top_k, names = self._scope)
+        if not hits:
+            return "No relevant content found in the repository."
+        return "\n\n".join(f'"{hit["file"]}", page {hit["page"]}:\n{hit["text"]}' for hit in hits)
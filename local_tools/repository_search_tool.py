@@ -0,0 +1,38 @@
+# local_tools/repository_search_tool.py
+from pathlib import Path
+from typing import Dict, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from helper_functions.embedding_index import index_paths, search
+from helper_functions.repository import check_documents
+
+class RepositorySearchInput(BaseModel):
+    search_query: str = Field(..., description = "Mandatory search query you want to use to search the repository's content")
+
+class RepositorySearchTool(BaseTool):
+    """
+    Semantic search over a user's working repository, backed by the shared content-hash chunk store.
+    Documents already embedded for any user (e.g. the Ceranum base documents) are reused as-is; only new
+    content is chunked and embedded when the tool is created.
+    Usage:
+      tool = RepositorySearchTool(directory = "data/<user>/repository_working")
+      text = tool.run(search_query = "critical supplies")
+    """
+    name: str = "Search the repository"
+    description: str = "Semantic search over the documents in the working repository. Returns verbatim snippets with file name and page."
+    args_schema: Type[BaseModel] = RepositorySearchInput
+    directory: str
+    top_k: int = 8
+    _scope: Dict[str, str] = PrivateAttr(default_factory = dict)
+
+    def model_post_init(self, __context) -> None:
+        super().model_post_init(__context)
+        self._scope = index_paths(check_documents(Path(self.directory)))
+
+    def _run(self, search_query: str) -> str:
+        hits = search(search_query, self._scope, top_k = self.top_k)
+        if not hits:
+            return "No relevant content found in the repository."
+        return "\n\n".join(f'"{hit["file"]}", page {hit["page"]} (relevance {hit["score"]:.2f}):\n{hit["text"]}' for hit in hits)
@@ -6,9 +6,18 @@ from crewai import Agent, Task, Crew, Process
 from crewai_tools import DirectorySearchTool
 from pathlib import Path
 
+from helper_functions.llm_ledger import kickoff
+from local_tools.hybrid_search_tool import HybridSearchTool
+from local_tools.repository_search_tool import RepositorySearchTool
+
 load_dotenv(".env")
 os.environ.setdefault("CHROMA_CLIENT_TYPE", "persistent")
 os.environ.setdefault("CHROMA_PERSIST_PATH", ".chroma")
+# Researcher's search tool. "hybrid" (default) fuses dense and BM25 rankings over the shared content-hash chunk
+# store, "shared" is dense search over the same store, "directory" is a per-folder crewai_tools index. The base
+# documents are embedded once per deployment by repository.start_background_index(), so building a crew only
+# embeds a user's own uploads the first time anyone uses them.
+QNA_SEARCH_TOOL = os.getenv("QNA_SEARCH_TOOL", "hybrid")
 
 # <---Prompt Engineering--->
 agent_prompt_engineer = Agent(role = "Prompt Engineer",
@@ -59,7 +68,7 @@ agent_researcher = Agent(role = "Researcher",
                          verbose = True)
 
 task_research = Task(description = """
-                     1) Use DirectorySearchTool to search the repository.
+                     1) Use the repository search tool to search the repository.
                      2) Extract verbatim snippers relevant to the prompt. Prioritise:
                      - Ceranum-specific references or analogues from comparable nations
                      - Critical supplies, supplier concentration, chokepoints, and alternative sources
@@ -125,7 +134,12 @@ def build_crew(repository: Path) -> Crew:
     if not repository.exists() or not repository.is_dir():
         raise FileNotFoundError(f"Working repository not found.")
     
-    tool_researcher = DirectorySearchTool(directory = str(repository))
+    if QNA_SEARCH_TOOL == "directory":
+        tool_researcher = DirectorySearchTool(directory = str(repository))
+    elif QNA_SEARCH_TOOL == "shared":
+        tool_researcher = RepositorySearchTool(directory = str(repository)) # Embeds only documents no user has indexed before
+    else:
+        tool_researcher = HybridSearchTool(directory = str(repository)) # Same chunk store, served from memory-mapped arrays
     agent_researcher.tools = [tool_researcher]
 
     return Crew(agents = [agent_prompt_engineer, agent_researcher, agent_analyst],
@@ -138,5 +152,5 @@ def build_crew(repository: Path) -> Crew:
 def process_qna(user_query: str, repository_path: str | Path = "repository_working"):
     crew = build_crew(Path(repository_path))
     repository_working = Path(repository_path)
-    result = crew.kickoff(inputs = {"user_query": user_query})
+    result = kickoff(crew, "qna", inputs = {"user_query": user_query}) # One ledger row with the three agents' tokens
     return result.tasks_output[-1].raw
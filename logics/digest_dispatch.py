@@ -0,0 +1,107 @@
+# <---Libraries--->
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+import argparse, sqlite3, time
+from collections import defaultdict
+from pathlib import Path
+
+from helper_functions.digest_render import DigestRenderer
+from helper_functions.feed_poller import mark_seen, unseen_items
+from helper_functions.tracing import span, trace_run
+from helper_functions.structuring_email import build_message, fetch_news_rss, normalise_location, render_email, smtp_transport
+
+# <---Usage--->
+# Headless digest run for cron, e.g. every morning at 07:00:
+#   0 7 * * * cd /path/to/app && python -m logics.digest_dispatch
+# Subscribers sharing an industry and (normalised) location share one feed fetch and one round of summarisation.
+
+# <---Subscribers--->
+def load_active_subscribers(db_path: str | Path = "user_data.db") -> list[dict]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute('''
+            SELECT email, name, key_industry, free_text_location
+            FROM users
+            WHERE active = 1 AND confirmed = 1 AND email IS NOT NULL AND key_industry IS NOT NULL
+            ORDER BY email
+            ''').fetchall()
+    finally:
+        conn.close()
+    return [{"email": email, "name": name or "", "key_industry": key_industry, "free_text_location": location or ""}
+            for email, name, key_industry, location in rows]
+
+def group_subscribers(subscribers: list[dict]) -> dict[tuple, list[dict]]:
+    """
+    Group subscribers by (industry, normalised location).
+    Each distinct raw location is normalised once, so "US", "usa" and "United States" end up in the same group.
+    Returns {(key_industry, normalised_location or None): [subscriber, ...]}.
+    """
+    normalised = {}
+    groups = defaultdict(list)
+    for subscriber in subscribers:
+        raw = subscriber["free_text_location"].strip()
+        if raw.casefold() not in normalised:
+            normalised[raw.casefold()] = normalise_location(raw) if raw else None
+        location = normalised[raw.casefold()]
+        groups[(subscriber["key_industry"], location)].append(subscriber)
+    return dict(groups)
+
+# <---Dispatch--->
+def dispatch(db_path: str | Path = "user_data.db", dry_run: bool = False, max_items: int = 10) -> dict:
+    subscribers = load_active_subscribers(db_path)
+    groups = group_subscribers(subscribers)
+    print(f"Dispatching digests to {len(subscribers)} subscriber(s) in {len(groups)} group(s).")
+
+    report = {"subscribers": len(subscribers), "groups": len(groups), "sent": 0, "failed": 0, "outcomes": []}
+    renderer = DigestRenderer() # Article fragments are rendered once per run and shared by every subscriber
+    with smtp_transport() as transport: # One authenticated connection (recycled periodically) for the whole run
+        for (key_industry, location), members in groups.items():
+            with trace_run("digest_group", industry=key_industry, location=location, subscribers=len(members)): # All spans of this group share a run id
+                start = time.perf_counter()
+                emails = [member["email"] for member in members]
+                news_items = fetch_news_rss(key_industry, location, max_items=max_items, include_risk_terms=True, subscribers=emails) # One fetch per group
+                print(f"[{key_industry} / {location or '-'}] {len(news_items)} item(s) in {time.perf_counter() - start:.1f}s for {len(members)} subscriber(s).")
+
+                for member in members:
+                    member_items = unseen_items(member["email"], news_items) # Nothing this subscriber was sent before
+                    if not member_items:
+                        print(f"  {member['email']}: nothing new, skipped.")
+                        continue
+                    subject, body, text = render_email(member["name"], key_industry, location, member_items, renderer=renderer, with_text=True)
+                    if dry_run:
+                        print(f"  (dry run) {member['email']}: {subject}")
+                        continue
+                    with span("send", items=len(member_items)) as s:
+                        outcome = transport.send(build_message(member["email"], subject, body, text=text))
+                        s.update(attempts=outcome["attempts"], error=outcome["error"])
+                    report["outcomes"].append(outcome)
+                    if outcome["ok"]:
+                        report["sent"] += 1
+                        mark_seen(member["email"], member_items)
+                    else:
+                        report["failed"] += 1
+                        print(f"  Failed to send to {member['email']}: {outcome['error']}")
+    print(f"Dispatch finished: {report['sent']} sent, {report['failed']} failed.")
+    return report
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description = "Build and send news digests to all active subscribers.")
+    parser.add_argument("--db", default = "user_data.db", help = "Path to the subscriber database.")
+    parser.add_argument("--max-items", type = int, default = 10, help = "Articles per digest.")
+    parser.add_argument("--dry-run", action = "store_true", help = "Fetch and render, but do not send any email.")
+    args = parser.parse_args(argv)
+
+    report = dispatch(args.db, dry_run = args.dry_run, max_items = args.max_items)
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import argparse, json, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from helper_functions.fake_services import FakeServices
+from helper_functions.smtp_sink import local_smtp_sink
+
+# Offline end-to-end benchmark of the news generator:
+#   python -m logics.news_benchmark --subscribers 40 --concurrency 4 --passes 2
+# Google News, article sites and OpenAI are replaced by helper_functions/fake_services and Gmail by
+# helper_functions/smtp_sink, so runs are repeatable and cost nothing. Pass 1 starts from empty caches;
+# later passes show the warm-cache path (304 feeds, cached articles and summaries).
+# Tokens are estimated from characters (LLM_TOKEN_COUNTER=chars), so no tiktoken encoding is downloaded either.
+
+LOCATIONS = ["Singapore", "United States", "Malaysia", "Germany"]
+
+# <---Environment--->
+def _configure(fake: FakeServices, sink, work_dir: Path) -> None:
+    """Point every pipeline setting at the local stand-ins; must run before the pipeline modules are imported."""
+    os.environ.update({
+        "CACHE_DIR": str(work_dir / "cache"),
+        "NEWS_TRACE": "1",
+        "NEWS_TRACE_LOG": str(work_dir / "traces.jsonl"),
+        "LLM_TOKEN_COUNTER": "chars", # tiktoken downloads its encoding on first use
+        "NEWS_RSS_URL": fake.rss_url_template,
+        "OPENAI_BASE_URL": fake.openai_base_url,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_MODEL_NAME": "benchmark-model",
+        "SMTP_HOST": sink.host,
+        "SMTP_PORT": str(sink.port),
+        "SMTP_STARTTLS": "0",
+        "SMTP_RATE_PER_MINUTE": "0",
+        "smtp_email": "alerts@localhost",
+    })
+
+def _subscribers(count: int, industries: list, pass_index: int) -> list:
+    #fresh addresses per pass, otherwise later passes would find every item already delivered
+    return [{"name": f"Subscriber {i}",
+             "email": f"subscriber{i}.pass{pass_index}@localhost",
+             "key_industry": industries[i % len(industries)],
+             "free_text_location": LOCATIONS[(i // len(industries)) % len(LOCATIONS)]} for i in range(count)]
+
+# <---Benchmark--->
+def run_pass(subscribers: list, concurrency: int, fake: FakeServices, sink) -> dict:
+    from helper_functions import structuring_email, tracing
+    from helper_functions.feed_poller import mark_seen
+
+    local = threading.local()
+    transports = []
+
+    def transport():
+        if getattr(local, "transport", None) is None:
+            local.transport = structuring_email.smtp_transport(username=None) # The sink does not speak AUTH
+            transports.append(local.transport)
+        return local.transport
+
+    def one(subscriber: dict) -> dict:
+        start = time.perf_counter()
+        subject, body, news_items = structuring_email.create_email_content(subscriber["name"], subscriber["key_industry"],
+                                                                           subscriber["free_text_location"], subscriber=subscriber["email"])
+        structuring_email.send_email(subscriber["email"], subject, body, transport=transport())
+        mark_seen(subscriber["email"], news_items)
+        return {"seconds": time.perf_counter() - start, "items": len(news_items)}
+
+    calls_before, mails_before, started_at = fake.snapshot(), len(sink.messages), time.time()
+    start = time.perf_counter()
+    errors = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="bench-digest") as pool:
+        results = []
+        for future in [pool.submit(one, subscriber) for subscriber in subscribers]:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"Digest failed: {e}")
+    elapsed = time.perf_counter() - start
+    for t in transports:
+        t.close()
+
+    calls = fake.snapshot() - calls_before
+    digests = len(results)
+    llm_calls = sum(n for kind, n in calls.items() if kind.startswith("llm_"))
+    latencies = sorted(r["seconds"] for r in results)
+    return {
+        "digests": digests,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "digests_per_minute": round(digests / elapsed * 60, 1) if elapsed else 0.0,
+        "digest_p50_s": round(tracing.percentile(latencies, 50), 3),
+        "digest_p95_s": round(tracing.percentile(latencies, 95), 3),
+        "items_per_digest": round(sum(r["items"] for r in results) / digests, 1) if digests else 0.0,
+        "llm_calls_per_digest": round(llm_calls / digests, 2) if digests else 0.0,
+        "requests": dict(sorted(calls.items())),
+        "emails_delivered": len(sink.messages) - mails_before,
+        "stages": tracing.stage_summary(tracing.read_spans(since=started_at)),
+    }
+
+def print_pass(index: int, report: dict) -> None:
+    print(f"\n== Pass {index}: {report['digests']} digest(s), {report['errors']} error(s) in {report['seconds']}s "
+          f"-> {report['digests_per_minute']} digests/minute (p50 {report['digest_p50_s']}s, p95 {report['digest_p95_s']}s)")
+    print(f"   {report['items_per_digest']} items/digest, {report['llm_calls_per_digest']} LLM calls/digest, "
+          f"{report['emails_delivered']} email(s) delivered, requests {report['requests']}")
+    print(f"   {'stage':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}{'hit rate':>10}")
+    for row in report["stages"]:
+        hit_rate = "-" if row["cache_hit_rate"] is None else f"{row['cache_hit_rate']:.0%}"
+        print(f"   {row['stage']:<20}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['total_s']:>10}{hit_rate:>10}")
+
+def check_baseline(reports: list, baseline_path: str, tolerance: float) -> list:
+    """Compare each pass with a saved run; a throughput drop or LLM-call growth beyond `tolerance` is a regression."""
+    baseline = json.loads(Path(baseline_path).read_text())["passes"]
+    problems = []
+    for index, (now, then) in enumerate(zip(reports, baseline), start=1):
+        if now["digests_per_minute"] < then["digests_per_minute"] * (1 - tolerance):
+            problems.append(f"pass {index}: {now['digests_per_minute']} digests/minute vs baseline {then['digests_per_minute']}")
+        if now["llm_calls_per_digest"] > then["llm_calls_per_digest"] * (1 + tolerance) + 1e-9:
+            problems.append(f"pass {index}: {now['llm_calls_per_digest']} LLM calls/digest vs baseline {then['llm_calls_per_digest']}")
+    return problems
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the news digest pipeline.")
+    parser.add_argument("--subscribers", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Digests built at the same time.")
+    parser.add_argument("--industries", type=int, default=3, help="Distinct industries across subscribers.")
+    parser.add_argument("--passes", type=int, default=2, help="Pass 1 is cold; later passes reuse the caches.")
+    parser.add_argument("--article-latency", type=float, default=0.2, help="Seconds per article download.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM request.")
+    parser.add_argument("--items-per-feed", type=int, default=30)
+    parser.add_argument("--no-batch", action="store_true", help="Summarise one article per LLM request.")
+    parser.add_argument("--json", help="Write the report to this file.")
+    parser.add_argument("--baseline", help="Fail if throughput or LLM calls regress against this saved report.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.no_batch:
+        os.environ["NEWS_SUMMARY_BATCH"] = "0"
+    with tempfile.TemporaryDirectory(prefix="news-bench-") as work_dir, \
+         FakeServices(items_per_feed=args.items_per_feed, article_latency=args.article_latency, llm_latency=args.llm_latency).start() as fake, \
+         local_smtp_sink() as sink:
+        _configure(fake, sink, Path(work_dir))
+        from helper_functions.industry_terms import INDUSTRIES
+
+        reports = []
+        for index in range(1, args.passes + 1):
+            subscribers = _subscribers(args.subscribers, INDUSTRIES[:max(1, args.industries)], index)
+            reports.append(run_pass(subscribers, args.concurrency, fake, sink))
+            print_pass(index, reports[-1])
+
+        from helper_functions.llm_ledger import feature_summary
+        ledger = feature_summary()
+        print("\nLLM ledger (all passes)")
+        for row in ledger:
+            print(f"  {row['feature']:<20}{row['requests']:>6} requests{row['cache_hits']:>7} cached{row['total_tokens']:>10} tokens  p50 {row['p50_ms']} ms")
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("json", "baseline", "tolerance")}
+    if args.json:
+        Path(args.json).write_text(json.dumps({"settings": settings, "passes": reports, "ledger": ledger}, indent=2))
+    if args.baseline:
+        problems = check_baseline(reports, args.baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
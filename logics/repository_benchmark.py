@@ -0,0 +1,324 @@
+import os
+os.environ.setdefault("CHROMA_DB_IMPL", "duckdb+parquet")
+os.environ.setdefault("CREWAI_STORAGE_DIR", ".crewai_storage")
+
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import argparse, json, multiprocessing, random, resource, tempfile, time, zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# Benchmark of "Build Repository" and document search:
+#   python -m logics.repository_benchmark --base-docs 40 --uploads 10 --doc-kb 64 [--crewai]
+# A synthetic corpus (PDF, DOCX, MD and TXT) is written into a scratch directory as repository.zip plus
+# user uploads, then each phase runs in a fresh process from that directory so wall time and peak RSS
+# are not skewed by earlier phases:
+#   bootstrap     importing helper_functions.repository and ensure_base_repository (first extraction)
+#   prepare_cold  prepare_repository with new uploads into an empty working repository
+#   prepare_warm  prepare_repository again with the same selection ("Build Repository" clicked twice)
+#   local_search  local_tools DirectorySearchTool: construction (BM25 index build), every query, then a
+#                 second construction (incremental refresh, should tokenise nothing) and the unindexed scan
+#                 mode for every query (reported as scan_query_p50_ms / scan_query_p95_ms)
+#   crewai_search crewai_tools DirectorySearchTool (embedding index + queries) against the local fake
+#                 embeddings endpoint; only with --crewai
+#   shared_search helper_functions/embedding_index: index the working repository twice (the second pass
+#                 should embed nothing), then every query; only with --shared
+#   hybrid_search helper_functions/hybrid_retriever over the same scope: export (cold), memory-mapped load
+#                 (warm), then every query; only with --shared
+# Reports are kept under .cache/benchmarks and compared with --baseline.
+# With --shared, embedding inputs are counted with tiktoken, so on a machine without internet access its encoding
+# file must already be in TIKTOKEN_CACHE_DIR.
+
+BASELINE_DIR = Path(os.getenv("CACHE_DIR", ".cache")) / "benchmarks"
+USER_KEY = "benchmark_user"
+QUERIES = ["critical supplies semiconductor", "port congestion contingency", "rare earth export control",
+           "supplier concentration risk", "strategic stockpile pharmaceutical", "partnership memorandum logistics"]
+
+VOCABULARY = ("supply chain resilience critical supplies semiconductor pharmaceutical rare earth lithium port congestion "
+              "export control tariff stockpile supplier concentration chokepoint logistics partnership memorandum "
+              "diversification contingency inventory buffer shipping lane energy security food security agency "
+              "ministry policy standard certification financing incentive manufacturer capacity demand forecast").split()
+
+# <---Synthetic Corpus--->
+def _sentences(rng: random.Random, n_bytes: int) -> list[str]:
+    out, size = [], 0
+    while size < n_bytes:
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 18))).capitalize() + "."
+        out.append(sentence)
+        size += len(sentence) + 1
+    return out
+
+def _pdf(lines: list[str]) -> bytes:
+    "Minimal multi-page PDF with one Helvetica text stream per page."
+    pages = [lines[i:i + 50] for i in range(0, len(lines), 50)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        text = " ".join("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in page_lines)
+        stream = f"BT /F1 9 Tf 40 800 Td 14 TL {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start = 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+def _docx(paragraphs: list[str], path: Path) -> None:
+    "Minimal WordprocessingML package: content types, package relationship and one document part."
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paragraphs)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml",
+                      '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                      '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                      '<Default Extension="xml" ContentType="application/xml"/>'
+                      '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        docx.writestr("_rels/.rels",
+                      '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                      '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        docx.writestr("word/document.xml",
+                      '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                      f"<w:body>{body}</w:body></w:document>")
+
+def write_document(path: Path, rng: random.Random, n_bytes: int) -> None:
+    lines = _sentences(rng, n_bytes)
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        path.write_bytes(_pdf(lines))
+    elif suffix == ".docx":
+        _docx(lines, path)
+    elif suffix == ".md":
+        path.write_text("\n\n".join(f"## Section {i}\n{line}" if i % 10 == 0 else line for i, line in enumerate(lines)), encoding = "utf-8")
+    else:
+        path.write_text("\n".join(lines), encoding = "utf-8")
+
+def build_corpus(work_dir: Path, base_docs: int, uploads: int, doc_kb: int, seed: int = 7) -> dict:
+    """Write repository.zip (base documents) and a folder of user uploads into `work_dir`; returns their sizes."""
+    rng = random.Random(seed)
+    suffixes = [".pdf", ".docx", ".md", ".txt"]
+    staging = work_dir / "_staging"
+    staging.mkdir(parents = True, exist_ok = True)
+    with zipfile.ZipFile(work_dir / "repository.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(base_docs):
+            path = staging / f"base_{i:04d}{suffixes[i % len(suffixes)]}"
+            write_document(path, rng, doc_kb * 1024)
+            archive.write(path, f"repository/{path.name}")
+            path.unlink()
+    upload_dir = work_dir / "uploads_source"
+    upload_dir.mkdir(exist_ok = True)
+    for i in range(uploads):
+        write_document(upload_dir / f"upload_{i:04d}{suffixes[i % len(suffixes)]}", rng, doc_kb * 1024)
+    staging.rmdir()
+    return {"zip_bytes": (work_dir / "repository.zip").stat().st_size,
+            "upload_bytes": sum(p.stat().st_size for p in upload_dir.iterdir())}
+
+# <---Measurement--->
+class _Upload:
+    "Stands in for a Streamlit UploadedFile (name + getbuffer())."
+    def __init__(self, path: Path):
+        self.name = path.name
+        self._data = path.read_bytes()
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._data)
+
+def _snapshot(directory: Path) -> dict:
+    return {p.name: p.stat() for p in directory.iterdir() if p.is_file()} if directory.exists() else {}
+
+def _copied_bytes(before: dict, after: dict) -> dict:
+    """Bytes written into the working repository: new or replaced files that are not hard links to an existing copy."""
+    copied = linked = unchanged = 0
+    for name, stat in after.items():
+        old = before.get(name)
+        if old is not None and (old.st_ino, old.st_ctime_ns, old.st_size) == (stat.st_ino, stat.st_ctime_ns, stat.st_size): # ctime, since copy2 keeps mtime and freed inodes get reused
+            unchanged += stat.st_size
+        elif stat.st_nlink > 1:
+            linked += stat.st_size
+        else:
+            copied += stat.st_size
+    return {"bytes_copied": copied, "bytes_linked": linked, "bytes_unchanged": unchanged}
+
+def _peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) # ru_maxrss is KiB on Linux
+
+def _percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    pick = lambda pct: samples[max(0, -(-len(samples) * pct // 100) - 1)] if samples else 0.0
+    return {"query_p50_ms": round(pick(50) * 1000, 2), "query_p95_ms": round(pick(95) * 1000, 2)}
+
+def _phase(name: str, work_dir: str, settings: dict) -> dict:
+    "Runs in a child process with `work_dir` as the current directory (the repository module uses relative paths)."
+    os.chdir(work_dir)
+    start = time.perf_counter()
+    from helper_functions import repository
+    repository.ensure_base_repository()
+    result = {"phase": name, "bootstrap_s": round(time.perf_counter() - start, 3)}
+
+    working = Path("data") / repository.sanitise(USER_KEY) / "repository_working"
+    if name == "bootstrap":
+        result["seconds"] = result["bootstrap_s"]
+    elif name in ("prepare_cold", "prepare_warm"):
+        sources = sorted(Path("uploads_source").iterdir())
+        files = [_Upload(p) for p in sources] if name == "prepare_cold" else None
+        before = _snapshot(working)
+        start = time.perf_counter()
+        repository.prepare_repository(files, USER_KEY, [p.name for p in sources])
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        result.update(_copied_bytes(before, _snapshot(working)))
+        result["documents"] = len(_snapshot(working))
+    elif name == "local_search":
+        from local_tools.directory_search_tool import DirectorySearchTool
+        start = time.perf_counter()
+        tool = DirectorySearchTool(directory = str(working))
+        tool.index.refresh() # The tool indexes lazily; time the build here rather than inside the first query
+        result["index_s"] = round(time.perf_counter() - start, 3)
+        timings, hits = [], 0
+        for query in QUERIES * settings["query_rounds"]:
+            start = time.perf_counter()
+            hits += len(tool.search(query, max_results = 10))
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        DirectorySearchTool(directory = str(working)).index.refresh()
+        result["reindex_s"] = round(time.perf_counter() - start, 3)
+        scans = []
+        for query in QUERIES * settings["query_rounds"]:
+            start = time.perf_counter()
+            tool.scan(query, max_results = 10)
+            scans.append(time.perf_counter() - start)
+        tool.close()
+        result.update({"scan_" + key: value for key, value in _percentiles(scans).items()})
+        result.update(_percentiles(timings), seconds = round(result["index_s"] + sum(timings), 3), hits = hits)
+    elif name == "shared_search":
+        from helper_functions.embedding_index import index_paths, search
+        start = time.perf_counter()
+        scope = index_paths(repository.check_documents(working))
+        result["index_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        index_paths(repository.check_documents(working))
+        result["reindex_s"] = round(time.perf_counter() - start, 3)
+        timings = []
+        for query in QUERIES * settings["query_rounds"]:
+            start = time.perf_counter()
+            search(query, scope)
+            timings.append(time.perf_counter() - start)
+        result.update(_percentiles(timings), seconds = round(result["index_s"] + sum(timings), 3))
+    elif name == "hybrid_search":
+        from helper_functions.embedding_index import index_paths
+        from helper_functions.hybrid_retriever import HybridRetriever, retriever_for
+        scope = index_paths(repository.check_documents(working))
+        start = time.perf_counter()
+        retriever = retriever_for(scope)
+        result["index_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        HybridRetriever(retriever.folder)
+        result["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        timings = []
+        for query in QUERIES * settings["query_rounds"]:
+            start = time.perf_counter()
+            retriever.search(query, names = scope)
+            timings.append(time.perf_counter() - start)
+        result.update(_percentiles(timings), seconds = round(result["index_s"] + sum(timings), 3))
+    elif name == "crewai_search":
+        from crewai_tools import DirectorySearchTool
+        start = time.perf_counter()
+        tool = DirectorySearchTool(directory = str(working))
+        result["index_s"] = round(time.perf_counter() - start, 3)
+        timings = []
+        for query in QUERIES * settings["query_rounds"]:
+            start = time.perf_counter()
+            tool.run(search_query = query)
+            timings.append(time.perf_counter() - start)
+        result.update(_percentiles(timings), seconds = round(result["index_s"] + sum(timings), 3))
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+def run_phase(name: str, work_dir: Path, settings: dict) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_phase, (name, str(work_dir), settings))
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Phases whose wall time, peak RSS or bytes copied grew by more than `tolerance` over the baseline."""
+    before = {row["phase"]: row for row in baseline["phases"]}
+    problems = []
+    for row in report["phases"]:
+        old = before.get(row["phase"])
+        if not old:
+            continue
+        for metric in ("seconds", "peak_rss_mb", "bytes_copied"):
+            if metric in row and metric in old and row[metric] > old[metric] * (1 + tolerance) + 0.01:
+                problems.append(f"{row['phase']}: {metric} {row[metric]} vs baseline {old[metric]}")
+    return problems
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description = "Benchmark repository preparation, indexing and search on a synthetic corpus.")
+    parser.add_argument("--base-docs", type = int, default = 40, help = "Documents in the base repository.zip.")
+    parser.add_argument("--uploads", type = int, default = 10, help = "User-uploaded documents selected for the build.")
+    parser.add_argument("--doc-kb", type = int, default = 64, help = "Approximate text per document.")
+    parser.add_argument("--query-rounds", type = int, default = 5, help = "Times the query list is repeated.")
+    parser.add_argument("--crewai", action = "store_true", help = "Also index and query with crewai_tools (uses a local fake embeddings endpoint).")
+    parser.add_argument("--shared", action = "store_true", help = "Also index and query with the shared content-hash embedding index (local fake embeddings).")
+    parser.add_argument("--save", metavar = "NAME", help = f"Store the report as {BASELINE_DIR}/NAME.json.")
+    parser.add_argument("--baseline", metavar = "NAME", help = "Compare with a stored report and fail on regressions.")
+    parser.add_argument("--tolerance", type = float, default = 0.25)
+    args = parser.parse_args(argv)
+
+    settings = {"base_docs": args.base_docs, "uploads": args.uploads, "doc_kb": args.doc_kb, "query_rounds": args.query_rounds}
+    phases = ["bootstrap", "prepare_cold", "prepare_warm", "local_search"] + (["shared_search", "hybrid_search"] if args.shared else []) + (["crewai_search"] if args.crewai else [])
+    with tempfile.TemporaryDirectory(prefix = "repository-bench-") as scratch:
+        work_dir = Path(scratch)
+        corpus = build_corpus(work_dir, args.base_docs, args.uploads, args.doc_kb)
+        print(f"Corpus: {args.base_docs} base + {args.uploads} uploaded documents, zip {corpus['zip_bytes'] / 2**20:.1f} MiB, uploads {corpus['upload_bytes'] / 2**20:.1f} MiB")
+
+        os.environ.update({"PYTHONPATH": os.pathsep.join([str(Path(__file__).resolve().parents[1]), os.environ.get("PYTHONPATH", "")]),
+                           "CHROMA_PERSIST_PATH": str(work_dir / ".chroma"),
+                           "CACHE_DIR": str(work_dir / ".cache"),
+                           "CREWAI_STORAGE_DIR": str(work_dir / ".crewai_storage")})
+        fake = None
+        if args.crewai or args.shared:
+            from helper_functions.fake_services import FakeServices
+            fake = FakeServices().start()
+            os.environ.update({"OPENAI_BASE_URL": fake.openai_base_url, "OPENAI_API_KEY": "benchmark"})
+        try:
+            rows = [run_phase(name, work_dir, settings) for name in phases]
+        finally:
+            if fake is not None:
+                print(f"Fake embeddings endpoint: {dict(fake.snapshot())}")
+                fake.stop()
+
+    print(f"\n{'phase':<15}{'seconds':>10}{'bootstrap s':>13}{'peak RSS MB':>13}{'copied MB':>11}{'linked MB':>11}{'q p50 ms':>10}{'q p95 ms':>10}")
+    for row in rows:
+        mb = lambda key: f"{row[key] / 2**20:.1f}" if key in row else "-"
+        print(f"{row['phase']:<15}{row.get('seconds', '-'):>10}{row['bootstrap_s']:>13}{row['peak_rss_mb']:>13}{mb('bytes_copied'):>11}"
+              f"{mb('bytes_linked'):>11}{row.get('query_p50_ms', '-'):>10}{row.get('query_p95_ms', '-'):>10}")
+
+    report = {"settings": settings, "corpus": corpus, "phases": rows}
+    if args.save:
+        BASELINE_DIR.mkdir(parents = True, exist_ok = True)
+        (BASELINE_DIR / f"{args.save}.json").write_text(json.dumps(report, indent = 2))
+        print(f"Saved report to {BASELINE_DIR / (args.save + '.json')}")
+    if args.baseline:
+        baseline = json.loads((BASELINE_DIR / f"{args.baseline}.json").read_text())
+        if baseline["settings"] != settings:
+            print(f"Warning: baseline was recorded with {baseline['settings']}")
+        problems = compare(report, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # <---Libraries--->
 import streamlit as st
 from auth_hardcoded import login_form, require_login, logout_button
-from helper_functions.repository import prepare_repository, list_user_uploads, get_user_repository
+from helper_functions.repository import prepare_repository, list_user_uploads, get_user_repository, start_background_index
 from logics.crew_qna import process_qna
 
 # <-----User Login------>
@@ -16,6 +16,13 @@ require_login()  # or require_login(roles=["admin"])
 st.sidebar.write(f"Signed in as: {st.session_state['user']['name']}")
 logout_button()
 
+#embed the base documents once per worker process, in the background
+@st.cache_resource
+def _warm_base_index():
+    return start_background_index()
+
+_warm_base_index()
+
 # <---User Key--->
 user = st.session_state["user"]
 user_key = user.get("id") or user.get("name") # Get the user's key to access the correct user folder
@@ -0,0 +1,55 @@
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import time
+import pandas as pd
+import streamlit as st
+from auth_hardcoded import login_form, require_login, logout_button
+from helper_functions.tracing import TRACE_ENABLED, TRACE_LOG, read_spans, stage_summary
+
+# <-----User Login------>
+st.set_page_config(layout = "wide",
+                   page_title = "Pipeline Timings",)
+
+if not st.session_state.get("logged_in"):
+    login_form()
+    st.stop()
+
+require_login(roles = ["admin"])
+
+st.sidebar.write(f"Signed in as: {st.session_state['user']['name']}")
+logout_button()
+
+# <---Streamlit App Configuration-->
+st.title("News Digest Pipeline Timings")
+st.caption(f"Stage spans from {TRACE_LOG}. Tracing is {'on' if TRACE_ENABLED else 'off'} in this process (set NEWS_TRACE=1 to record).")
+
+hours = st.select_slider("Time window (hours)", options = [1, 6, 24, 72, 168], value = 24)
+spans = read_spans(since = time.time() - hours * 3600)
+if not spans:
+    st.info("No spans recorded in this window.")
+    st.stop()
+
+st.subheader("Per-stage latency")
+summary = pd.DataFrame(stage_summary(spans))
+st.dataframe(summary, use_container_width = True, hide_index = True)
+st.bar_chart(summary.set_index("stage")[["p50_ms", "p95_ms"]])
+
+st.subheader("Recent runs")
+frame = pd.DataFrame(spans)
+runs = frame[frame["stage"].isin(["digest", "digest_group"])].sort_values("ts", ascending = False).head(50)
+if runs.empty:
+    st.write("No completed digest runs in this window.")
+else:
+    runs = runs.assign(started = pd.to_datetime(runs["ts"] - runs["ms"] / 1000, unit = "s"), seconds = (runs["ms"] / 1000).round(2))
+    st.dataframe(runs[[c for c in ("started", "run", "stage", "industry", "location", "subscribers", "seconds", "ok") if c in runs]],
+                 use_container_width = True, hide_index = True)
+
+    run_id = st.selectbox("Inspect run", runs["run"].tolist())
+    detail = frame[frame["run"] == run_id].sort_values("ts")
+    st.dataframe(detail.drop(columns = ["run"]).dropna(axis = 1, how = "all"), use_container_width = True, hide_index = True)
@@ -0,0 +1,62 @@
+import sys
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except Exception:
+    pass
+
+# <---Libraries--->
+import time
+import pandas as pd
+import streamlit as st
+from auth_hardcoded import login_form, require_login, logout_button
+from helper_functions.llm_ledger import LEDGER_DB, LEDGER_ENABLED, feature_summary, read_calls, usage_by_hour
+
+# <-----User Login------>
+st.set_page_config(layout = "wide",
+                   page_title = "LLM Usage",)
+
+if not st.session_state.get("logged_in"):
+    login_form()
+    st.stop()
+
+require_login(roles = ["admin"])
+
+st.sidebar.write(f"Signed in as: {st.session_state['user']['name']}")
+logout_button()
+
+# <---Streamlit App Configuration-->
+st.title("LLM Usage by Feature")
+st.caption(f"Model calls recorded in {LEDGER_DB}. The ledger is {'on' if LEDGER_ENABLED else 'off'} in this process (LLM_LEDGER=0 turns it off). "
+           "Costs are estimates from list prices; crew rows combine all of a crew's agents.")
+
+hours = st.select_slider("Time window (hours)", options = [1, 6, 24, 72, 168, 720], value = 24)
+since = time.time() - hours * 3600
+summary = pd.DataFrame(feature_summary(since = since))
+if summary.empty:
+    st.info("No LLM calls recorded in this window.")
+    st.stop()
+
+totals = st.columns(4)
+totals[0].metric("API requests", f"{int(summary['requests'].sum()):,}")
+totals[1].metric("Cache hits", f"{int(summary['cache_hits'].sum()):,}")
+totals[2].metric("Tokens", f"{int(summary['total_tokens'].sum()):,}")
+totals[3].metric("Estimated cost", f"${summary['cost_usd'].fillna(0).sum():,.2f}")
+
+st.subheader("Per feature")
+st.dataframe(summary, use_container_width = True, hide_index = True)
+st.bar_chart(summary.groupby("feature")[["prompt_tokens", "completion_tokens"]].sum())
+
+hourly = pd.DataFrame(usage_by_hour(since = since))
+if not hourly.empty:
+    st.subheader("Tokens per hour")
+    hourly["hour"] = pd.to_datetime(hourly["hour"], unit = "s")
+    st.area_chart(hourly.pivot_table(index = "hour", columns = "feature", values = "tokens", aggfunc = "sum").fillna(0))
+
+st.subheader("Recent calls")
+calls = pd.DataFrame(read_calls(since = since, limit = 500))
+calls["ts"] = pd.to_datetime(calls["ts"], unit = "s")
+features = st.multiselect("Features", sorted(calls["feature"].unique()))
+if features:
+    calls = calls[calls["feature"].isin(features)]
+st.dataframe(calls.dropna(axis = 1, how = "all"), use_container_width = True, hide_index = True)
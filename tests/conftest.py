@@ -0,0 +1,10 @@
+import os, sys, tempfile
+from pathlib import Path
+
+# The helper modules read their settings at import time, so point every cache at a scratch folder first
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix = "tests-cache-")
+os.environ.setdefault("LLM_LEDGER", "0")
+os.environ.setdefault("LLM_TOKEN_COUNTER", "chars") # No tiktoken download
+os.environ.setdefault("OPENAI_API_KEY", "tests")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,21 @@
+from helper_functions.article_cache import article_cache, cached_article_text
+
+def test_redirect_aliases_are_not_counted_as_lookups():
+    article_cache.clear()
+    fetched = []
+    fetch = lambda url: fetched.append(url) or f"text of {url}"
+    resolve = lambda url: "https://example.com/story?utm_source=feed"
+    assert cached_article_text("https://news.google.com/a1?hl=en", fetch, resolve) == "text of https://example.com/story?utm_source=feed"
+    assert cached_article_text("https://news.google.com/a1", fetch, resolve) # Same link after normalisation
+    assert cached_article_text("https://news.google.com/other-locale", fetch, resolve) # Redirects to the same story
+    assert len(fetched) == 1
+    stats = article_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+
+def test_failed_fetches_are_cached_briefly():
+    article_cache.clear()
+    calls = []
+    fetch = lambda url: calls.append(url) or ""
+    assert cached_article_text("https://example.com/paywalled", fetch) == ""
+    assert cached_article_text("https://example.com/paywalled", fetch) == ""
+    assert len(calls) == 1
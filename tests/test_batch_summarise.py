@@ -0,0 +1,44 @@
+import json
+
+from helper_functions.batch_summarise import parse_batch_response, plan_batches
+
+IDS = ["a1", "a2", "a3"]
+
+def test_plain_json_array():
+    txt = json.dumps([{"id": "a1", "summary": "Port  congestion\neases."}, {"id": "a2", "summary": "Freight rates rise."}])
+    assert parse_batch_response(txt, IDS, max_words = 10) == {"a1": "Port congestion eases.", "a2": "Freight rates rise."}
+
+def test_array_wrapped_in_prose_or_object():
+    wrapped = 'Here you go:\n```json\n[{"id": "a3", "summary": "Chip exports fall."}]\n```'
+    assert parse_batch_response(wrapped, IDS, max_words = 10) == {"a3": "Chip exports fall."}
+    keyed = json.dumps({"summaries": [{"id": "a1", "summary": "Lithium slides."}]})
+    assert parse_batch_response(keyed, IDS, max_words = 10) == {"a1": "Lithium slides."}
+
+def test_invalid_entries_are_dropped():
+    txt = json.dumps([
+        {"id": "a9", "summary": "Unknown id."},
+        {"id": "a1", "summary": ""},
+        {"id": "a2", "summary": ["not", "a", "string"]},
+        {"id": "a3", "summary": " ".join(["word"] * 16)}, # More than 1.5x max_words
+        "not an object",
+        {"id": "a1", "summary": "First valid a1."},
+        {"id": "a1", "summary": "Second a1 is ignored."},
+    ])
+    assert parse_batch_response(txt, IDS, max_words = 10) == {"a1": "First valid a1."}
+
+def test_unparseable_output_returns_nothing():
+    assert parse_batch_response("", IDS, max_words = 10) == {}
+    assert parse_batch_response("I cannot help with that.", IDS, max_words = 10) == {}
+    assert parse_batch_response('{"id": "a1"}', IDS, max_words = 10) == {}
+
+def test_plan_batches_respects_budget():
+    texts = ["x" * 40, "x" * 40, "x" * 200, "x" * 10]
+    assert plan_batches(texts, budget = 100, count = len) == [[0, 1], [2], [3]]
+
+def test_empty_texts_are_not_cache_hits(monkeypatch):
+    from helper_functions import batch_summarise
+    recorded = []
+    monkeypatch.setattr(batch_summarise, "record_cache_hit", lambda model, kind, hits = 1, feature_name = None: recorded.append(hits))
+    summaries = batch_summarise.summarise_batched(["", None, ""], "Energy", client = None, model = "m", single = lambda text: "unused")
+    assert summaries == ["", "", ""]
+    assert recorded == [0]
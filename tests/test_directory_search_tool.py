@@ -0,0 +1,34 @@
+import pytest
+
+from helper_functions.text_index import tokenize
+from local_tools import directory_search_tool
+from local_tools.directory_search_tool import _scan_mapped, _scan_text
+
+TEXT = "\n".join([
+    "Port congestion eased in Hamburg.",
+    "Die Straße nach Rotterdam ist gesperrt.",
+    "Unrelated line.",
+    "port CONGESTION returns; Strasse closures continue.",
+    "",
+    "Last line mentions lithium.",
+])
+
+@pytest.mark.parametrize("block", [8, 40, 2**20])
+@pytest.mark.parametrize("query", ["port congestion", "strasse", "lithium", "strasse port"])
+def test_mapped_scan_matches_text_scan(tmp_path, monkeypatch, block, query):
+    monkeypatch.setattr(directory_search_tool, "SCAN_BLOCK", block)
+    path = tmp_path / "notes.txt"
+    path.write_text(TEXT, encoding = "utf-8")
+    tokens = tokenize(query)
+    mapped = [hit["lineno"] for hit in _scan_mapped(path, tokens, 10)]
+    assert mapped == [hit["lineno"] for hit in _scan_text(path, TEXT, tokens, 10)]
+    assert mapped # Every query matches something
+
+def test_line_longer_than_a_block_is_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(directory_search_tool, "SCAN_BLOCK", 64)
+    path = tmp_path / "dump.json"
+    path.write_text("first line\n" + '{"v": "' + "x" * 1000 + '", "note": "Straße"}' + "\nport straße\n", encoding = "utf-8")
+    hits = _scan_mapped(path, tokenize("strasse"), 10)
+    assert [hit["lineno"] for hit in hits] == [2, 3]
+    assert hits[0]["snippet"].endswith('"note": "Straße"}')
+    assert len(hits[0]["snippet"]) <= directory_search_tool.LONG_LINE_SNIPPET
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from helper_functions.disk_cache import DiskCache
+
+def _cache(tmp_path, **kwargs) -> DiskCache:
+    return DiskCache(tmp_path / "cache.sqlite", **kwargs)
+
+def test_round_trip_and_stats(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("key", {"any": ["json", 1]}, cost = 0.5)
+    assert cache.get("key") == {"any": ["json", 1]}
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["saved_seconds"] == 0.5
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = _cache(tmp_path, ttl = 0.05)
+    cache.set("default", "a")
+    cache.set("longer", "b", ttl = 60)
+    time.sleep(0.1)
+    assert cache.get("default") is None
+    assert cache.get("longer") == "b"
+    assert cache.stats()["entries"] == 1
+
+@pytest.mark.parametrize("policy, survivor", [("lru", "first"), ("lfu", "first"), ("fifo", "second")])
+def test_eviction_policy_picks_victim(tmp_path, policy, survivor):
+    cache = _cache(tmp_path, policy = policy)
+    value = "x" * 200
+    cache.set("first", value)
+    time.sleep(0.01)
+    cache.set("second", value)
+    time.sleep(0.01)
+    cache.get("first") # Recently and more often used; still the oldest entry
+    cache.max_bytes = cache.stats()["bytes"] # Room for exactly two entries
+    cache.set("third", value)
+    kept = {key for key in ("first", "second") if cache.get(key) is not None}
+    assert kept == {survivor}
+    assert cache.get("third") == value
+    assert cache.stats()["evictions"] == 1
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _cache(tmp_path, policy = "random")
+
+def test_running_byte_total_matches_entries(tmp_path):
+    cache = _cache(tmp_path, ttl = 60)
+    stored = lambda: cache._connect().execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+    cache.set("a", "x" * 500)
+    cache.set("b", "y" * 50)
+    cache.set("a", "z" * 5000) # Overwrite with a different size
+    cache.set("gone", "w", ttl = 0.01)
+    time.sleep(0.02)
+    cache.get("gone") # Expired entries are deleted on read
+    cache.delete("b")
+    assert stored() == cache.stats()["bytes"] > 0
+    cache.clear()
+    assert stored() == 0
+    cache.set("c", "v")
+    assert stored() == cache.stats()["bytes"]
+    reopened = _cache(tmp_path, ttl = 60) # Seeding never double-counts an existing file
+    assert reopened._connect().execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0] == reopened.stats()["bytes"]
@@ -0,0 +1,10 @@
+from helper_functions import geo_normalise
+
+def test_acronyms_and_words_do_not_share_cache_entries(monkeypatch):
+    monkeypatch.setattr(geo_normalise, "_crew_normalise", lambda query: {"canonical_name": f"crew {query}"})
+    monkeypatch.setattr(geo_normalise, "_memo", {})
+    assert geo_normalise.geo_normalise("SEA")["canonical_name"] == "Southeast Asia"
+    assert geo_normalise.geo_normalise("sea")["canonical_name"] == "crew sea"
+    assert geo_normalise.geo_normalise("car")["canonical_name"] == "crew car"
+    assert geo_normalise.geo_normalise("CAR")["canonical_name"] == "Central African Republic"
+    assert geo_normalise.geo_normalise("S.E.A.")["canonical_name"] == "Southeast Asia"
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from helper_functions import hybrid_retriever
+from helper_functions.hybrid_retriever import RRF_K, HybridRetriever, build_arrays
+
+CHUNKS = {
+    # doc_hash, idx: (text, vector)
+    ("doc-a", 0): ("lithium refining capacity expands", [1.0, 0.0, 0.0]),
+    ("doc-a", 1): ("copper smelter maintenance", [0.0, 1.0, 0.0]),
+    ("doc-b", 0): ("lithium lithium battery supply", [0.0, 0.0, 1.0]),
+    ("doc-b", 1): ("semiconductor wafer shortage", [0.7, 0.7, 0.0]),
+}
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    def iter_chunks(doc_hashes, model):
+        for (doc_hash, idx), (text, vector) in sorted(CHUNKS.items()):
+            if doc_hash in doc_hashes:
+                yield doc_hash, idx, 1, text, np.asarray(vector, dtype = np.float32).tobytes()
+    monkeypatch.setattr(hybrid_retriever, "iter_chunks", iter_chunks)
+    monkeypatch.setattr(hybrid_retriever, "chunk_text", lambda doc_hash, idx, model: CHUNKS[(doc_hash, idx)][0])
+    folder = tmp_path / "scope"
+    assert build_arrays({"doc-a": "a.pdf", "doc-b": "b.pdf"}, folder) == 4
+    return HybridRetriever(folder)
+
+def _rrf(*ranks) -> float:
+    return round(sum(1 / (RRF_K + rank) for rank in ranks), 5)
+
+def test_bm25_scores_only_chunks_with_query_terms(retriever):
+    scores = retriever.bm25_scores("Lithium supply")
+    assert scores[0] > 0 and scores[2] > scores[0] # Chunk rows follow (doc_hash, idx) order
+    assert scores[1] == 0 and scores[3] == 0
+
+def test_reciprocal_rank_fusion(retriever):
+    embed = lambda texts: [[1.0, 0.1, 0.0]] # Dense order: a/0, b/1, a/1, b/0
+    hits = retriever.search("lithium", top_k = 4, embed = embed, names = {"doc-a": "a.pdf"})
+    fused = {(hit["file"], hit["chunk"]): hit["score"] for hit in hits}
+    assert fused == {
+        ("a.pdf", 0): _rrf(1, 2), # dense rank 1, BM25 rank 2
+        ("doc-b", 0): _rrf(4, 1), # dense rank 4, BM25 rank 1
+        ("doc-b", 1): _rrf(2),
+        ("a.pdf", 1): _rrf(3),
+    }
+    assert [(hit["file"], hit["chunk"]) for hit in hits][:2] == [("a.pdf", 0), ("doc-b", 0)]
+    assert hits[0]["text"] == "lithium refining capacity expands"
+
+def test_empty_query_returns_nothing(retriever):
+    assert retriever.search("   ", embed = lambda texts: [[1.0, 0.0, 0.0]]) == []
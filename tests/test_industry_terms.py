@@ -0,0 +1,34 @@
+import json
+from types import SimpleNamespace
+
+from helper_functions.industry_terms import expand_industry_terms, expansion_key, terms_cache, warm_up
+
+class FakeClient:
+    def __init__(self, terms):
+        self.terms, self.calls = terms, 0
+        self.responses = SimpleNamespace(create = self.create)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.terms is None:
+            raise RuntimeError("model unavailable")
+        return SimpleNamespace(output_text = json.dumps({"terms": self.terms}))
+
+def test_cache_changes_reach_running_workers():
+    client = FakeClient(["wafer", "foundry"])
+    assert expand_industry_terms("Chips", client, "m")[-2:] == ["wafer", "foundry"]
+    assert expand_industry_terms("Chips", client, "m")[-2:] == ["wafer", "foundry"]
+    assert client.calls == 1
+    terms_cache.set(expansion_key("Chips", 20, "m"), ["Chips", "lithography"]) # e.g. an admin refresh from another process
+    assert expand_industry_terms("Chips", client, "m") == ["Chips", "lithography"]
+    terms_cache.delete(expansion_key("Chips", 20, "m")) # e.g. expired
+    assert expand_industry_terms("Chips", client, "m")[-2:] == ["wafer", "foundry"]
+    assert client.calls == 2
+
+def test_failed_refresh_keeps_the_cached_expansion():
+    assert warm_up(FakeClient(["pipeline", "refinery"]), "m", industries = ["Gas"])["Gas"][-2:] == ["pipeline", "refinery"]
+    failing = FakeClient(None)
+    warm_up(failing, "m", industries = ["Gas"], refresh = True)
+    assert failing.calls == 1
+    assert expand_industry_terms("Gas", failing, "m")[-2:] == ["pipeline", "refinery"]
+    assert failing.calls == 1
@@ -0,0 +1,28 @@
+from helper_functions.news_ranking import collapse_duplicates, hamming, simhash
+
+def test_simhash_is_stable_and_close_for_near_duplicates():
+    text = "Red Sea shipping disruption pushes container freight rates to a two year high for Asia Europe routes"
+    assert simhash(text) == simhash(text)
+    assert simhash("") == 0
+    near = hamming(simhash(text), simhash(text + " analysts say"))
+    far = hamming(simhash(text), simhash("Semiconductor export controls tightened on advanced chip equipment"))
+    assert near < far
+
+def test_collapse_keeps_first_copy_and_counts_duplicates():
+    items = [
+        {"title": "Port strike halts Rotterdam container traffic - Reuters", "summary": "Dock workers walked out on Monday."},
+        {"title": "Port strike halts Rotterdam container traffic - Bloomberg", "summary": "Syndicated copy."},
+        {"title": "Lithium prices slide as new supply comes online - FT", "summary": "Battery makers benefit."},
+        {"title": "Port strike halts Rotterdam container traffic | Lloyd's List", "summary": ""},
+    ]
+    kept = collapse_duplicates(items)
+    assert [item["title"] for item in kept] == [items[0]["title"], items[2]["title"]]
+    assert kept[0]["duplicates"] == 2
+    assert "duplicates" not in kept[1]
+
+def test_collapse_respects_max_distance():
+    items = [{"title": "Copper mine flooding cuts output", "summary": "Chile"},
+             {"title": "Copper mine flooding cuts output sharply", "summary": "Chile"}]
+    assert len(collapse_duplicates(items, max_distance = 64)) == 1
+    distance = hamming(simhash("Copper mine flooding cuts output Chile"), simhash("Copper mine flooding cuts output sharply Chile"))
+    assert len(collapse_duplicates(items, max_distance = distance - 1)) == 2
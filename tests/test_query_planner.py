@@ -0,0 +1,33 @@
+import pytest
+
+from helper_functions.query_planner import _or_group, plan_queries
+
+TERMS = [f"supply term {i}" for i in range(30)]
+RISKS = [f"risk {i}" for i in range(12)]
+
+def test_short_query_is_a_single_shard():
+    assert plan_queries(["chips", "wafers"], ["shortage"], "Singapore") == ['("chips" OR "wafers") AND ("shortage") AND "Singapore"']
+    assert plan_queries(["chips"]) == ['("chips")']
+    assert plan_queries(["", None], ["shortage"]) == []
+
+def test_shards_stay_within_budget_and_cover_every_combination():
+    queries = plan_queries(TERMS, RISKS, "Malaysia", max_chars = 200, max_shards = 50)
+    assert len(queries) > 1
+    assert all(len(q) <= 200 for q in queries)
+    assert all(q.endswith(' AND "Malaysia"') for q in queries)
+    pairs = {(t, r) for q in queries for t in TERMS if f'"{t}"' in q for r in RISKS if f'"{r}"' in q}
+    assert pairs == {(t, r) for t in TERMS for r in RISKS}
+
+def test_budget_grows_to_respect_max_shards():
+    queries = plan_queries(TERMS, RISKS, None, max_chars = 100, max_shards = 3)
+    assert 1 <= len(queries) <= 3
+    assert {t for q in queries for t in TERMS if f'"{t}"' in q} == set(TERMS)
+
+@pytest.mark.parametrize("max_chars, max_shards", [(480, 0), (480, -2), (0, 1), (1, 1)])
+def test_degenerate_limits_still_return_one_shard(max_chars, max_shards):
+    queries = plan_queries(TERMS, RISKS, "Germany", max_chars = max_chars, max_shards = max_shards)
+    assert queries == [f'{_or_group(TERMS)} AND {_or_group(RISKS)} AND "Germany"']
+
+def test_zero_max_chars_grows_to_max_shards():
+    queries = plan_queries(TERMS, RISKS, "Germany", max_chars = 0, max_shards = 8)
+    assert 1 <= len(queries) <= 8
@@ -0,0 +1,17 @@
+import os
+
+from helper_functions.repository import _read_only, _shares_writable_inode, sync_working_repository
+
+def test_checking_a_source_never_changes_its_permissions(tmp_path):
+    upload = tmp_path / "upload.txt"
+    upload.write_text("user data")
+    os.chmod(upload, 0o644)
+    _read_only(upload)
+    _shares_writable_inode(upload, upload)
+    working = tmp_path / "working"
+    working.mkdir()
+    summary = sync_working_repository({"upload.txt": upload}, working, tmp_path / "manifest.json")
+    assert summary["linked"] == 0 # A writable source is never hard-linked
+    assert upload.stat().st_mode & 0o777 == 0o644
+    (working / "upload.txt").write_text("edited copy")
+    assert upload.read_text() == "user data"
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from helper_functions.text_index import TextIndex, bm25, parse_query, tokenize
+
+def _index(tmp_path, files: dict) -> TextIndex:
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    for name, text in files.items():
+        (folder / name).write_text(text, encoding = "utf-8")
+    return TextIndex(folder, read_text = lambda p: Path(p).read_text(encoding = "utf-8"), file_glob = "*.txt")
+
+def test_tokenize_and_parse_query():
+    assert tokenize("Straße PORT-congestion") == ["strasse", "port", "congestion"]
+    terms, phrases = parse_query('"port congestion" contingency "single"')
+    assert terms == ["port", "congestion", "contingency", "single"]
+    assert phrases == [["port", "congestion"]] # One-word quotes are ordinary terms
+
+def test_bm25_prefers_frequent_terms_in_short_documents():
+    assert bm25(tf = 3, df = 1, length = 100, documents = 10, avg_length = 100) > bm25(tf = 1, df = 1, length = 100, documents = 10, avg_length = 100)
+    assert bm25(tf = 1, df = 1, length = 50, documents = 10, avg_length = 100) > bm25(tf = 1, df = 1, length = 200, documents = 10, avg_length = 100)
+    assert bm25(tf = 1, df = 1, length = 100, documents = 10, avg_length = 100) > bm25(tf = 1, df = 9, length = 100, documents = 10, avg_length = 100)
+
+def test_ranking_follows_term_frequency(tmp_path):
+    index = _index(tmp_path, {
+        "lithium.txt": "Lithium supply.\nLithium refining capacity.\nLithium prices.",
+        "mixed.txt": "Copper supply.\nLithium is mentioned once.\nNickel output.",
+        "other.txt": "Semiconductor fabs and wafers.",
+    })
+    hits = index.search("lithium")
+    assert [Path(hit["file"]).name for hit in hits][0] == "lithium.txt"
+    assert {Path(hit["file"]).name for hit in hits} == {"lithium.txt", "mixed.txt"}
+    assert index.stats()["documents"] == 3
+
+def test_phrase_must_appear_verbatim(tmp_path):
+    index = _index(tmp_path, {
+        "phrase.txt": "Intro line.\nPort congestion in Singapore worsened.\nClosing line.",
+        "scattered.txt": "The port was quiet.\nCongestion moved inland.",
+    })
+    hits = index.search('"port congestion"')
+    assert {Path(hit["file"]).name for hit in hits} == {"phrase.txt"}
+    assert hits[0]["lineno"] == 2
+    assert "Port congestion" in hits[0]["snippet"]
+    assert index.search('"congestion port"') == []
+    assert index.search('"port blockade"') == [] # Unseen word
+
+def test_refresh_is_incremental(tmp_path):
+    index = _index(tmp_path, {"a.txt": "alpha", "b.txt": "beta"})
+    assert index.refresh()["indexed"] == 2
+    assert index.refresh() == {"kept": 2, "linked": 0, "indexed": 0, "removed": 0}
+    (index.directory / "b.txt").unlink()
+    (index.directory / "c.txt").write_text("gamma", encoding = "utf-8")
+    counts = index.refresh()
+    assert (counts["indexed"], counts["removed"]) == (1, 1)
+    assert index.search("beta") == []
+    assert [Path(hit["file"]).name for hit in index.search("gamma")] == ["c.txt"]
+
+def test_snippets_and_pages_come_from_the_index(tmp_path):
+    pages = "\n".join(f"filler line {i}" for i in range(255)) + "\fSecond page opens.\nCobalt quota announced.\nLast line."
+    index = _index(tmp_path, {"report.txt": pages})
+    index.refresh()
+    reads = []
+    index.read_text = lambda p: reads.append(p) or ""
+    hits = index.search("cobalt")
+    assert reads == []
+    assert (hits[0]["lineno"], hits[0]["page"]) == (257, 2) # Context spans two stored line blocks
+    assert hits[0]["snippet"] == "Second page opens.\nCobalt quota announced.\nLast line."